@@ -1,11 +1,15 @@
-import os
 import threading
 import time
-import wave
-from typing import Optional
+from typing import List, Optional
 
-import numpy as np
-import sounddevice as sd
+from audio_backend import create_backend
+from audio_devices import AudioDeviceManager
+from autotune import DEFAULT_CANDIDATES, AutoTuner
+from bridge import ROLES, DuplexBridge
+from clip_manifest import DEFAULT_MANIFEST, ClipLibrary
+from clip_store import ClipStore
+from latency_probe import LatencyProbe
+from mixer import Voice
 
 
 class AudioHandler:
@@ -21,135 +25,192 @@ class AudioHandler:
                 'session': {'duration': 10, 'num_tracks': 5}
             }
         self.config = config
-        self.chunk = 1024
-        self.rate = 44100
+        audio_config = config.get('audio', {})
+        # blocksize: frames per callback, or 'auto' for the autotuned size
+        blocksize = audio_config.get('blocksize', 256)
+        self.auto_blocksize = blocksize == 'auto'
+        tune_config = audio_config.get('autotune', {})
+        self.chunk = max(tune_config.get('candidates', DEFAULT_CANDIDATES)) if self.auto_blocksize else int(blocksize)
+        self.rate = int(audio_config.get('samplerate', 44100))
         self.channels = 1
         self.bridging = False
         self.session_active = False
-        self.streams: dict = {}
+        self._session_over = threading.Event()  # set by stop_bridging() to end a session early
+        # One owner of the bridge at a time: a probe or autotune run, or a session starting
+        self.bridge_lock = threading.Lock()
         
-        # Audio device attributes
-        self.device_a_out: int = int(config.get('audio', {}).get('device_a', 1))
-        self.device_a_in: int = int(config.get('audio', {}).get('device_a', 1))
-        self.device_b_out: int = int(config.get('audio', {}).get('device_b', 2))
-        self.device_b_in: int = int(config.get('audio', {}).get('device_b', 2))
         self.format: int = 16  # 16-bit audio
         self.p = None  # PyAudio interface (optional)
         
-        self._generate_clips()
-
-    def _generate_clips(self):
-        """Generate tone clips if not present."""
-        clip_dir = 'audio_clips'
-        os.makedirs(clip_dir, exist_ok=True)
-        frequencies = [300, 400, 500, 600, 700]
-        for i, freq in enumerate(frequencies, 1):
-            path = os.path.join(clip_dir, f'track{i}.wav')
-            if not os.path.exists(path):
-                self._generate_tone(path, 10, freq)
-
-        success_path = os.path.join(clip_dir, 'success.wav')
-        if not os.path.exists(success_path):
-            self._generate_tone(success_path, 0.5, 1000)
-
-    def _generate_tone(self, filename: str, duration: float, frequency: float):
-        """Generate a WAV tone file."""
-        t = np.linspace(0, duration, int(self.rate * duration), False)
-        tone = np.sin(frequency * 2 * np.pi * t)
-        # Fade
-        fade_len = int(self.rate * 0.01)
-        tone[:fade_len] = tone[:fade_len] * np.linspace(0, 1, fade_len)
-        tone[-fade_len:] = tone[-fade_len:] * np.linspace(1, 0, fade_len)
-        tone = np.int16(tone * 32767)
-        with wave.open(filename, 'w') as wav_file:
-            wav_file.setnchannels(self.channels)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(self.rate)
-            wav_file.writeframes(tone.tobytes())
+        # sounddevice, or a virtual/null stand-in (config 'backend')
+        self.sd = create_backend(config)
+        # Role ('a'/'b') -> device binding with failover
+        self.devices = AudioDeviceManager(config, self.sd)
+        # One duplex callback stream per device: mixer (tracks, cues) + bridge
+        self.bridge = DuplexBridge(self.devices, self.sd, samplerate=self.rate, blocksize=self.chunk,
+                                   channels=self.channels)
+        self.tuner = AutoTuner(self.bridge, **tune_config)
+        if self.auto_blocksize:
+            # Until tuned, the largest candidate is the safe choice
+            stored = self.tuner.load()
+            if stored:
+                self.chunk = stored
+                self.bridge.reconfigure(blocksize=stored)
+        self.clip_store = ClipStore('audio_clips', self.rate, self.channels)
+        # Missing/stale clips are generated in the background; get() waits per clip
+        self.clip_library = ClipLibrary(self.clip_store, {**DEFAULT_MANIFEST, **config.get('clips', {})})
+        self.clip_library.prepare()
+        self.probe = LatencyProbe(self.bridge)
+
+    def _start_streams(self) -> bool:
+        try:
+            self.bridge.start()
+            return True
+        except Exception as e:
+            print(f"Audio stream start error: {e}")
+            return False
+
+    def play_clip(self, name: str, roles=ROLES, loop: bool = False) -> List[Voice]:
+        """Schedule audio_clips/<name>.wav on the given stations' mixers."""
+        if not self._start_streams():
+            return []
+        clip = self.clip_library.get(name)
+        return [self.bridge.mixers[role].play(clip, name=name, loop=loop) for role in roles]
 
     def play_wav(self, filename: str, device: int):
         """Play WAV file on specified device."""
         try:
-            with wave.open(filename, 'rb') as wf:
-                data = wf.readframes(wf.getnframes())
-                sd.play(np.frombuffer(data, dtype=np.int16), samplerate=wf.getframerate(), device=device)
-                sd.wait()
+            roles = [role for role in ROLES if self.devices.device_for(role) == device]
+            if not roles:
+                raise ValueError(f"device {device} is not bound to a station")
+            if self._start_streams():
+                for role in roles:
+                    self.bridge.mixers[role].play(self.clip_store.load(filename), name=filename)
         except Exception as e:
             print(f"Error playing {filename}: {e}")
 
+    def play_cue(self, name: str) -> List[Voice]:
+        """Success/mismatch/timeout cue on both stations, starting on the next block."""
+        return self.play_clip(name)
+
     def start_bridging(self):
         """Start audio bridging between stations."""
         if self.bridging:
             return
         self.bridging = True
         try:
-            self.stream_a_in = sd.InputStream(device=self.config['audio']['device_a'], channels=self.channels, samplerate=self.rate, blocksize=self.chunk)
-            self.stream_b_in = sd.InputStream(device=self.config['audio']['device_b'], channels=self.channels, samplerate=self.rate, blocksize=self.chunk)
-            self.stream_a_out = sd.OutputStream(device=self.config['audio']['device_a'], channels=self.channels, samplerate=self.rate, blocksize=self.chunk)
-            self.stream_b_out = sd.OutputStream(device=self.config['audio']['device_b'], channels=self.channels, samplerate=self.rate, blocksize=self.chunk)
-
-            self.stream_a_in.start()
-            self.stream_b_in.start()
-            self.stream_a_out.start()
-            self.stream_b_out.start()
-
-            threading.Thread(target=self._bridge_a_to_b, daemon=True).start()
-            threading.Thread(target=self._bridge_b_to_a, daemon=True).start()
+            self.bridge.connect()
         except Exception as e:
             print(f"Bridging start error: {e}")
             self.bridging = False
 
-    def _bridge_a_to_b(self):
-        while self.bridging:
-            try:
-                data, _ = self.stream_a_in.read(self.chunk)
-                self.stream_b_out.write(data)
-            except Exception as e:
-                print(f"A to B error: {e}")
-                break
-
-    def _bridge_b_to_a(self):
-        while self.bridging:
-            try:
-                data, _ = self.stream_b_in.read(self.chunk)
-                self.stream_a_out.write(data)
-            except Exception as e:
-                print(f"B to A error: {e}")
-                break
-
     def stop_bridging(self):
-        """Stop audio bridging."""
+        """Stop audio bridging (and end a running session)."""
         self.bridging = False
-        time.sleep(0.1)
-        for stream in [self.stream_a_in, self.stream_b_in, self.stream_a_out, self.stream_b_out]:
-            if hasattr(self, stream.__name__ if hasattr(stream, '__name__') else 'stream'):
+        self._session_over.set()
+        self.bridge.disconnect()
+
+    @property
+    def needs_autotune(self) -> bool:
+        """blocksize is 'auto' and this hardware has no stored setting yet."""
+        return self.auto_blocksize and self.tuner.load() is None
+
+    def autotune(self, run_trial=None) -> Optional[int]:
+        """
+        Step the bridge block size down until it stops being stable (see
+        autotune), keep and persist the smallest stable size. Runs the bridge
+        for a few seconds per candidate, so never during a session: run it
+        before matches can arrive (a session start would wait for it).
+        """
+        with self.bridge_lock:
+            if self.session_active:
+                return None
+            if run_trial is not None:
+                self.tuner.run_trial = run_trial
+            self.chunk = self.tuner.tune()
+            return self.chunk
+
+    def probe_latency(self, advance=None) -> Optional[dict]:
+        """
+        Chirp-probe both bridge directions (see latency_probe). Between
+        sessions the bridge is connected just for the probe, privately: the
+        microphones are not routed, only the chirp crosses. Skipped while a
+        session is live so the chirp never lands in a conversation; a session
+        that starts mid-probe waits for it (bridge_lock) and then takes over
+        the bridge.
+        """
+        if self.session_active or not self._start_streams():
+            return None
+        with self.bridge_lock:
+            if self.session_active:
+                return None
+            connected_here = not self.bridge.connected
+            if connected_here:
+                self.bridge.private = True
+                self.bridge.connect()
+            try:
+                for role in ROLES:
+                    self.probe.measure(role, advance=advance)
+            finally:
+                # A session waiting on the lock keeps the (still private) bridge
+                if connected_here and not self.session_active:
+                    self.bridge.disconnect()
+                    self.bridge.private = False
+            return self.probe.stats()
+
+    def start_latency_probes(self, interval_s: float):
+        """Probe every interval_s seconds on a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval_s)
                 try:
-                    stream.stop()
-                    stream.close()
-                except:
-                    pass
-
-    def play_success_and_bridge(self):
-        """Play success sound and start bridging for session duration."""
+                    stats = self.probe_latency()
+                except Exception as e:
+                    print(f"Latency probe error: {e}")
+                    continue
+                if stats:
+                    print(f"Bridge latency: {stats}")
+        threading.Thread(target=run, name="latency-probe", daemon=True).start()
+
+    def play_success_and_bridge(self) -> threading.Thread:
+        """
+        Play the success sound and bridge the stations for the session
+        duration. The session runs on its own thread and this returns
+        immediately: it is called from the MQTT callback, which must not block
+        past the broker keepalive.
+        """
         self.session_active = True
-        success_path = os.path.join('audio_clips', 'success.wav')
-        threading.Thread(target=self.play_wav, args=(success_path, self.config['audio']['device_a']), daemon=True).start()
-        threading.Thread(target=self.play_wav, args=(success_path, self.config['audio']['device_b']), daemon=True).start()
-        time.sleep(0.5)  # Wait for success sound
-        self.start_bridging()
-        time.sleep(self.config['session']['duration'])
-        self.stop_bridging()
-        self.session_active = False
+        self._session_over.clear()
+        session = threading.Thread(target=self._run_session, name="session", daemon=True)
+        session.start()
+        return session
+
+    def _run_session(self):
+        try:
+            for mixer in self.bridge.mixers.values():
+                mixer.stop('tracks')
+            for voice in self.play_cue('success'):
+                voice.wait(timeout=voice.frames / self.rate + 1)
+            with self.bridge_lock:  # waits out a running probe or autotune
+                ended = self._session_over.is_set()
+                if ended:
+                    self.bridge.disconnect()
+                self.bridge.private = False
+                if not ended:
+                    self.start_bridging()
+            if not ended:
+                self._session_over.wait(self.config['session']['duration'])
+            self.stop_bridging()
+        finally:
+            self.session_active = False
+        self.play_tracks_loop()
 
     def play_tracks_loop(self):
-        """Loop playing tracks to stations."""
-        tracks = list(range(1, self.config['session']['num_tracks'] + 1))
-        while True:
-            for track in tracks:
-                if self.session_active:
-                    time.sleep(1)
-                    continue
-                track_path = os.path.join('audio_clips', f'track{track}.wav')
-                threading.Thread(target=self.play_wav, args=(track_path, self.config['audio']['device_a']), daemon=True).start()
-                threading.Thread(target=self.play_wav, args=(track_path, self.config['audio']['device_b']), daemon=True).start()
-                time.sleep(10)  # Track duration
\ No newline at end of file
+        """Loop the tracks back to back on both stations (returns immediately)."""
+        if not self._start_streams():
+            return
+        tracks = [self.clip_library.get(f'track{track}')
+                  for track in range(1, self.config['session']['num_tracks'] + 1)]
+        for mixer in self.bridge.mixers.values():
+            mixer.stop('tracks')
+            mixer.play(tracks, name='tracks', loop=True)
@@ -0,0 +1,303 @@
+"""
+Pluggable audio backends.
+
+Audio code only uses the small slice of the sounddevice API listed below,
+so any object that provides that slice can stand in for the module:
+    query_devices(), default.device, Stream(..., callback, finished_callback),
+    _terminate(), _initialize()
+create_backend() returns one of three implementations, chosen by the
+config's top-level 'backend':
+
+  real     the sounddevice module (PortAudio hardware)
+  virtual  VirtualBackend: duplex devices on a simulated clock. Each device's
+           input is silence, noise, a WAV file or a loopback of its own
+           output. Per-device clock drift (ppm), random xrun injection and a
+           simulated per-callback host cost are optional. run(seconds)
+           advances the clock as fast as the callbacks allow; with
+           realtime=True a thread paces it to the wall clock instead.
+  null     NullBackend: devices that accept streams but never call back
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('real', 'virtual', 'null')
+
+
+class VirtualTimeInfo:
+    """Stand-in for the callback's time argument (PortAudio stream times)."""
+
+    __slots__ = ('currentTime', 'inputBufferAdcTime', 'outputBufferDacTime')
+
+    def __init__(self, current: float, adc: float, dac: float):
+        self.currentTime = current
+        self.inputBufferAdcTime = adc
+        self.outputBufferDacTime = dac
+
+
+class VirtualCallbackFlags:
+    """Stand-in for sd.CallbackFlags: truthy when an xrun was flagged."""
+
+    __slots__ = ('input_overflow', 'output_underflow')
+
+    def __init__(self, input_overflow: bool = False, output_underflow: bool = False):
+        self.input_overflow = input_overflow
+        self.output_underflow = output_underflow
+
+    def __bool__(self):
+        return self.input_overflow or self.output_underflow
+
+
+class VirtualDevice:
+    """A duplex device: input source, latencies, clock drift and xrun rate."""
+
+    def __init__(self, name: str, input: Union[str, np.ndarray] = 'silence', drift_ppm: float = 0.0,
+                 xrun_rate: float = 0.0, input_latency_s: float = 0.005, output_latency_s: float = 0.005,
+                 channels: int = 2, record: bool = False, callback_overhead_s: float = 0.0):
+        self.name = name
+        self.input = input
+        self.loopback = isinstance(input, str) and input == 'loopback'
+        self.drift_ppm = drift_ppm
+        self.xrun_rate = xrun_rate
+        self.input_latency_s = input_latency_s
+        self.output_latency_s = output_latency_s
+        self.channels = channels
+        self.record = record
+        # Simulated host cost per callback: when it outlasts the block period
+        # every callback underflows (deterministic, unlike the wall-clock
+        # time of the Python callback itself)
+        self.callback_overhead_s = callback_overhead_s
+        self.recorded: List[np.ndarray] = []
+        self.samples: Optional[np.ndarray] = None  # file/array input, loaded on first stream
+        self.position = 0
+        self.last_output: Optional[np.ndarray] = None
+
+    def info(self) -> Dict[str, Any]:
+        return {'name': self.name, 'max_input_channels': self.channels,
+                'max_output_channels': self.channels, 'default_samplerate': 44100.0}
+
+    def load_input(self, samplerate: int, channels: int):
+        """Resolve array/WAV input (a WAV is mapped through the clip store at the stream's rate)."""
+        if isinstance(self.input, np.ndarray):
+            self.samples = self.input.astype(np.float32).reshape(len(self.input), -1)
+        elif isinstance(self.input, str) and self.input.endswith('.wav'):
+            from clip_store import ClipStore
+            store = ClipStore(os.path.dirname(os.path.abspath(self.input)), samplerate, channels)
+            self.samples = store.load(self.input)
+        self.position = 0
+
+    def fill_input(self, indata: np.ndarray, rng: np.random.Generator):
+        if self.samples is not None:
+            idx = (self.position + np.arange(len(indata))) % len(self.samples)
+            indata[:] = self.samples[idx, :indata.shape[1]]  # a mono source feeds every channel
+            self.position = (self.position + len(indata)) % len(self.samples)
+        elif self.loopback:
+            if self.last_output is not None and self.last_output.shape == indata.shape:
+                indata[:] = self.last_output
+            else:
+                indata.fill(0)
+        elif isinstance(self.input, str) and self.input == 'noise':
+            indata[:] = rng.standard_normal(indata.shape) * 0.01
+        else:
+            indata.fill(0)
+
+
+class VirtualStream:
+    """A duplex stream driven by the backend's simulated clock."""
+
+    def __init__(self, backend: 'VirtualBackend', device=None, samplerate: float = 44100,
+                 blocksize: int = 256, channels: int = 1, dtype: str = 'float32', latency: Any = None,
+                 callback: Optional[Callable] = None, finished_callback: Optional[Callable] = None, **kwargs):
+        if device is None:
+            device = backend.default.device[1]
+        if not 0 <= device < len(backend.devices):
+            raise ValueError(f"Invalid device {device}")
+        if not blocksize:
+            raise ValueError("VirtualStream needs a fixed blocksize")
+        self.backend = backend
+        self.device = backend.devices[device]
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.period_s = blocksize / (samplerate * (1 + self.device.drift_ppm * 1e-6))
+        self.indata = np.zeros((blocksize, channels), dtype=np.float32)
+        self.outdata = np.zeros((blocksize, channels), dtype=np.float32)
+        self.active = False
+        self.closed = False
+        self.callbacks = 0
+        self.xruns = 0
+        self.cpu_s = 0.0
+        self.late = False
+        self.device.load_input(int(samplerate), channels)
+
+    def start(self):
+        if self.closed:
+            raise RuntimeError("Stream is closed")
+        self.active = True
+        self.backend._schedule(self, self.backend.now + self.period_s)
+
+    def _finish(self):
+        if self.active:
+            self.active = False
+            if self.finished_callback is not None:
+                self.finished_callback()
+
+    def stop(self):
+        self._finish()
+
+    def abort(self):
+        self._finish()
+
+    def close(self):
+        self._finish()
+        self.closed = True
+
+    def fail(self):
+        """Simulate the device disappearing (PortAudio aborts the stream)."""
+        self._finish()
+
+    def _tick(self, now: float):
+        device = self.device
+        status = VirtualCallbackFlags(output_underflow=self.late)
+        if device.xrun_rate and self.backend.rng.random() < device.xrun_rate:
+            status.input_overflow = True
+            self.indata.fill(0)
+        else:
+            device.fill_input(self.indata, self.backend.rng)
+        if status:
+            self.xruns += 1
+        self.outdata.fill(0)
+        time_info = VirtualTimeInfo(now, now - device.input_latency_s - self.period_s,
+                                    now + device.output_latency_s + self.period_s)
+        started = time.perf_counter()
+        self.callback(self.indata, self.outdata, self.blocksize, time_info, status)
+        self.cpu_s += time.perf_counter() - started
+        self.late = device.callback_overhead_s > self.period_s
+        self.callbacks += 1
+        if device.loopback:
+            device.last_output = self.outdata.copy()
+        if device.record:
+            device.recorded.append(self.outdata.copy())
+
+
+class VirtualBackend:
+    """sounddevice stand-in with virtual devices on a simulated clock."""
+
+    def __init__(self, devices: Union[int, List[Dict[str, Any]]] = 2, realtime: bool = False,
+                 speed: float = 1.0, seed: int = 0):
+        if isinstance(devices, int):
+            devices = [{'name': f'Virtual Device {i}'} for i in range(devices)]
+        self.devices = [VirtualDevice(**spec) for spec in devices]
+        self.default = SimpleNamespace(device=[0, 0])
+        self.rng = np.random.default_rng(seed)
+        self.now = 0.0
+        self.realtime = realtime
+        self.speed = speed
+        self._queue: List = []  # (due, seq, stream)
+        self._seq = 0
+        self._lock = threading.RLock()
+        self._clock: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # sounddevice API
+
+    def query_devices(self) -> List[Dict[str, Any]]:
+        return [device.info() for device in self.devices]
+
+    def Stream(self, **kwargs) -> VirtualStream:  # noqa: N802 - mirrors sd.Stream
+        stream = VirtualStream(self, **kwargs)
+        if self.realtime:
+            self.start_clock()
+        return stream
+
+    def _terminate(self):
+        pass
+
+    def _initialize(self):
+        pass
+
+    # Simulated clock
+
+    def _schedule(self, stream: VirtualStream, due: float):
+        with self._lock:
+            heapq.heappush(self._queue, (due, self._seq, stream))
+            self._seq += 1
+
+    def run(self, seconds: float) -> int:
+        """Advance the clock by `seconds`, running every callback due; returns callbacks run."""
+        return self.run_until(self.now + seconds)
+
+    def run_until(self, until: float) -> int:
+        ran = 0
+        with self._lock:
+            while self._queue and self._queue[0][0] <= until:
+                due, _, stream = heapq.heappop(self._queue)
+                if not stream.active:
+                    continue
+                self.now = due
+                stream._tick(due)
+                ran += 1
+                if stream.active:
+                    heapq.heappush(self._queue, (due + stream.period_s, self._seq, stream))
+                    self._seq += 1
+            self.now = max(self.now, until)
+        return ran
+
+    def start_clock(self):
+        """Pace the simulated clock to wall time (x speed) on a daemon thread."""
+        if self._clock is not None:
+            return
+        self._stop.clear()
+        self._clock = threading.Thread(target=self._run_clock, name="virtual-audio-clock", daemon=True)
+        self._clock.start()
+
+    def stop_clock(self):
+        self._stop.set()
+        if self._clock is not None:
+            self._clock.join()
+            self._clock = None
+
+    def _run_clock(self):
+        origin_wall, origin_sim = time.perf_counter(), self.now
+        while not self._stop.is_set():
+            self.run_until(origin_sim + (time.perf_counter() - origin_wall) * self.speed)
+            self._stop.wait(0.002)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'now': self.now, 'streams': len(self._queue)}
+
+
+class NullBackend(VirtualBackend):
+    """Devices that accept streams and never call back: audio disabled."""
+
+    def __init__(self, devices: Union[int, List[Dict[str, Any]]] = 2, **kwargs):
+        super().__init__(devices)
+
+    def run_until(self, until: float) -> int:
+        self.now = max(self.now, until)
+        return 0
+
+
+def create_backend(config: Dict[str, Any]):
+    """The sounddevice-compatible backend named by config['backend']."""
+    name = config.get('backend', 'real')
+    if name == 'real':
+        import sounddevice
+        return sounddevice
+    options = config.get('virtual_audio', {})
+    if name == 'virtual':
+        return VirtualBackend(**options)
+    if name == 'null':
+        return NullBackend(options.get('devices', 2))
+    raise ValueError(f"Unknown audio backend {name!r} (expected one of {', '.join(BACKENDS)})")
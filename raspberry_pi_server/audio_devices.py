@@ -0,0 +1,145 @@
+"""
+Audio device enumeration, binding and hot-swap failover.
+
+Stations are bound to devices by role ('a', 'b'; router.AudioRouter registers
+its tournament stations as further roles). A device can be configured
+by index or by a substring of its name, so a USB interface that reattaches
+under a new index is found again. When a stream on a role fails, failover()
+tries the preferred device, the configured fallback and the system default
+in turn (rescanning the hardware if none opens), and records how long the
+switch took.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DeviceSpec = Union[int, str, None]
+
+
+class AudioDeviceManager:
+    """Cached device enumeration and role -> device binding with failover."""
+
+    def __init__(self, config: Dict[str, Any], sd_module=None, cache_ttl_s: float = 5.0):
+        if sd_module is None:
+            import sounddevice as sd_module
+        self.sd = sd_module
+        audio_config = config.get('audio', {})
+        self.preferred: Dict[str, DeviceSpec] = {
+            'a': audio_config.get('device_a', 1),
+            'b': audio_config.get('device_b', 2),
+        }
+        self.fallback: DeviceSpec = audio_config.get('fallback_device')  # None: system default
+        self.cache_ttl_s = cache_ttl_s
+        self.bound: Dict[str, Optional[int]] = {}
+        self.failovers = 0
+        self.failover_histogram = metrics.histogram('audio_failover_ms')
+        self.lock = threading.RLock()
+        self._devices: Optional[List[Dict[str, Any]]] = None
+        self._devices_at = 0.0
+
+    def register(self, role: str, spec: DeviceSpec):
+        """Add a role (or change its preferred device); it binds on first use."""
+        with self.lock:
+            self.preferred[role] = spec
+            self.bound.pop(role, None)
+
+    def devices(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Device list (each dict gets its 'index'), cached for cache_ttl_s."""
+        with self.lock:
+            now = time.monotonic()
+            if refresh or self._devices is None or now - self._devices_at > self.cache_ttl_s:
+                self._devices = [dict(device, index=i) for i, device in enumerate(self.sd.query_devices())]
+                self._devices_at = now
+            return self._devices
+
+    def rescan(self):
+        """
+        Re-enumerate hardware. PortAudio only notices hot-plugged devices after
+        re-initialisation, which invalidates open streams: call between sessions.
+        """
+        with self.lock:
+            self.sd._terminate()
+            self.sd._initialize()
+            self.devices(refresh=True)
+
+    def resolve(self, spec: DeviceSpec) -> Optional[int]:
+        """Index of a duplex-capable device given by index or name substring."""
+        if spec is None:
+            return None
+        for device in self.devices():
+            if isinstance(spec, int):
+                matches = device['index'] == spec
+            else:
+                matches = str(spec).lower() in device['name'].lower()
+            if matches and device['max_input_channels'] > 0 and device['max_output_channels'] > 0:
+                return device['index']
+        return None
+
+    def default_device(self) -> Optional[int]:
+        """The system default output device, if it is duplex-capable."""
+        default = self.sd.default.device
+        index = default[1] if isinstance(default, (list, tuple)) else default
+        return self.resolve(index) if index is not None and index >= 0 else None
+
+    def candidates(self, role: str) -> List[int]:
+        """
+        Devices to try for a role, best first, without duplicates. A device
+        bound to another role is never offered: two stations on one
+        interface would fight over it and hear each other.
+        """
+        taken = {device for other, device in self.bound.items() if other != role}
+        found = [self.resolve(self.preferred[role]), self.resolve(self.fallback), self.default_device()]
+        ordered = []
+        for index in found:
+            if index is not None and index not in ordered and index not in taken:
+                ordered.append(index)
+        return ordered
+
+    def device_for(self, role: str) -> Optional[int]:
+        """Currently bound device for a role (binds on first use)."""
+        with self.lock:
+            if role not in self.bound:
+                candidates = self.candidates(role)
+                self.bound[role] = candidates[0] if candidates else None
+                logger.info(f"Audio role {role} bound to device {self.bound[role]}")
+            return self.bound[role]
+
+    def failover(self, role: str, open_fn: Callable[[int], Any], started: Optional[float] = None):
+        """
+        Rebind a role after a stream error: open_fn(device) is tried on each
+        candidate until one succeeds; its result is returned. The failed
+        device is retried last, since a glitch may not mean it is gone. If
+        none opens, PortAudio is re-initialised (rescan) and the candidates
+        are tried once more: a reattached USB interface only shows up then.
+        That invalidates the other open streams, which fail over in turn.
+        """
+        started = started if started is not None else time.perf_counter()
+        with self.lock:
+            failed = self.bound.get(role)
+            for attempt in range(2):
+                if attempt:
+                    logger.warning(f"Audio role {role}: no usable device, rescanning")
+                    self.rescan()
+                candidates = self.candidates(role)
+                if failed in candidates:
+                    candidates.remove(failed)
+                    candidates.append(failed)
+                for device in candidates:
+                    try:
+                        result = open_fn(device)
+                    except Exception as e:
+                        logger.warning(f"Audio role {role}: device {device} unavailable: {e}")
+                        continue
+                    self.bound[role] = device
+                    self.failovers += 1
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    self.failover_histogram.observe(latency_ms)
+                    logger.warning(f"Audio role {role}: failed over {failed} -> {device} in {latency_ms:.1f}ms")
+                    return result
+        raise RuntimeError(f"No usable audio device for role {role}")
@@ -0,0 +1,139 @@
+"""
+Bridge block size auto-tuning.
+
+Smaller blocks mean less latency per hop, but each callback then has less
+time to finish before the device needs the next block. AutoTuner runs the
+connected bridge for a short trial at each candidate block size, largest
+first (1024 -> 512 -> 256 -> 128 by default). It watches the stream xrun
+counters, jitter buffer underruns and callback CPU load (callback time /
+block period). Tuning stops at the first unstable size and settles on the
+smallest stable one. The result is stored in a JSON file keyed by host,
+station devices and sample rate, so the next start on the same hardware
+skips the trials.
+"""
+
+import json
+import logging
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from bridge import ROLES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANDIDATES = (1024, 512, 256, 128)
+DEFAULT_STATE_FILE = '/var/lib/blinddate/audio_tuning.json'
+
+
+class AutoTuner:
+    """Finds and persists the smallest block size a DuplexBridge sustains."""
+
+    def __init__(self, bridge, run_trial: Callable[[float], Any] = time.sleep, trial_s: float = 5.0,
+                 candidates: Sequence[int] = DEFAULT_CANDIDATES, max_xruns: int = 0,
+                 max_underruns: int = 0, max_load: float = 0.5, state_file: str = DEFAULT_STATE_FILE):
+        self.bridge = bridge
+        self.run_trial = run_trial  # waits trial_s seconds (backend.run on the virtual clock)
+        self.trial_s = trial_s
+        self.candidates = sorted(candidates, reverse=True)
+        self.max_xruns = max_xruns
+        self.max_underruns = max_underruns
+        self.max_load = max_load
+        self.state_file = state_file
+        self.trials: List[Dict[str, Any]] = []
+
+    def key(self) -> str:
+        """host|device a|device b@rate: a stored setting only applies to the same hardware."""
+        devices = self.bridge.devices
+        listed = devices.devices()
+        names = []
+        for role in ROLES:
+            index = devices.device_for(role)
+            names.append(listed[index]['name'] if index is not None and index < len(listed) else str(index))
+        return f"{platform.node()}|{'|'.join(names)}@{self.bridge.samplerate}"
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def load(self) -> Optional[int]:
+        """Stored block size for this hardware, or None if it was never tuned."""
+        entry = self._load_state().get(self.key())
+        return entry['blocksize'] if entry else None
+
+    def save(self, blocksize: int):
+        state = self._load_state()
+        state[self.key()] = {'blocksize': blocksize, 'samplerate': self.bridge.samplerate,
+                             'tuned_at': time.time(), 'trials': self.trials}
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f'{self.state_file}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_file)
+
+    def trial(self, blocksize: int) -> Dict[str, Any]:
+        """Run the connected bridge at blocksize for trial_s and measure it."""
+        bridge = self.bridge
+        bridge.reconfigure(blocksize=blocksize)
+        bridge.connect()
+        xruns = sum(bridge.xruns.values())
+        cpu_s = dict(bridge.callback_s)
+        callbacks = dict(bridge.callbacks)
+        for role in ROLES:
+            bridge.callback_max_s[role] = 0.0
+        self.run_trial(self.trial_s)
+
+        period_s = blocksize / bridge.samplerate
+        calls = {role: bridge.callbacks[role] - callbacks[role] for role in ROLES}
+        load = max((bridge.callback_s[role] - cpu_s[role]) / calls[role] / period_s
+                   for role in ROLES if calls[role]) if any(calls.values()) else 0.0
+        result = {
+            'blocksize': blocksize,
+            'xruns': sum(bridge.xruns.values()) - xruns,
+            'underruns': sum(buffer.underruns for buffer in bridge.buffers.values()),
+            'load': round(load, 4),
+            'peak_load': round(max(bridge.callback_max_s.values()) / period_s, 4),
+            'callbacks': sum(calls.values()),
+        }
+        result['stable'] = (result['callbacks'] > 0 and result['xruns'] <= self.max_xruns
+                            and result['underruns'] <= self.max_underruns and load <= self.max_load)
+        return result
+
+    def tune(self, save: bool = True) -> int:
+        """
+        Step down through the candidates and return the smallest stable block
+        size (the largest candidate if none is stable). The bridge is left
+        configured at that size, in the state it was found in.
+        """
+        bridge = self.bridge
+        was_connected = bridge.connected
+        # Between sessions the trials carry silence, not the booths' microphones
+        bridge.private = not was_connected
+        self.trials = []
+        best = None
+        try:
+            for blocksize in self.candidates:
+                result = self.trial(blocksize)
+                self.trials.append(result)
+                logger.info(f"Autotune {blocksize} frames: {result}")
+                if not result['stable']:
+                    break
+                best = blocksize
+            if best is None:
+                best = self.candidates[0]
+                logger.warning(f"Autotune: no stable block size, falling back to {best}")
+            bridge.reconfigure(blocksize=best)
+            if not was_connected:
+                bridge.disconnect()
+        finally:
+            bridge.private = False
+        if save:
+            self.save(best)
+        logger.info(f"Autotune settled on {best} frames ({best / bridge.samplerate * 1000:.1f}ms)")
+        return best
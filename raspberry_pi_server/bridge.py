@@ -0,0 +1,230 @@
+"""
+Callback-driven duplex audio engine for the two stations.
+
+Each station device runs one persistent full-duplex sd.Stream. Its callback
+renders that device's mixer.Mixer (tracks and cues) and, while the stations
+are connected, also hands the captured block to the other station and plays
+whatever the other station captured. The blocks travel through one lock-free
+ringbuffer.JitterBuffer per direction, which absorbs scheduling jitter and
+the clock drift between the two devices. Neither callback ever waits on a
+lock or on another Python thread. Per block, the mouth-to-ear latency is
+estimated as capture lag (ADC -> callback) + queued frames + playback lead
+(callback -> DAC).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+from metrics import metrics
+from mixer import Mixer
+from ringbuffer import JitterBuffer
+
+logger = logging.getLogger(__name__)
+
+ROLES = ('a', 'b')
+PEER = {'a': 'b', 'b': 'a'}
+# Mouth-to-ear budget is tens of ms: finer buckets than metrics.LATENCY_BUCKETS_MS
+LATENCY_BUCKETS_MS = [2.5, 5, 7.5, 10, 12.5, 15, 20, 25, 30, 40, 50, 75, 100, 150, 250]
+
+
+class DuplexBridge:
+    """One duplex stream and mixer per device; connect() bridges them through jitter buffers."""
+
+    def __init__(self, devices, sd_module=None, samplerate: int = 44100, blocksize: int = 256,
+                 channels: int = 1, latency: Any = 'low', max_queue_blocks: int = 8):
+        if sd_module is None:
+            import sounddevice as sd_module
+        self.sd = sd_module
+        self.devices = devices  # audio_devices.AudioDeviceManager
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.latency = latency
+        self.max_queue_blocks = max_queue_blocks
+
+        # Audio captured at each role, waiting to be played at its peer
+        self.buffers: Dict[str, JitterBuffer] = {}
+        self._make_buffers()
+        self.capture_lag_s = {role: 0.0 for role in ROLES}
+        self.mixers: Dict[str, Mixer] = {role: Mixer(blocksize, channels, samplerate) for role in ROLES}
+        self.streams: Dict[str, Any] = {}
+        self.running = False  # streams open
+        self.connected = False  # stations hear each other
+        # Connected without the microphones: silence is sent in place of the
+        # captured audio, so only what a capture tap injects crosses (probes)
+        self.private = False
+        # Optional hooks (e.g. latency_probe): capture(indata, time) -> block to send,
+        # playback(outdata, time) sees the bridged audio before the mixer adds to it
+        self.capture_taps: Dict[str, Optional[Callable]] = {role: None for role in ROLES}
+        self.playback_taps: Dict[str, Optional[Callable]] = {role: None for role in ROLES}
+        self.streams_lock = threading.Lock()
+        self.latency_samples: Deque[float] = deque(maxlen=4096)  # drained by stats()
+        self.latency_histogram = metrics.histogram('bridge_latency_ms', LATENCY_BUCKETS_MS)
+        self.last_latency_ms = 0.0
+        self.xruns = {role: 0 for role in ROLES}
+        # Callback CPU time (seconds), for load = time / block period
+        self.callback_s = {role: 0.0 for role in ROLES}
+        self.callback_max_s = {role: 0.0 for role in ROLES}
+        self.callbacks = {role: 0 for role in ROLES}
+
+    def _make_buffers(self):
+        for role in ROLES:
+            self.buffers[role] = JitterBuffer(self.blocksize, self.channels, self.max_queue_blocks,
+                                              self.samplerate)
+        self.silence = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+
+    def reconfigure(self, blocksize: Optional[int] = None, samplerate: Optional[int] = None):
+        """Change block size/sample rate; reopens the streams if they are running."""
+        with self.streams_lock:
+            was_running, was_connected = self.running, self.connected
+            self.running = self.connected = False
+            for role in ROLES:
+                self._close(role)
+            self.blocksize = blocksize or self.blocksize
+            self.samplerate = samplerate or self.samplerate
+            self._make_buffers()
+            for mixer in self.mixers.values():
+                mixer.resize(self.blocksize, self.samplerate)
+        if was_running:
+            self.start()
+            self.connected = was_connected
+
+    def _make_callback(self, role: str):
+        outbox = self.buffers[role]
+        inbox = self.buffers[PEER[role]]
+        peer = PEER[role]
+        mixer = self.mixers[role]
+        silence = self.silence
+
+        def callback(indata, outdata, frames, time_info, status):
+            started = time.perf_counter()
+            if status:
+                self.xruns[role] += 1
+            if self.connected:
+                self.capture_lag_s[role] = time_info.currentTime - time_info.inputBufferAdcTime
+                captured = silence[:frames] if self.private else indata
+                capture_tap = self.capture_taps[role]
+                outbox.write(captured if capture_tap is None else capture_tap(captured, time_info))
+                queued = inbox.read_into(outdata)
+                playback_tap = self.playback_taps[role]
+                if playback_tap is not None:
+                    playback_tap(outdata, time_info)
+                if not inbox.priming:
+                    playback_lead = time_info.outputBufferDacTime - time_info.currentTime
+                    latency_ms = (self.capture_lag_s[peer] + queued / self.samplerate + playback_lead) * 1000
+                    self.last_latency_ms = latency_ms
+                    self.latency_samples.append(latency_ms)
+            else:
+                inbox.drain()
+                outdata.fill(0)
+            mixer.mix_into(outdata, frames)
+            elapsed = time.perf_counter() - started
+            self.callback_s[role] += elapsed
+            self.callbacks[role] += 1
+            if elapsed > self.callback_max_s[role]:
+                self.callback_max_s[role] = elapsed
+
+        return callback
+
+    def _open(self, role: str, device: int):
+        stream = self.sd.Stream(device=device, samplerate=self.samplerate, blocksize=self.blocksize,
+                                channels=self.channels, dtype='float32', latency=self.latency,
+                                callback=self._make_callback(role),
+                                finished_callback=lambda: self._on_finished(role, stream))
+        try:
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        return stream
+
+    def _on_finished(self, role: str, stream):
+        # Runs on the PortAudio thread; a stream can't be replaced from there.
+        # Streams closed by _close() are no longer in self.streams and are ignored.
+        if self.running and self.streams.get(role) is stream:
+            threading.Thread(target=self._failover, args=(role, stream),
+                             name=f"bridge-failover-{role}", daemon=True).start()
+
+    def _failover(self, role: str, broken):
+        started = time.perf_counter()
+        with self.streams_lock:
+            if not self.running or self.streams.get(role) is not broken:
+                return
+            self._close(role)
+            try:
+                self.streams[role] = self.devices.failover(
+                    role, lambda device: self._open(role, device), started)
+            except RuntimeError as e:
+                logger.error(f"Bridge stopped: {e}")
+                self.running = False
+
+    def _close(self, role: str):
+        stream = self.streams.pop(role, None)
+        if stream is not None:
+            try:
+                stream.abort()
+                stream.close()
+            except Exception:
+                pass
+
+    def start(self):
+        """Open both device streams (idempotent); they run until stop()."""
+        with self.streams_lock:
+            if self.running:
+                return
+            for buffer in self.buffers.values():
+                buffer.reset()
+            self.running = True
+            try:
+                for role in ROLES:
+                    self.streams[role] = self._open(role, self.devices.device_for(role))
+            except Exception:
+                self.running = False
+                for role in ROLES:
+                    self._close(role)
+                raise
+
+    def connect(self):
+        """Start exchanging audio between the stations."""
+        self.start()
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+        stats = self.stats()
+        logger.info(f"Bridge disconnected: latency p50 {stats['latency_p50_ms']}ms, "
+                    f"a->b {stats['directions']['a']}, b->a {stats['directions']['b']}")
+
+    def stop(self):
+        with self.streams_lock:
+            self.running = False
+            self.connected = False
+            for role in ROLES:
+                self._close(role)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Mouth-to-ear latency (histogram: bridge_latency_ms) and, per direction
+        keyed by the capturing role, the jitter buffer fill and counters.
+        """
+        while self.latency_samples:
+            self.latency_histogram.observe(self.latency_samples.popleft())
+        return {
+            'running': self.running,
+            'connected': self.connected,
+            'blocksize': self.blocksize,
+            'block_ms': self.blocksize / self.samplerate * 1000,
+            'last_latency_ms': self.last_latency_ms,
+            'latency_p50_ms': self.latency_histogram.percentile(0.5),
+            'latency_p95_ms': self.latency_histogram.percentile(0.95),
+            'xruns': dict(self.xruns),
+            'callback_us': {role: round(self.callback_s[role] / max(self.callbacks[role], 1) * 1e6, 1)
+                            for role in ROLES},
+            'callback_max_us': {role: round(self.callback_max_s[role] * 1e6, 1) for role in ROLES},
+            'directions': {role: buffer.stats() for role, buffer in self.buffers.items()},
+        }
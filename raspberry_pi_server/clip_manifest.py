@@ -0,0 +1,178 @@
+"""
+Manifest-driven clip generation.
+
+Each clip in the manifest names a generator and its parameters. A clip's
+digest hashes the generator's source code, the parameters and the output
+format, so tweaking a track (its parameters or the code that renders it)
+regenerates just that clip. prepare() hands missing or stale clips to a
+process pool and returns straight away; get() waits for a clip only if it
+is still being built, then maps it through the ClipStore. Clips are written
+as float32 WAVs at the device rate, which the store maps without conversion.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import struct
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from clip_store import WAVE_FORMAT_IEEE_FLOAT, ClipStore, read_wav_info, write_float_wav
+from procedural_audio import ProceduralAudioGenerator
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '.clips.json'
+
+
+def tone(samplerate: int, frequency: float, duration: float, fade_ms: float = 10) -> np.ndarray:
+    """Sine tone with a linear fade in/out."""
+    t = np.arange(int(samplerate * duration)) / samplerate
+    audio = np.sin(2 * np.pi * frequency * t)
+    fade_len = int(samplerate * fade_ms / 1000)
+    audio[:fade_len] *= np.linspace(0, 1, fade_len)
+    audio[-fade_len:] *= np.linspace(1, 0, fade_len)
+    return audio
+
+
+def procedural(samplerate: int, method: str, duration: float = 10) -> np.ndarray:
+    """One of ProceduralAudioGenerator's generate_<method>() signatures."""
+    return getattr(ProceduralAudioGenerator(samplerate, duration), f'generate_{method}')()
+
+
+GENERATORS: Dict[str, Callable[..., np.ndarray]] = {'tone': tone, 'procedural': procedural}
+
+DEFAULT_MANIFEST: Dict[str, Dict[str, Any]] = {
+    **{f'track{i}': {'generator': 'procedural', 'params': {'method': f'track_{i}', 'duration': 10}}
+       for i in range(1, 6)},
+    'success': {'generator': 'procedural', 'params': {'method': 'success', 'duration': 4.5}},
+    'mismatch': {'generator': 'procedural', 'params': {'method': 'mismatch'}},
+    'timeout': {'generator': 'procedural', 'params': {'method': 'timeout', 'duration': 1.0}},
+}
+
+
+def generator_source(entry: Dict[str, Any]) -> str:
+    """The code a clip depends on: its generator plus, for procedural clips, the method used."""
+    parts = [inspect.getsource(GENERATORS[entry['generator']])]
+    if entry['generator'] == 'procedural':
+        method = entry['params']['method']
+        parts.append(inspect.getsource(getattr(ProceduralAudioGenerator, f'generate_{method}')))
+        parts.append(inspect.getsource(ProceduralAudioGenerator._fade_envelope))
+    return '\n'.join(parts)
+
+
+def clip_digest(entry: Dict[str, Any], samplerate: int, channels: int) -> str:
+    key = json.dumps({
+        'generator': entry['generator'],
+        'source': generator_source(entry),
+        'params': entry.get('params', {}),
+        'samplerate': samplerate,
+        'channels': channels,
+        'format': 'float32',
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def build_clip(path: str, generator: str, params: Dict[str, Any], samplerate: int, channels: int) -> str:
+    """Render one clip to path (runs in a pool worker)."""
+    audio = np.clip(GENERATORS[generator](samplerate, **params), -1.0, 1.0).astype(np.float32)
+    samples = np.repeat(audio.reshape(-1, 1), channels, axis=1)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    write_float_wav(tmp, samples, samplerate)
+    os.replace(tmp, path)
+    return path
+
+
+class ClipLibrary:
+    """Clips from a manifest, built in the background when missing or stale."""
+
+    def __init__(self, store: ClipStore, manifest: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_workers: Optional[int] = None):
+        self.store = store
+        self.manifest = dict(DEFAULT_MANIFEST if manifest is None else manifest)
+        self.max_workers = max_workers
+        self.state_path = os.path.join(store.directory, STATE_FILE)
+        self.digests = {name: clip_digest(entry, store.samplerate, store.channels)
+                        for name, entry in self.manifest.items()}
+        self.pending: Dict[str, threading.Event] = {}  # set once the clip is built and recorded
+        self.built = 0
+        self.lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _built_here(self, name: str) -> bool:
+        """The file is a float32 WAV at the store's rate and channels, as build_clip writes it."""
+        try:
+            info = read_wav_info(self.store.path(name))
+        except (OSError, ValueError, struct.error):
+            return False
+        return ((info.format_tag, info.bits, info.samplerate, info.channels)
+                == (WAVE_FORMAT_IEEE_FLOAT, 32, self.store.samplerate, self.store.channels)
+                and info.data_bytes > 0)
+
+    def stale(self) -> List[str]:
+        """Clips whose file is missing, not one we built, or was built from another digest."""
+        state = self._load_state()
+        return [name for name in self.manifest
+                if state.get(name) != self.digests[name] or not self._built_here(name)]
+
+    def prepare(self) -> List[str]:
+        """Start building stale clips in a process pool; returns their names without waiting."""
+        names = self.stale()
+        if not names:
+            return names
+        os.makedirs(self.store.directory, exist_ok=True)
+        executor = ProcessPoolExecutor(max_workers=self.max_workers or min(len(names), os.cpu_count() or 1))
+        for name in names:
+            entry = self.manifest[name]
+            future = executor.submit(build_clip, self.store.path(name), entry['generator'],
+                                     entry.get('params', {}), self.store.samplerate, self.store.channels)
+            with self.lock:
+                self.pending[name] = threading.Event()
+            future.add_done_callback(lambda f, name=name: self._built(name, f))
+        executor.shutdown(wait=False)  # workers exit once the queue is done
+        logger.info(f"Generating {len(names)} clips: {', '.join(names)}")
+        return names
+
+    def _built(self, name: str, future: Future):
+        with self.lock:
+            done = self.pending.pop(name)
+            try:
+                if future.exception() is not None:
+                    logger.error(f"Clip {name} failed to generate: {future.exception()}")
+                    return
+                state = self._load_state()
+                state[name] = self.digests[name]
+                tmp = f'{self.state_path}.{os.getpid()}.{id(self)}.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump(state, f, indent=2, sort_keys=True)
+                os.replace(tmp, self.state_path)
+                self.built += 1
+                self.store.invalidate(name)
+            finally:
+                done.set()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until every clip started by prepare() is built."""
+        with self.lock:
+            events = list(self.pending.values())
+        for done in events:
+            done.wait(timeout)
+
+    def get(self, name: str) -> np.ndarray:
+        """The clip's mapped samples, waiting for it first if it's being generated."""
+        with self.lock:
+            done = self.pending.get(name)
+        if done is not None:
+            done.wait()
+        return self.store.get(name)
@@ -0,0 +1,186 @@
+"""
+Memory-mapped clip store.
+
+Every playback path gets its clips from here as read-only float32 NumPy
+views of a WAV file's data chunk. The pages live in the OS page cache, so
+all processes that map the same clip share a single copy, and a play does
+no disk I/O or allocation. If a source WAV isn't already float32 at the
+device rate and channel count, it is converted once into a float32 WAV
+under .cache/ (mtime-stamped from its source), and that file is the one
+mapped.
+"""
+
+import logging
+import os
+import struct
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavInfo(NamedTuple):
+    format_tag: int
+    channels: int
+    samplerate: int
+    bits: int
+    data_offset: int
+    data_bytes: int
+
+
+def read_wav_info(path: str) -> WavInfo:
+    """Walk the RIFF chunks for the fmt header and the data chunk's position."""
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{path}: not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                body = f.read(size)
+                format_tag, channels, samplerate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]  # sub-format GUID prefix
+                fmt = (format_tag, channels, samplerate, bits)
+                f.seek(size % 2, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"{path}: data before fmt chunk")
+                return WavInfo(*fmt, data_offset=f.tell(), data_bytes=size)
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+
+
+def write_float_wav(path: str, samples: np.ndarray, samplerate: int):
+    """Write (frames, channels) float32 samples as an IEEE-float WAV."""
+    samples = np.ascontiguousarray(samples, dtype='<f4')
+    frames, channels = samples.shape
+    data_bytes = samples.nbytes
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sI4s', b'RIFF', 4 + 8 + 16 + 8 + data_bytes, b'WAVE'))
+        f.write(struct.pack('<4sIHHIIHH', b'fmt ', 16, WAVE_FORMAT_IEEE_FLOAT, channels, samplerate,
+                            samplerate * channels * 4, channels * 4, 32))
+        f.write(struct.pack('<4sI', b'data', data_bytes))
+        f.write(samples.tobytes())
+
+
+def map_wav(path: str, info: Optional[WavInfo] = None) -> np.ndarray:
+    """Read-only (frames, channels) view of a float32 WAV's data chunk."""
+    info = info or read_wav_info(path)
+    frames = info.data_bytes // (4 * info.channels)
+    if frames == 0:
+        return np.zeros((0, info.channels), dtype=np.float32)
+    view = np.memmap(path, dtype='<f4', mode='r', offset=info.data_offset, shape=(frames, info.channels))
+    return view.view(np.ndarray)  # plain ndarray slicing in the audio callback
+
+
+def decode(path: str, info: WavInfo) -> np.ndarray:
+    """Decode a PCM or float WAV into (frames, channels) float32."""
+    dtypes = {(WAVE_FORMAT_PCM, 8): 'u1', (WAVE_FORMAT_PCM, 16): '<i2', (WAVE_FORMAT_PCM, 32): '<i4',
+              (WAVE_FORMAT_IEEE_FLOAT, 32): '<f4', (WAVE_FORMAT_IEEE_FLOAT, 64): '<f8'}
+    dtype = dtypes.get((info.format_tag, info.bits))
+    if dtype is None:
+        raise ValueError(f"{path}: unsupported WAV format {info.format_tag}/{info.bits} bit")
+    raw = np.fromfile(path, dtype=dtype, count=info.data_bytes // np.dtype(dtype).itemsize,
+                      offset=info.data_offset).reshape(-1, info.channels)
+    if dtype == 'u1':
+        return (raw.astype(np.float32) - 128) / 128
+    if info.format_tag == WAVE_FORMAT_PCM:
+        return raw.astype(np.float32) / float(2 ** (info.bits - 1))
+    return raw.astype(np.float32)
+
+
+def convert(samples: np.ndarray, from_rate: int, to_rate: int, channels: int) -> np.ndarray:
+    """Channel-map and (linearly) resample decoded samples."""
+    if samples.shape[1] != channels:
+        if channels == 1:
+            samples = samples.mean(axis=1, keepdims=True)
+        elif samples.shape[1] == 1:
+            samples = np.repeat(samples, channels, axis=1)
+        else:
+            samples = samples[:, :channels]
+    if from_rate != to_rate and len(samples):
+        frames = int(round(len(samples) * to_rate / from_rate))
+        positions = np.arange(frames) * (from_rate / to_rate)
+        source = np.arange(len(samples))
+        samples = np.stack([np.interp(positions, source, samples[:, c]) for c in range(channels)], axis=1)
+    return samples.astype(np.float32)
+
+
+class ClipStore:
+    """Read-only float32 clips at the device rate, mapped once and shared."""
+
+    def __init__(self, directory: str = 'audio_clips', samplerate: int = 44100, channels: int = 1,
+                 cache_dir: Optional[str] = None):
+        self.directory = os.path.abspath(directory)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.cache_dir = cache_dir or os.path.join(self.directory, '.cache')
+        self.clips: Dict[str, np.ndarray] = {}
+        self.conversions = 0
+        self.lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f'{name}.wav')
+
+    def get(self, name: str) -> np.ndarray:
+        """Clip audio_clips/<name>.wav, e.g. 'track1' or 'success'."""
+        return self.load(self.path(name))
+
+    def load(self, path: str) -> np.ndarray:
+        key = os.path.abspath(path)
+        clip = self.clips.get(key)
+        if clip is None:
+            with self.lock:
+                clip = self.clips.get(key)
+                if clip is None:
+                    clip = self.clips[key] = self._map(path)
+        return clip
+
+    def preload(self, names: Optional[Iterable[str]] = None):
+        """Map the given clips, or every WAV in the directory."""
+        if names is None:
+            names = sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith('.wav'))
+        for name in names:
+            self.get(name)
+
+    def invalidate(self, name: str):
+        """Forget a clip so the next get() maps (and if needed converts) it again."""
+        with self.lock:
+            self.clips.pop(os.path.abspath(self.path(name)), None)
+
+    def duration_s(self, name: str) -> float:
+        return len(self.get(name)) / self.samplerate
+
+    def _map(self, path: str) -> np.ndarray:
+        info = read_wav_info(path)
+        if (info.format_tag, info.bits, info.samplerate, info.channels) == \
+                (WAVE_FORMAT_IEEE_FLOAT, 32, self.samplerate, self.channels):
+            return map_wav(path, info)
+        stat = os.stat(path)
+        base = os.path.splitext(os.path.basename(path))[0]
+        cached = os.path.join(self.cache_dir, f'{base}.{self.samplerate}hz{self.channels}ch.wav')
+        try:
+            fresh = os.stat(cached).st_mtime_ns == stat.st_mtime_ns
+        except FileNotFoundError:
+            fresh = False
+        if not fresh:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            samples = convert(decode(path, info), info.samplerate, self.samplerate, self.channels)
+            tmp = f'{cached}.{os.getpid()}.tmp'
+            write_float_wav(tmp, samples, self.samplerate)
+            os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp, cached)  # atomic: other processes see the old or the new file
+            self.conversions += 1
+            logger.info(f"Converted {path} -> {cached} ({info.samplerate}Hz -> {self.samplerate}Hz)")
+        return map_wav(cached)
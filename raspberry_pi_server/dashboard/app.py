@@ -1,5 +1,6 @@
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+from dataclasses import asdict
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room
 from flask_talisman import Talisman
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -7,8 +8,16 @@ import pyotp
 import json
 import time
 import os
+from collections import deque
 from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Any, Deque, Dict, List
+from dashboard import codec
+from dashboard.assets import AssetPipeline
+from dashboard.page_cache import PageCache
+from dashboard.snapshot import SnapshotCache
+from events import OverflowPolicy, event_bus
+from i18n import init_i18n
+from metrics import metrics, setup_metrics_routes
 
 load_dotenv()
 
@@ -18,7 +27,14 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Security
 talisman = Talisman(app, content_security_policy=None)  # Customize CSP as needed
-limiter = Limiter(app, key_func=get_remote_address)
+limiter = Limiter(get_remote_address, app=app)
+
+# Fingerprinted, precompressed static files (see asset_url() in templates)
+assets = AssetPipeline(app)
+
+# Catalogs compiled and loaded once; index rendered once per locale
+init_i18n(app)
+page_cache = PageCache(app)
 
 totp = pyotp.TOTP(os.getenv('TOTP_SECRET'))
 
@@ -32,10 +48,37 @@ state: Dict[str, Any] = {
     'countdown': 0,
     'events': []
 }
+state_version = 0  # bumped on every state change
+
+# Set by attach_tournament() when a bracket is running
+tournament_bracket = None
+
+# Set by attach_recovery(); used by the force-recover endpoint
+session_recovery = None
+
+# Set by attach_store(): storage.MatchStore behind the tournament history endpoints
+match_store = None
+
+setup_metrics_routes(app)
+
+# Sections served by /api/v1/snapshot, each serialized once per version
+snapshot_cache = SnapshotCache()
+snapshot_cache.register('status', lambda: state, lambda: state_version)
+snapshot_cache.register('stats', lambda: {
+    'sync_count': state['sync_count'],
+    'avg_sync_time': state['avg_sync_time']
+}, lambda: state_version)
+snapshot_cache.register('report', lambda: asdict(metrics.generate_daily_report()),
+                        lambda: (metrics.version, int(time.time() // 60)))  # uptime drifts
+snapshot_cache.register('histogram', metrics.sync_histogram, lambda: metrics.version)
+snapshot_cache.register(
+    'leaderboard',
+    lambda: tournament_bracket.get_leaderboard() if tournament_bracket else [],
+    lambda: (id(tournament_bracket), tournament_bracket.version if tournament_bracket else 0))
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return page_cache.render('index.html')
 
 @app.route('/api/status')
 def get_status():
@@ -48,12 +91,68 @@ def get_stats():
         'avg_sync_time': state['avg_sync_time']
     })
 
+@app.route('/api/v1/snapshot')
+def get_snapshot():
+    """Several dashboard sections in one round-trip, e.g. ?fields=status,leaderboard"""
+    fields_arg = request.args.get('fields')
+    fields = fields_arg.split(',') if fields_arg else snapshot_cache.sections
+    unknown = [f for f in fields if f not in snapshot_cache.builders]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}",
+                        'available': snapshot_cache.sections}), 400
+    
+    if core_link is not None:
+        # report/histogram/leaderboard live in the core's metrics and bracket
+        sections = core_link.request_sections(fields)
+        if sections is None:
+            return jsonify({'error': 'Core process unreachable'}), 503
+        body, etag = sections
+    else:
+        body, etag = snapshot_cache.snapshot(fields)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/v1/events')
+def get_events():
+    """Page through the persisted event log: ?since=<offset>&limit=<n>"""
+    if event_bus.event_log is None:
+        return jsonify({'events': event_history(), 'next': None})
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', 500, type=int), 5000)
+    events, next_offset = event_bus.event_log.read(since, limit)
+    return jsonify({'events': events, 'next': next_offset})
+
+@app.route('/api/v1/tournament/bracket')
+def get_tournament_bracket():
+    """Stored bracket matches of one round: ?round=<n>&status=<status>"""
+    if match_store is None:
+        return jsonify({'error': 'Match store not configured'}), 503
+    round_num = request.args.get('round', 1, type=int)
+    return jsonify({'round': round_num,
+                    'matches': match_store.bracket_round(round_num, request.args.get('status'))})
+
+@app.route('/api/v1/tournament/leaderboard')
+def get_tournament_leaderboard():
+    """Wins per station from stored bracket results: ?round=<n>&limit=<n>"""
+    if match_store is None:
+        return jsonify({'error': 'Match store not configured'}), 503
+    round_num = request.args.get('round', type=int)
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    return jsonify({'round': round_num, 'leaderboard': match_store.leaderboard(round_num, limit)})
+
 @app.route('/admin/reset', methods=['POST'])
 @limiter.limit("10 per minute")
 def admin_reset():
     token = request.headers.get('X-TOTP')
     if not token or not totp.verify(token):
         return jsonify({'error': 'Invalid TOTP'}), 401
+    if core_link is not None:
+        return forward_admin('reset')
     reset_system()
     return jsonify({'status': 'reset'})
 
@@ -73,18 +172,129 @@ def force_recover():
     token = request.headers.get('Authorization', '').replace('Bearer ', '')
     if not totp.verify(token):
         return jsonify({'error': 'Invalid TOTP'}), 401
-    
-    # In a real implementation, restore state from database
-    return jsonify({'status': 'recovery_initiated'})
+    if core_link is not None:
+        return forward_admin('force_recover')
+    body, status = run_force_recover()
+    return jsonify(body), status
+
+def run_force_recover():
+    if session_recovery is None:
+        return {'error': 'Recovery not configured'}, 503
+    started = time.perf_counter()
+    restored = session_recovery.restore_all()
+    return {
+        'status': 'recovered',
+        'restored': restored,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+    }, 200
+
+def run_admin(action: str):
+    """Core side of an admin action forwarded by a worker: (body, status)."""
+    if action == 'reset':
+        reset_system()
+        return {'status': 'reset'}, 200
+    if action == 'force_recover':
+        return run_force_recover()
+    return {'error': f"Unknown admin action {action}"}, 400
+
+def forward_admin(action: str):
+    """Worker side: run the action in the core process, which owns the state."""
+    reply = core_link.request_admin(action)
+    if reply is None:
+        return jsonify({'error': 'Core process unreachable'}), 503
+    return jsonify(reply['body']), reply['status']
+
+# Set by attach_fanout() when Socket.IO workers run in separate processes
+fanout_publisher = None
+
+# Worker processes only (attach_core): the FanoutSubscriber linked to the core,
+# and the core's event history (snapshot, then one event at a time)
+core_link = None
+remote_history: Deque[Dict[str, Any]] = deque(maxlen=event_bus.event_history.maxlen)
+
+# Socket.IO sid -> negotiated payload codec
+client_codecs: Dict[str, str] = {}
 
 @socketio.on('connect')
-def handle_connect():
-    emit('status_update', state)
+def handle_connect(auth=None):
+    client_codec = codec.negotiate(auth)
+    client_codecs[request.sid] = client_codec
+    join_room(codec.room(client_codec))
+    codec.client_connected(client_codec)
+    emit('status_update', codec.encode(client_codec, state))
+    emit('event_history', codec.encode(client_codec, event_history()))
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    client_codec = client_codecs.pop(request.sid, None)
+    if client_codec is not None:
+        codec.client_disconnected(client_codec)
+
+def event_history() -> List[Dict[str, Any]]:
+    return list(remote_history) if core_link is not None else event_bus.get_history()
+
+def attach_fanout(publisher):
+    """Mirror every state delta to dashboard worker processes."""
+    global fanout_publisher
+    fanout_publisher = publisher
+    publisher.sections_handler = snapshot_cache.snapshot
+    publisher.admin_handler = run_admin
+    publisher.start(state, event_bus.get_history())
+    event_bus.subscribe(None, lambda event: publisher.publish_event(event.to_dict()),
+                        maxsize=1024, overflow=OverflowPolicy.DROP_OLDEST, name='dashboard-fanout')
+
+def attach_core(subscriber):
+    """Worker side: forward admin actions to the core through its FanoutSubscriber."""
+    global core_link
+    core_link = subscriber
+
+def attach_tournament(bracket):
+    """Expose a tournament bracket's leaderboard in snapshots (and checkpoint it)."""
+    global tournament_bracket
+    tournament_bracket = bracket
+    if session_recovery is not None:
+        session_recovery.register('tournament', bracket.snapshot, bracket.restore,
+                                  lambda: bracket.version)
+
+def attach_store(store):
+    """Serve stored bracket rounds and leaderboards from a storage.MatchStore."""
+    global match_store
+    match_store = store
+
+def attach_recovery(recovery):
+    """Checkpoint dashboard state (and any attached bracket) through SessionRecovery."""
+    global session_recovery
+    session_recovery = recovery
+    recovery.register('dashboard', snapshot_state, update_state, lambda: state_version)
+    if tournament_bracket is not None:
+        attach_tournament(tournament_bracket)
+
+def snapshot_state() -> Dict[str, Any]:
+    return json.loads(json.dumps(state))  # deep copy of plain JSON data
 
 def update_state(updates: Dict[str, Any]):
-    global state
+    global state, state_version
     state.update(updates)
-    socketio.emit('status_update', state)
+    state_version += 1
+    codec.broadcast(socketio, 'status_update', state)
+    if fanout_publisher is not None:
+        fanout_publisher.publish(updates)
+
+def apply_remote_state(updates: Dict[str, Any]):
+    """Worker side: apply a delta received from the core process."""
+    global state_version
+    state.update(updates)
+    state_version += 1
+    codec.broadcast(socketio, 'status_update', state)
+
+def apply_remote_history(history: List[Dict[str, Any]]):
+    """Worker side: the core's event history, received with each snapshot."""
+    remote_history.clear()
+    remote_history.extend(history)
+
+def apply_remote_event(event: Dict[str, Any]):
+    """Worker side: an event published on the core's event bus."""
+    remote_history.append(event)
 
 def add_event(event: str, data: Dict[str, Any]):
     state['events'].append({
@@ -94,7 +304,7 @@ def add_event(event: str, data: Dict[str, Any]):
     })
     if len(state['events']) > 50:
         state['events'] = state['events'][-50:]
-    update_state({})
+    update_state({'events': state['events']})
 
 def reset_system():
     global state
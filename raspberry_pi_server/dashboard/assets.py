@@ -0,0 +1,123 @@
+"""
+Precompressed, fingerprinted static assets for the dashboard.
+
+Every file under dashboard/static is hashed and compressed once at startup
+(brotli + gzip). Templates link to /assets/<name>.<hash>.<ext> through
+asset_url(); those URLs never change content, so they are served with
+immutable cache headers and the variant matching Accept-Encoding is picked
+without any per-request compression.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import brotli
+from flask import Response, abort, request, url_for
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+@dataclass
+class Asset:
+    """One static file with its fingerprint and precomputed encodings."""
+    name: str
+    fingerprinted: str
+    digest: str
+    mimetype: str
+    variants: Dict[str, bytes] = field(default_factory=dict)  # encoding -> body
+
+
+class AssetPipeline:
+    """Build and serve fingerprinted, precompressed copies of static files."""
+
+    def __init__(self, app=None, static_dir: Optional[str] = None, url_prefix: str = "/assets"):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.assets: Dict[str, Asset] = {}           # logical name -> asset
+        self.by_fingerprint: Dict[str, Asset] = {}   # fingerprinted name -> asset
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Build all assets and register the /assets route and template helper."""
+        if self.static_dir is None:
+            self.static_dir = app.static_folder
+        self.build()
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", "assets", self.serve)
+        app.jinja_env.globals["asset_url"] = self.asset_url
+        app.extensions["asset_pipeline"] = self
+
+    def build(self):
+        """Fingerprint and compress every file in the static directory."""
+        self.assets.clear()
+        self.by_fingerprint.clear()
+        if not self.static_dir or not os.path.isdir(self.static_dir):
+            return
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    self._add(name, f.read())
+        logger.info(f"Asset pipeline built {len(self.assets)} assets")
+
+    def _add(self, name: str, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        asset = Asset(name=name, fingerprinted=f"{stem}.{digest}{ext}",
+                      digest=digest, mimetype=mimetype, variants={"identity": body})
+        if mimetype.startswith(COMPRESSIBLE_TYPES):
+            candidates = {
+                "br": brotli.compress(body, quality=11),
+                "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            }
+            for encoding, compressed in candidates.items():
+                if len(compressed) < len(body):
+                    asset.variants[encoding] = compressed
+        self.assets[name] = asset
+        self.by_fingerprint[asset.fingerprinted] = asset
+
+    def asset_url(self, name: str) -> str:
+        """URL for a static file, fingerprinted when the pipeline knows it."""
+        asset = self.assets.get(name)
+        if asset is None:
+            return url_for("static", filename=name)
+        return url_for("assets", filename=asset.fingerprinted)
+
+    @staticmethod
+    def _choose_encoding(asset: Asset) -> str:
+        accepted = request.accept_encodings
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted[encoding] > 0:
+                return encoding
+        return "identity"
+
+    def serve(self, filename: str):
+        """Serve a fingerprinted asset in the best accepted encoding."""
+        asset = self.by_fingerprint.get(filename)
+        if asset is None:
+            abort(404)
+
+        encoding = self._choose_encoding(asset)
+        etag = f"{asset.digest}-{encoding}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -0,0 +1,62 @@
+"""
+Per-client payload codecs for dashboard Socket.IO messages.
+
+Clients opt in with ``auth: {codec: 'msgpack'}`` on connect; anything else
+gets JSON. python-socketio's packet serializer is fixed per server, so
+msgpack is negotiated at the payload level instead: msgpack payloads travel
+as Socket.IO binary attachments, leaving only a tiny JSON header per packet.
+Clients are grouped into one room per codec and each broadcast is encoded
+once per codec that has listeners, never once per client.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+import msgpack
+
+CODECS = ('json', 'msgpack')
+DEFAULT_CODEC = 'json'
+
+_client_counts: Dict[str, int] = {codec: 0 for codec in CODECS}
+_lock = threading.Lock()
+
+
+def negotiate(auth: Optional[Dict[str, Any]]) -> str:
+    """Pick the codec requested in the connect auth payload, JSON otherwise."""
+    if not isinstance(auth, dict):
+        return DEFAULT_CODEC
+    codec = auth.get('codec', DEFAULT_CODEC)
+    return codec if codec in CODECS else DEFAULT_CODEC
+
+
+def room(codec: str) -> str:
+    """Socket.IO room holding all clients that use a codec."""
+    return f'codec:{codec}'
+
+
+def client_connected(codec: str):
+    with _lock:
+        _client_counts[codec] += 1
+
+
+def client_disconnected(codec: str):
+    with _lock:
+        _client_counts[codec] = max(0, _client_counts[codec] - 1)
+
+
+def client_count(codec: str) -> int:
+    return _client_counts[codec]
+
+
+def encode(codec: str, payload: Any) -> Any:
+    """Encode a payload for a codec; JSON payloads are left to Socket.IO."""
+    if codec == 'msgpack':
+        return msgpack.packb(payload, use_bin_type=True)
+    return payload
+
+
+def broadcast(socketio, event: str, payload: Any):
+    """Emit to every connected client, encoding once per codec in use."""
+    for codec in CODECS:
+        if _client_counts[codec]:
+            socketio.emit(event, encode(codec, payload), to=room(codec))
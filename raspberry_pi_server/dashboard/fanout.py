@@ -0,0 +1,315 @@
+"""
+Multi-process dashboard fan-out over a local ZeroMQ PUB/SUB bus.
+
+The core process (MQTT, matcher, audio) stays the single owner of dashboard
+state and publishes every delta on a PUB socket. N Socket.IO worker processes
+subscribe, mirror the state and broadcast to their own browser clients, so
+WebSocket fan-out no longer competes for the core process's GIL.
+
+Late-joining workers fetch a full snapshot over REQ/REP before applying
+deltas (the ZeroMQ "clone" pattern), and resync whenever a sequence gap is seen.
+Event bus events travel the same way (history topic, same sequence), so a
+worker's event history follows the core's. The REQ/REP socket also serves
+what only the core can answer: /api/v1/snapshot sections built from its
+metrics and bracket, and admin actions (reset, force-recover) that change
+its state.
+"""
+
+import json
+import logging
+import multiprocessing
+import socket
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import zmq
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUB_ENDPOINT = "tcp://127.0.0.1:5557"
+DEFAULT_SNAPSHOT_ENDPOINT = "tcp://127.0.0.1:5558"
+
+STATE_TOPIC = b"state"
+HISTORY_TOPIC = b"history"
+SNAPSHOT_REQUEST = b"snapshot"
+SECTIONS_REQUEST = b"sections"
+ADMIN_REQUEST = b"admin"
+
+
+class FanoutPublisher:
+    """Core-side publisher: mirrors the state and fans deltas out to workers."""
+
+    def __init__(self, pub_endpoint: str = DEFAULT_PUB_ENDPOINT,
+                 snapshot_endpoint: str = DEFAULT_SNAPSHOT_ENDPOINT, max_history: int = 100):
+        self.pub_endpoint = pub_endpoint
+        self.snapshot_endpoint = snapshot_endpoint
+        self.context = zmq.Context.instance()
+        self.seq = 0
+        self.state: Dict[str, Any] = {}
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=max_history)
+        self.lock = threading.Lock()  # zmq sockets are not thread-safe
+        self.running = False
+        # Set by the core: sections_handler(fields) -> (body, etag) for
+        # /api/v1/snapshot, admin_handler(action) -> (body, status)
+        self.sections_handler: Optional[Callable[[List[str]], Tuple[str, str]]] = None
+        self.admin_handler: Optional[Callable[[str], Tuple[Dict[str, Any], int]]] = None
+        self._pub: Optional[zmq.Socket] = None
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+    def start(self, initial_state: Dict[str, Any], initial_history: Iterable[Dict[str, Any]] = ()):
+        """Bind the PUB socket and start serving snapshots."""
+        with self.lock:
+            self.state = json.loads(json.dumps(initial_state))
+            self.history.extend(json.loads(json.dumps(list(initial_history))))
+            self._pub = self.context.socket(zmq.PUB)
+            self._pub.setsockopt(zmq.SNDHWM, 10000)
+            self._pub.setsockopt(zmq.LINGER, 0)
+            self._pub.bind(self.pub_endpoint)
+        self.running = True
+        self._snapshot_thread = threading.Thread(target=self._serve_snapshots, daemon=True)
+        self._snapshot_thread.start()
+        logger.info(f"Fan-out publisher bound to {self.pub_endpoint}")
+
+    def publish(self, delta: Dict[str, Any]):
+        """Apply a top-level delta to the mirror and send it to all workers."""
+        if not delta:
+            return
+        payload = json.dumps(delta).encode()
+        with self.lock:
+            if self._pub is None:
+                return
+            self.seq += 1
+            self.state.update(json.loads(payload))
+            self._pub.send_multipart([STATE_TOPIC, str(self.seq).encode(), payload])
+
+    def publish_event(self, event: Dict[str, Any]):
+        """Append an event bus event to the history mirror and send it to all workers."""
+        payload = json.dumps(event).encode()
+        with self.lock:
+            if self._pub is None:
+                return
+            self.seq += 1
+            self.history.append(json.loads(payload))
+            self._pub.send_multipart([HISTORY_TOPIC, str(self.seq).encode(), payload])
+
+    def snapshot(self) -> Tuple[int, Dict[str, Any], List[Dict[str, Any]]]:
+        """Return the current (seq, state, history), consistent with each other."""
+        with self.lock:
+            return self.seq, json.loads(json.dumps(self.state)), list(self.history)
+
+    def _serve_snapshots(self):
+        rep = self.context.socket(zmq.REP)
+        rep.setsockopt(zmq.LINGER, 0)
+        rep.bind(self.snapshot_endpoint)
+        poller = zmq.Poller()
+        poller.register(rep, zmq.POLLIN)
+        try:
+            while self.running:
+                if not dict(poller.poll(200)):
+                    continue
+                request = rep.recv_multipart()
+                if request[0] == ADMIN_REQUEST:
+                    rep.send(json.dumps(self._admin(request[1].decode())).encode())
+                    continue
+                if request[0] == SECTIONS_REQUEST:
+                    rep.send_multipart(self._sections(json.loads(request[1])))
+                    continue
+                seq, state, history = self.snapshot()
+                rep.send_multipart([str(seq).encode(), json.dumps(state).encode(),
+                                    json.dumps(history).encode()])
+        finally:
+            rep.close()
+
+    def _sections(self, fields: List[str]) -> List[bytes]:
+        if self.sections_handler is None:
+            return [b'', b'']
+        try:
+            body, etag = self.sections_handler(fields)
+        except Exception as e:
+            logger.error(f"Forwarded snapshot of {fields} failed: {e}")
+            return [b'', b'']
+        return [body.encode(), etag.encode()]
+
+    def _admin(self, action: str) -> Dict[str, Any]:
+        if self.admin_handler is None:
+            return {'body': {'error': 'Admin actions not supported'}, 'status': 503}
+        try:
+            body, status = self.admin_handler(action)
+        except Exception as e:
+            logger.error(f"Forwarded admin action {action!r} failed: {e}")
+            body, status = {'error': str(e)}, 500
+        return {'body': body, 'status': status}
+
+    def stop(self):
+        """Stop serving and close sockets."""
+        self.running = False
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=1)
+        with self.lock:
+            if self._pub is not None:
+                self._pub.close()
+                self._pub = None
+
+
+class FanoutSubscriber:
+    """Worker-side subscriber: keeps a local mirror in sync with the core."""
+
+    def __init__(self, on_state: Callable[[Dict[str, Any]], None],
+                 pub_endpoint: str = DEFAULT_PUB_ENDPOINT,
+                 snapshot_endpoint: str = DEFAULT_SNAPSHOT_ENDPOINT,
+                 snapshot_timeout_ms: int = 2000,
+                 on_history: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_state = on_state
+        self.on_history = on_history  # the whole history, with every snapshot
+        self.on_event = on_event  # each event published after it
+        self.pub_endpoint = pub_endpoint
+        self.snapshot_endpoint = snapshot_endpoint
+        self.snapshot_timeout_ms = snapshot_timeout_ms
+        self.context = zmq.Context.instance()
+        self.last_seq = 0
+        self.resyncs = 0
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the receive thread."""
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the receive thread."""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _request(self, frames: List[bytes]) -> Optional[List[bytes]]:
+        """One REQ/REP round-trip to the core; None on timeout."""
+        req = self.context.socket(zmq.REQ)
+        req.setsockopt(zmq.LINGER, 0)
+        req.connect(self.snapshot_endpoint)
+        try:
+            req.send_multipart(frames)
+            if not req.poll(self.snapshot_timeout_ms):
+                return None
+            return req.recv_multipart()
+        finally:
+            req.close()
+
+    def _fetch_snapshot(self) -> bool:
+        reply = self._request([SNAPSHOT_REQUEST])
+        if reply is None:
+            logger.warning("Fan-out snapshot request timed out")
+            return False
+        seq, payload, history = reply
+        self.last_seq = int(seq)
+        self.on_state(json.loads(payload))
+        if self.on_history is not None:
+            self.on_history(json.loads(history))
+        return True
+
+    def request_sections(self, fields: List[str]) -> Optional[Tuple[str, str]]:
+        """The core's /api/v1/snapshot (body, etag) for fields, or None if unavailable."""
+        reply = self._request([SECTIONS_REQUEST, json.dumps(fields).encode()])
+        if reply is None:
+            logger.warning("Fan-out snapshot sections request timed out")
+            return None
+        body, etag = reply
+        return (body.decode(), etag.decode()) if body else None
+
+    def request_admin(self, action: str) -> Optional[Dict[str, Any]]:
+        """Run an admin action in the core: {'body': ..., 'status': ...}, or None if unreachable."""
+        reply = self._request([ADMIN_REQUEST, action.encode()])
+        if reply is None:
+            logger.warning(f"Fan-out admin request {action!r} timed out")
+            return None
+        return json.loads(reply[0])
+
+    def _run(self):
+        sub = self.context.socket(zmq.SUB)
+        sub.setsockopt(zmq.LINGER, 0)
+        sub.setsockopt(zmq.RCVHWM, 10000)
+        sub.setsockopt(zmq.SUBSCRIBE, STATE_TOPIC)
+        sub.setsockopt(zmq.SUBSCRIBE, HISTORY_TOPIC)
+        # Connect SUB before requesting the snapshot so no delta falls in between
+        sub.connect(self.pub_endpoint)
+        synced = self._fetch_snapshot()
+        try:
+            while self.running:
+                if not sub.poll(200):
+                    if not synced:
+                        synced = self._fetch_snapshot()
+                    continue
+                topic, seq_raw, payload = sub.recv_multipart()
+                seq = int(seq_raw)
+                if synced and seq <= self.last_seq:
+                    continue  # already contained in the snapshot
+                if not synced or seq != self.last_seq + 1:
+                    self.resyncs += 1
+                    logger.warning(f"Fan-out gap (have {self.last_seq}, got {seq}), resyncing")
+                    synced = self._fetch_snapshot()
+                    continue
+                self.last_seq = seq
+                if topic == STATE_TOPIC:
+                    self.on_state(json.loads(payload))
+                elif self.on_event is not None:
+                    self.on_event(json.loads(payload))
+        finally:
+            sub.close()
+
+
+def _reuseport_socket(host: str, port: int) -> socket.socket:
+    """Listening socket shared by all workers; the kernel balances accepts."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+    return sock
+
+
+def worker_main(index: int, host: str, port: int,
+                pub_endpoint: str = DEFAULT_PUB_ENDPOINT,
+                snapshot_endpoint: str = DEFAULT_SNAPSHOT_ENDPOINT):
+    """Entry point of one Socket.IO worker process."""
+    from werkzeug.serving import make_server
+
+    from dashboard.app import (app, apply_remote_event, apply_remote_history, apply_remote_state,
+                               attach_core, attach_store)
+    from db import create_db_engine
+    from storage import MatchStore
+
+    subscriber = FanoutSubscriber(apply_remote_state, pub_endpoint, snapshot_endpoint,
+                                  on_history=apply_remote_history, on_event=apply_remote_event)
+    attach_core(subscriber)
+    attach_store(MatchStore(create_db_engine()))  # read-only here: the core writes
+    subscriber.start()
+
+    sock = _reuseport_socket(host, port)
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    logger.info(f"Dashboard worker {index} serving on {host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        subscriber.stop()
+
+
+def start_workers(num_workers: int, host: str = "0.0.0.0", port: int = 5001,
+                  pub_endpoint: str = DEFAULT_PUB_ENDPOINT,
+                  snapshot_endpoint: str = DEFAULT_SNAPSHOT_ENDPOINT) -> List[multiprocessing.Process]:
+    """Spawn worker processes sharing one SO_REUSEPORT listening port."""
+    ctx = multiprocessing.get_context("spawn")
+    workers = []
+    for index in range(num_workers):
+        proc = ctx.Process(
+            target=worker_main,
+            args=(index, host, port, pub_endpoint, snapshot_endpoint),
+            name=f"dashboard-worker-{index}",
+            daemon=True,
+        )
+        proc.start()
+        workers.append(proc)
+    return workers
@@ -0,0 +1,78 @@
+"""
+Rendered-page cache for the dashboard.
+
+Pages without per-request data are rendered once per (template, locale,
+version) and then served from memory. The version combines template file
+mtimes with the translation catalog fingerprint and is re-checked at most
+every check_interval_s, so editing a template or a .po file invalidates
+the cache without a restart.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from flask import render_template
+from flask_babel import get_locale
+
+import i18n
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """Cache of rendered HTML keyed by (template, locale, version)."""
+
+    def __init__(self, app, check_interval_s: float = 2.0):
+        self.app = app
+        self.check_interval_s = check_interval_s
+        self.pages: Dict[Tuple[str, str, Tuple[str, str]], str] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.version = self._compute_version()
+        self.last_check = time.monotonic()
+
+    def _template_version(self) -> str:
+        digest = hashlib.sha1()
+        template_dir = os.path.join(self.app.root_path, self.app.template_folder)
+        for root, _, files in sorted(os.walk(template_dir)):
+            for filename in sorted(files):
+                stat = os.stat(os.path.join(root, filename))
+                digest.update(f"{filename}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        return digest.hexdigest()[:12]
+
+    def _compute_version(self) -> Tuple[str, str]:
+        return self._template_version(), i18n.catalog_version()
+
+    def current_version(self) -> Tuple[str, str]:
+        """Return the version, re-checking files at most once per interval."""
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval_s:
+            return self.version
+        with self.lock:
+            self.last_check = now
+            version = self._compute_version()
+            if version != self.version:
+                if version[1] != self.version[1]:
+                    i18n.reload_catalogs(self.app)
+                logger.info("Templates or catalogs changed, dropping cached pages")
+                self.pages.clear()
+                self.version = version
+        return self.version
+
+    def render(self, template_name: str) -> str:
+        """Render a template for the request's locale, or serve it from cache."""
+        locale = str(get_locale())
+        key = (template_name, locale, self.current_version())
+        html = self.pages.get(key)
+        if html is not None:
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = render_template(template_name, lang=locale)
+        self.pages[key] = html
+        return html
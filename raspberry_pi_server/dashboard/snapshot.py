@@ -0,0 +1,58 @@
+"""
+Version-stamped section caches behind /api/v1/snapshot.
+
+Each section (status, stats, report, ...) registers a builder and a cheap
+version function. The JSON fragment for a section is serialized once per
+version and reused until the underlying component bumps its version, so a
+combined snapshot is just a join of cached strings.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+class SnapshotCache:
+    """Serialized-once JSON fragments for dashboard snapshot sections."""
+
+    def __init__(self):
+        self.builders: Dict[str, Tuple[Callable[[], Any], Callable[[], Hashable]]] = {}
+        self.fragments: Dict[str, Tuple[Hashable, str]] = {}
+        self.lock = threading.Lock()
+
+    def register(self, name: str, builder: Callable[[], Any], version_fn: Callable[[], Hashable]):
+        """Add a section built by builder() and stamped by version_fn()."""
+        self.builders[name] = (builder, version_fn)
+        self.fragments.pop(name, None)
+
+    @property
+    def sections(self) -> List[str]:
+        return list(self.builders)
+
+    def fragment(self, name: str) -> Tuple[Hashable, str]:
+        """Return (version, JSON fragment) for a section, rebuilding if stale."""
+        builder, version_fn = self.builders[name]
+        version = version_fn()
+        cached = self.fragments.get(name)
+        if cached is not None and cached[0] == version:
+            return cached
+        with self.lock:
+            cached = self.fragments.get(name)
+            if cached is None or cached[0] != version:
+                cached = (version, json.dumps(builder()))
+                self.fragments[name] = cached
+        return cached
+
+    def snapshot(self, fields: Iterable[str]) -> Tuple[str, str]:
+        """Combined JSON document for the given sections plus its ETag."""
+        parts = []
+        versions = {}
+        for name in fields:
+            version, fragment = self.fragment(name)
+            versions[name] = version
+            parts.append(f'{json.dumps(name)}: {fragment}')
+        stamp = json.dumps(versions, sort_keys=True, default=str)
+        etag = hashlib.sha1(stamp.encode()).hexdigest()[:16]
+        body = '{"versions": ' + json.dumps(versions, default=str) + ''.join(', ' + p for p in parts) + '}'
+        return body, etag
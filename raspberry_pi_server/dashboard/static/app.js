@@ -1,6 +1,24 @@
-const socket = io();
+// WebSocket first: dashboard workers share one port, so polling would lose stickiness.
+// Ask for msgpack payloads when the decoder is loaded; the server falls back to JSON.
+const codec = typeof MessagePack !== 'undefined' ? 'msgpack' : 'json';
+const socket = io({ transports: ['websocket', 'polling'], auth: { codec } });
 
-socket.on('status_update', (data) => {
+function decode(payload) {
+    if (payload instanceof ArrayBuffer || ArrayBuffer.isView(payload)) {
+        return MessagePack.decode(payload instanceof ArrayBuffer ? new Uint8Array(payload) : payload);
+    }
+    return payload;
+}
+
+// First paint from one snapshot round-trip; live updates then arrive over the socket
+fetch('/api/v1/snapshot?fields=status')
+    .then(response => response.json())
+    .then(snapshot => renderStatus(snapshot.status))
+    .catch(error => console.error('Snapshot fetch failed:', error));
+
+socket.on('status_update', (payload) => renderStatus(decode(payload)));
+
+function renderStatus(data) {
     // Update stations
     document.getElementById('state-a').textContent = data.station_a.state;
     document.getElementById('track-a').textContent = data.station_a.track;
@@ -35,7 +53,7 @@ socket.on('status_update', (data) => {
         li.textContent = `${new Date(event.time * 1000).toLocaleTimeString()}: ${event.event}`;
         eventList.appendChild(li);
     });
-});
+}
 
 function updateRing(ringId, state) {
     const ring = document.getElementById(ringId);
@@ -7,11 +7,16 @@
  *   const client = new WebSocketClient();
  *   client.on('matched', (data) => console.log('Matched!', data));
  *   client.connect();
+ *
+ * Payloads are msgpack-encoded binary when the MessagePack decoder
+ * (static/msgpack.js) is loaded, JSON otherwise; the server honours the
+ * codec requested in the connect auth payload.
  */
 
 class WebSocketClient {
-    constructor(url = null) {
+    constructor(url = null, codec = null) {
         this.url = url || `ws://${window.location.host}/socket.io`;
+        this.codec = codec || (typeof MessagePack !== 'undefined' ? 'msgpack' : 'json');
         this.socket = null;
         this.handlers = {}; // event type -> [callbacks]
         this.connected = false;
@@ -32,7 +37,8 @@ class WebSocketClient {
                 reconnection: true,
                 reconnectionDelay: this.reconnectDelay,
                 reconnectionDelayMax: 10000,
-                reconnectionAttempts: this.maxReconnectAttempts
+                reconnectionAttempts: this.maxReconnectAttempts,
+                auth: { codec: this.codec }
             });
 
             this.socket.on('connect', () => {
@@ -51,11 +57,12 @@ class WebSocketClient {
                 this._emit('disconnected', {});
             });
 
-            this.socket.on('event', (data) => {
-                this._handleEvent(data);
+            this.socket.on('event', (payload) => {
+                this._handleEvent(this._decode(payload));
             });
 
-            this.socket.on('event_history', (events) => {
+            this.socket.on('event_history', (payload) => {
+                const events = this._decode(payload);
                 console.log(`[WebSocket] Received ${events.length} history events`);
                 events.forEach(e => this._handleEvent(e));
             });
@@ -90,6 +97,17 @@ class WebSocketClient {
         this.handlers[eventType].push(callback);
     }
 
+    /**
+     * Decode a payload: binary attachments are msgpack, anything else is already JSON-decoded.
+     * @private
+     */
+    _decode(payload) {
+        if (payload instanceof ArrayBuffer || ArrayBuffer.isView(payload)) {
+            return MessagePack.decode(payload instanceof ArrayBuffer ? new Uint8Array(payload) : payload);
+        }
+        return payload;
+    }
+
     /**
      * Route incoming event to registered handlers.
      * @private
@@ -0,0 +1,56 @@
+"""
+Database engine setup.
+SQLite in WAL mode by default (DATABASE_URL), shared table metadata.
+"""
+
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = 'sqlite:////var/lib/blinddate/sessions.db'
+
+metadata = MetaData()
+
+# Latest serialized state per component (matcher, dashboard, tournament, ...)
+checkpoints = Table(
+    'checkpoints', metadata,
+    Column('name', String(64), primary_key=True),
+    Column('state', Text, nullable=False),
+    Column('updated_at', Float, nullable=False),
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: readers never block the writer; NORMAL sync is durable across
+    # process crashes and only risks the last commits on power loss
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    """Create the engine for DATABASE_URL and make sure tables exist."""
+    url = url or os.getenv('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if url.startswith('sqlite'):
+        path = url.split('///', 1)[-1]
+        if path and path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        engine = create_engine(url, connect_args={'check_same_thread': False})
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    else:
+        engine = create_engine(url, pool_pre_ping=True)
+    metadata.create_all(engine)
+    logger.info(f"Database ready: {engine.url.render_as_string(hide_password=True)}")
+    return engine
+
+
+def create_session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=engine)
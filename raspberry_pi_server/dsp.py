@@ -1,18 +1,59 @@
 """
 Digital Signal Processing module for audio quality enhancement.
 Implements noise gate, AGC, echo cancellation, and filtering.
+
+Speech needs nothing above 8kHz, so DSPPipeline can run its stages at a
+16kHz voice-band rate (processing_rate=16000). Device audio is resampled
+down on the way in and back up only at the output. This uses streaming
+polyphase resamplers that keep their filter state across blocks. Every
+stage then handles about 2.76x fewer samples at 44.1kHz.
 """
 
 import logging
 import threading
 from collections import deque
-from typing import Tuple
+from math import gcd
+from typing import Optional, Tuple
 
 import numpy as np
 from scipy import signal
 
 logger = logging.getLogger(__name__)
 
+
+class PolyphaseResampler:
+    """Streaming rational-ratio resampler: polyphase FIR with state kept across blocks."""
+
+    def __init__(self, from_rate: int, to_rate: int, half_len: int = 10, window=('kaiser', 5.0)):
+        g = gcd(from_rate, to_rate)
+        self.up = to_rate // g
+        self.down = from_rate // g
+        # Same anti-aliasing FIR as scipy.signal.resample_poly
+        max_rate = max(self.up, self.down)
+        h = signal.firwin(2 * half_len * max_rate + 1, 1.0 / max_rate, window=window) * self.up
+        self.taps = -(-len(h) // self.up)
+        h = np.concatenate([h, np.zeros(self.taps * self.up - len(h))])
+        # bank[p, i] weights x[j - taps + 1 + i] for an output at phase p of input j
+        self.bank = h.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.consumed = 0  # input samples so far
+        self.produced = 0  # output samples so far
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample a mono block; the output length varies by at most one sample per block."""
+        total = self.consumed + len(block)
+        end = -(-total * self.up // self.down)  # outputs whose newest input has arrived
+        m = np.arange(self.produced, end, dtype=np.int64) * self.down
+        buf = np.concatenate([self.history, block.astype(np.float32, copy=False)])
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)
+        out = np.einsum('nk,nk->n', self.bank[m % self.up], windows[m // self.up - self.consumed])
+        if self.taps > 1:
+            self.history = buf[-(self.taps - 1):]
+        self.consumed = total
+        self.produced = end
+        return out
+
+
 class NoiseGate:
     """Suppresses audio below threshold (-40dB)."""
     
@@ -103,8 +144,8 @@ class AudioFilter:
     
     def __init__(self, sample_rate=44100):
         self.sample_rate = sample_rate
-        # Design low-pass filter: cutoff at 8kHz
-        self.b_lp, self.a_lp = signal.butter(4, 8000, fs=sample_rate, btype='low')
+        # Design low-pass filter: cutoff at 8kHz (or just under Nyquist at 16kHz)
+        self.b_lp, self.a_lp = signal.butter(4, min(8000, 0.45 * sample_rate), fs=sample_rate, btype='low')
         # Design band-pass filter: 300Hz - 3400Hz (telephone effect)
         self.b_bp, self.a_bp = signal.butter(4, [300, 3400], fs=sample_rate, btype='band')
         
@@ -144,20 +185,38 @@ class AudioLevelMeter:
 class DSPPipeline:
     """Complete DSP pipeline: noise gate → AGC → echo cancel → filter."""
     
-    def __init__(self, sample_rate=44100, telephone_mode=False):
+    def __init__(self, sample_rate=44100, telephone_mode=False, processing_rate: Optional[int] = None):
         self.sample_rate = sample_rate
         self.telephone_mode = telephone_mode
-        self.noise_gate = NoiseGate(sample_rate=sample_rate)
-        self.agc = AutomaticGainControl(sample_rate=sample_rate)
-        self.echo_canceller = EchoCanceller(sample_rate=sample_rate)
-        self.filter = AudioFilter(sample_rate=sample_rate)
-        self.level_meter = AudioLevelMeter(sample_rate=sample_rate)
+        # Rate the stages run at; e.g. 16000 for the voice-band path
+        self.processing_rate = rate = processing_rate or sample_rate
+        self.noise_gate = NoiseGate(sample_rate=rate)
+        self.agc = AutomaticGainControl(sample_rate=rate)
+        # Same echo tail length in ms at any rate
+        self.echo_canceller = EchoCanceller(filter_len=int(round(512 * rate / 44100)), sample_rate=rate)
+        self.filter = AudioFilter(sample_rate=rate)
+        self.level_meter = AudioLevelMeter(sample_rate=rate)
+        self.voice_band = rate != sample_rate
+        if self.voice_band:
+            self.downsample = PolyphaseResampler(sample_rate, rate)
+            self.downsample_outgoing = PolyphaseResampler(sample_rate, rate)
+            self.upsample = PolyphaseResampler(rate, sample_rate)
+            self.pending = np.zeros(0, dtype=np.float32)  # upsampled beyond the last block
         self.lock = threading.Lock()
+
+    def _to_device_rate(self, audio: np.ndarray, frames: int) -> np.ndarray:
+        """Upsample processed audio and return exactly one device block of it."""
+        # Up(down(T samples)) always yields at least T, so the block is never short
+        audio = np.concatenate([self.pending, self.upsample.process(audio)])
+        self.pending = audio[frames:]
+        return audio[:frames]
     
     def process_incoming(self, incoming: np.ndarray, outgoing: np.ndarray = None) -> Tuple[np.ndarray, float]:
         """Process incoming voice audio through DSP chain."""
         with self.lock:
             audio = incoming.astype(np.float32) / 32768.0
+            if self.voice_band:
+                audio = self.downsample.process(audio)
             
             # Noise gate
             audio = self.noise_gate.process(audio)
@@ -168,6 +227,8 @@ class DSPPipeline:
             # Echo cancellation
             if outgoing is not None:
                 outgoing_f = outgoing.astype(np.float32) / 32768.0
+                if self.voice_band:
+                    outgoing_f = self.downsample_outgoing.process(outgoing_f)
                 audio = self.echo_canceller.process(audio, outgoing_f)
             
             # Filtering
@@ -179,6 +240,9 @@ class DSPPipeline:
             # Metering
             level_db = self.level_meter.measure(audio)
             
+            if self.voice_band:
+                audio = self._to_device_rate(audio, len(incoming))
+            
             # Convert back to int16
             audio = np.clip(audio * 32768.0, -32768, 32767).astype(np.int16)
             return audio, level_db
@@ -0,0 +1,206 @@
+"""
+Persistent, segmented, append-only event log.
+
+Records are length-prefixed and checksummed:
+
+    <u32 payload length> <u32 crc32(payload)> <payload bytes>
+
+and live in segment files named after the global byte offset of their first
+record (``00000000000000000000.log``, ``00000000000016777216.log``, ...), so
+an offset identifies a record across rotations. Appends go to a buffered
+file; a flusher thread fsyncs the active segment every ``fsync_interval_s``
+seconds so many events share one fsync. Readers mmap segments and replay
+from any offset without loading the log into memory.
+
+A crash can leave a torn record at the end of the last segment; it is
+detected by length/CRC on open and truncated away.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('<II')
+SEGMENT_SUFFIX = '.log'
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+
+
+def segment_name(base_offset: int) -> str:
+    return f"{base_offset:020d}{SEGMENT_SUFFIX}"
+
+
+def _scan(buf, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (record position, payload start, payload end) for valid records."""
+    pos = start
+    while pos + HEADER.size <= end:
+        length, crc = HEADER.unpack_from(buf, pos)
+        payload_start = pos + HEADER.size
+        payload_end = payload_start + length
+        if payload_end > end or zlib.crc32(buf[payload_start:payload_end]) != crc:
+            return
+        yield pos, payload_start, payload_end
+        pos = payload_end
+
+
+class EventLog:
+    """Append-only segmented log with batched fsync and mmap replay."""
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 fsync_interval_s: float = 0.5):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval_s = fsync_interval_s
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._closed = False
+        self.appended = 0
+        self.fsyncs = 0
+
+        self.segments: List[int] = self._list_segments() or [0]
+        self._base = self.segments[-1]
+        self._size = self._recover(self._base)
+        self._file = open(self._path(self._base), 'ab')
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if fsync_interval_s > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="event-log-fsync",
+                                             daemon=True)
+            self._flusher.start()
+
+    def _path(self, base_offset: int) -> str:
+        return os.path.join(self.directory, segment_name(base_offset))
+
+    def _list_segments(self) -> List[int]:
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit())
+
+    def _recover(self, base_offset: int) -> int:
+        """Validate the last segment and cut off a torn tail. Returns its size."""
+        path = self._path(base_offset)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            open(path, 'ab').close()
+            return 0
+        with open(path, 'rb') as f:
+            data = f.read()
+        valid = 0
+        for _, _, payload_end in _scan(data, 0, len(data)):
+            valid = payload_end
+        if valid < len(data):
+            logger.warning(f"Event log {path}: truncating {len(data) - valid} bytes of torn tail")
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+                os.fsync(f.fileno())
+        return valid
+
+    @property
+    def end_offset(self) -> int:
+        """Offset the next record will be written at."""
+        return self._base + self._size
+
+    def append(self, payload: bytes) -> int:
+        """Append one record; returns its offset. Durable after the next fsync."""
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._closed:
+                raise ValueError("Event log is closed")
+            if self._size and self._size + len(record) > self.segment_bytes:
+                self._rotate()
+            offset = self._base + self._size
+            self._file.write(record)
+            self._size += len(record)
+            self._dirty = True
+            self.appended += 1
+            return offset
+
+    def append_event(self, event) -> int:
+        """Append an events.Event using its cached JSON form."""
+        return self.append(event.to_json().encode())
+
+    def _rotate(self):
+        self._sync_locked()
+        self._file.close()
+        self._base += self._size
+        self._size = 0
+        self.segments.append(self._base)
+        self._file = open(self._path(self._base), 'ab')
+        logger.info(f"Event log rotated to segment {segment_name(self._base)}")
+
+    def _sync_locked(self):
+        self._file.flush()
+        if self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self.fsyncs += 1
+
+    def sync(self):
+        """Flush and fsync the active segment now."""
+        with self._lock:
+            if not self._closed:
+                self._sync_locked()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval_s):
+            try:
+                self.sync()
+            except OSError as e:
+                logger.error(f"Event log fsync failed: {e}")
+
+    def replay(self, offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (offset, payload) for every record at or after `offset`, which
+        must be a record boundary (0, or an offset returned by append/read).
+        Records appended while iterating may or may not be included.
+        """
+        with self._lock:
+            self._file.flush()  # make buffered records visible to mmap
+            segments = list(self.segments)
+            end = self.end_offset
+        for i, base in enumerate(segments):
+            limit = segments[i + 1] if i + 1 < len(segments) else end
+            if limit <= offset:
+                continue
+            yield from self._replay_segment(base, max(0, offset - base), limit - base)
+
+    def _replay_segment(self, base: int, start: int, length: int) -> Iterator[Tuple[int, bytes]]:
+        if length <= 0:
+            return
+        with open(self._path(base), 'rb') as f:
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as view:
+                for pos, payload_start, payload_end in _scan(view, start, length):
+                    yield base + pos, view[payload_start:payload_end]
+
+    def replay_events(self, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Replay decoded events as (offset, event dict)."""
+        for record_offset, payload in self.replay(offset):
+            yield record_offset, json.loads(payload)
+
+    def read(self, offset: int = 0, limit: int = 500) -> Tuple[List[Dict[str, Any]], int]:
+        """A page of decoded events from `offset` plus the offset to continue from."""
+        events = []
+        next_offset = offset
+        for record_offset, payload in self.replay(offset):
+            if len(events) >= limit:
+                break
+            events.append(json.loads(payload))
+            next_offset = record_offset + HEADER.size + len(payload)
+        return events, next_offset
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if not self._closed:
+                self._sync_locked()
+                self._file.close()
+                self._closed = True
@@ -6,10 +6,10 @@ Central event publisher/subscriber for all demo components.
 import asyncio
 import json
 import logging
-from dataclasses import dataclass, field, asdict
-from typing import Callable, List, Dict, Any, Type
-from datetime import datetime
-from collections import deque
+import threading
+import time
+from typing import Callable, Deque, List, Dict, Any, Optional, Tuple, Type, Union
+from collections import OrderedDict, deque
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -31,99 +31,274 @@ class EventType(Enum):
     HEARTBEAT = "heartbeat"
 
 
-@dataclass
 class Event:
-    """Base event class."""
-    type: EventType
-    timestamp: float = field(default_factory=lambda: datetime.utcnow().timestamp())
-    session_id: str = ""
+    """
+    Base event class.
+
+    Events use __slots__ (no per-instance __dict__) and are treated as
+    immutable once created: to_json() serializes at most once and caches
+    the string. Subclasses fix `event_type` and list their payload fields
+    with defaults in `_defaults`.
+    """
+    __slots__ = ('type', 'timestamp', 'session_id', '_json')
+    event_type: Optional[EventType] = None
+    _defaults: Dict[str, Any] = {}
     
-    def to_json(self) -> str:
-        """Serialize to JSON for WebSocket transmission."""
-        return json.dumps({
+    def __init__(self, type: Optional[EventType] = None, timestamp: Optional[float] = None,
+                 session_id: str = "", **data):
+        self.type = self.event_type or type
+        if self.type is None:
+            raise TypeError("Event requires a type")
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.session_id = session_id
+        self._json: Optional[str] = None
+        for name, default in self._defaults.items():
+            setattr(self, name, data.pop(name, default))
+        if data:
+            raise TypeError(f"{self.__class__.__name__} "
+                            f"got unexpected fields: {', '.join(data)}")
+    
+    def data(self) -> Dict[str, Any]:
+        """Payload fields (everything except type/timestamp/session_id)."""
+        return {name: getattr(self, name) for name in self._defaults}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
             'type': self.type.value,
             'timestamp': self.timestamp,
             'session_id': self.session_id,
-            'data': {k: v for k, v in asdict(self).items() 
-                    if k not in ['type', 'timestamp', 'session_id']}
-        })
+            'data': self.data(),
+        }
+    
+    def to_json(self) -> str:
+        """Serialize to JSON for WebSocket transmission (cached)."""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict())
+        return self._json
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.type, self.timestamp, self.session_id, self.data()) == \
+            (other.type, other.timestamp, other.session_id, other.data())
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        fields = ', '.join(f"{k}={v!r}" for k, v in self.data().items())
+        return (f"{self.__class__.__name__}(type={self.type}, timestamp={self.timestamp!r}, "
+                f"session_id={self.session_id!r}{', ' + fields if fields else ''})")
 
 
-@dataclass
 class StationOnlineEvent(Event):
     """Station joined network."""
-    station_id: str = ""
-    
-    def __post_init__(self):
-        self.type = EventType.STATION_ONLINE
+    __slots__ = ('station_id',)
+    event_type = EventType.STATION_ONLINE
+    _defaults = {'station_id': ""}
 
 
-@dataclass
 class StationOfflineEvent(Event):
     """Station left or lost connection."""
-    station_id: str = ""
-    
-    def __post_init__(self):
-        self.type = EventType.STATION_OFFLINE
+    __slots__ = ('station_id',)
+    event_type = EventType.STATION_OFFLINE
+    _defaults = {'station_id': ""}
 
 
-@dataclass
 class StationLockedEvent(Event):
     """Station locked on a track."""
-    station_id: str = ""
-    track_id: int = 0
-    
-    def __post_init__(self):
-        self.type = EventType.STATION_LOCKED
+    __slots__ = ('station_id', 'track_id')
+    event_type = EventType.STATION_LOCKED
+    _defaults = {'station_id': "", 'track_id': 0}
 
 
-@dataclass
 class MatchedEvent(Event):
     """Both stations matched on same track."""
-    track_id: int = 0
-    sync_time_ms: int = 0
-    
-    def __post_init__(self):
-        self.type = EventType.MATCHED
+    __slots__ = ('track_id', 'sync_time_ms')
+    event_type = EventType.MATCHED
+    _defaults = {'track_id': 0, 'sync_time_ms': 0}
 
 
-@dataclass
 class MismatchEvent(Event):
     """Stations locked on different tracks."""
-    station_a_track: int = 0
-    station_b_track: int = 0
-    
-    def __post_init__(self):
-        self.type = EventType.MISMATCH
+    __slots__ = ('station_a_track', 'station_b_track')
+    event_type = EventType.MISMATCH
+    _defaults = {'station_a_track': 0, 'station_b_track': 0}
 
 
-@dataclass
 class SessionTimeoutEvent(Event):
     """Session timer expired."""
-    duration_ms: int = 0
-    
-    def __post_init__(self):
-        self.type = EventType.SESSION_TIMEOUT
+    __slots__ = ('duration_ms',)
+    event_type = EventType.SESSION_TIMEOUT
+    _defaults = {'duration_ms': 0}
 
 
-@dataclass
 class AudioStartedEvent(Event):
     """Audio bridging started."""
-    audio_device_a: int = 0
-    audio_device_b: int = 0
-    
-    def __post_init__(self):
-        self.type = EventType.AUDIO_STARTED
+    __slots__ = ('audio_device_a', 'audio_device_b')
+    event_type = EventType.AUDIO_STARTED
+    _defaults = {'audio_device_a': 0, 'audio_device_b': 0}
 
 
-@dataclass
 class StateChangedEvent(Event):
     """Demo state machine changed state."""
-    old_state: str = ""
-    new_state: str = ""
+    __slots__ = ('old_state', 'new_state')
+    event_type = EventType.STATE_CHANGED
+    _defaults = {'old_state': "", 'new_state': ""}
+
+
+class SystemErrorEvent(Event):
+    """Component failure or fault the system recovered from."""
+    __slots__ = ('error', 'station_id', 'details')
+    event_type = EventType.SYSTEM_ERROR
+    _defaults = {'error': "", 'station_id': "", 'details': ""}
+
+
+class OverflowPolicy(Enum):
+    """What a subscriber queue does when it is full."""
+    BLOCK = "block"              # publisher waits for room (backpressure)
+    DROP_OLDEST = "drop_oldest"  # discard the oldest pending event
+    COALESCE = "coalesce"        # keep only the latest event per (type, session)
+
+
+# Index key of a subscription: (event type, session_id, station_id), None = any
+SubscriptionKey = Tuple[Optional[EventType], Optional[str], Optional[str]]
+
+
+class Subscription:
+    """
+    One subscriber with its own bounded queue and consumer task.
+    A slow callback only delays its own queue, never other subscribers.
+    """
     
-    def __post_init__(self):
-        self.type = EventType.STATE_CHANGED
+    def __init__(self, event_type: Optional[EventType], callback: Callable, maxsize: int = 256,
+                 overflow: OverflowPolicy = OverflowPolicy.BLOCK, name: Optional[str] = None,
+                 session_id: Optional[str] = None, station_id: Optional[str] = None,
+                 predicate: Optional[Callable[[Event], bool]] = None):
+        self.event_type = event_type
+        self.session_id = session_id
+        self.station_id = station_id
+        self.predicate = predicate
+        self.callback = callback
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.name = name or getattr(callback, '__qualname__', repr(callback))
+        self.is_coroutine = asyncio.iscoroutinefunction(callback)
+        
+        # (enqueued_at, event); keyed by (type, session_id) when coalescing
+        self.pending: Union[Deque[Tuple[float, Event]], 'OrderedDict[Tuple, Tuple[float, Event]]'] = (
+            OrderedDict() if overflow == OverflowPolicy.COALESCE else deque())
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.busy = False
+        
+        # Metrics
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_lag_s = 0.0
+        self.max_lag_s = 0.0
+        self.total_lag_s = 0.0
+    
+    @property
+    def key(self) -> SubscriptionKey:
+        return (self.event_type, self.session_id, self.station_id)
+    
+    def _start(self):
+        """(Re)start the consumer on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self.task is not None and not self.task.done() and self.loop is loop:
+            return
+        self.loop = loop
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.idle = asyncio.Event()
+        if self.pending:
+            self.not_empty.set()
+        else:
+            self.idle.set()
+        self.task = loop.create_task(self._consume())
+    
+    def _pop(self) -> Tuple[float, Event]:
+        if isinstance(self.pending, OrderedDict):
+            return self.pending.popitem(last=False)[1]
+        return self.pending.popleft()
+    
+    async def offer(self, event: Event):
+        """Enqueue an event, applying the overflow policy when full."""
+        self._start()
+        entry = (time.monotonic(), event)
+        if isinstance(self.pending, OrderedDict):
+            key = (event.type, event.session_id)
+            if key in self.pending:
+                self.pending[key] = entry  # replaced in place, keeps its position
+                self.coalesced += 1
+                return
+            if len(self.pending) >= self.maxsize:
+                self._pop()
+                self.dropped += 1
+            self.pending[key] = entry
+        else:
+            if len(self.pending) >= self.maxsize:
+                if self.overflow == OverflowPolicy.BLOCK:
+                    while len(self.pending) >= self.maxsize:
+                        self.not_full.clear()
+                        await self.not_full.wait()
+                else:
+                    self.pending.popleft()
+                    self.dropped += 1
+            self.pending.append(entry)
+        self.idle.clear()
+        self.not_empty.set()
+    
+    async def _consume(self):
+        while True:
+            if not self.pending:
+                self.idle.set()
+                self.not_empty.clear()
+                await self.not_empty.wait()
+                continue
+            enqueued_at, event = self._pop()
+            self.not_full.set()
+            
+            lag = time.monotonic() - enqueued_at
+            self.last_lag_s = lag
+            self.max_lag_s = max(self.max_lag_s, lag)
+            self.total_lag_s += lag
+            try:
+                if self.is_coroutine:
+                    await self.callback(event)
+                else:
+                    self.callback(event)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Subscriber {self.name} failed on {event.type.value}: {e}")
+            self.delivered += 1
+    
+    async def join(self):
+        """Wait until every queued event has been handled."""
+        if self.task is not None and not self.task.done():
+            await self.idle.wait()
+    
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'event_type': self.event_type.value if self.event_type else '*',
+            'session_id': self.session_id,
+            'station_id': self.station_id,
+            'overflow': self.overflow.value,
+            'queued': len(self.pending),
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'last_lag_ms': self.last_lag_s * 1000,
+            'max_lag_ms': self.max_lag_s * 1000,
+            'avg_lag_ms': self.total_lag_s * 1000 / max(self.delivered, 1),
+        }
 
 
 class EventBus:
@@ -131,39 +306,178 @@ class EventBus:
     Central event bus with asyncio support.
     Allows components to publish events and subscribers to listen.
     Maintains event history for late-joining connections.
+    
+    Each subscriber gets its own bounded queue and consumer task, so publish
+    only enqueues: a slow subscriber delays itself, not the others.
+    
+    Subscriptions are indexed by (type, session_id, station_id) with None as
+    a wildcard, so publish looks up at most 8 keys and only touches the
+    subscribers that match instead of filtering every subscriber.
     """
     
     def __init__(self, max_history=100):
-        self.subscribers: Dict[EventType, List[Callable]] = {}
+        self.subscribers: Dict[SubscriptionKey, List[Subscription]] = {}
+        self._session_subscriptions = 0
+        self._station_subscriptions = 0
         self.event_history = deque(maxlen=max_history)
-        self.lock = asyncio.Lock()
+        self.event_log = None  # optional event_log.EventLog for full history
+        
+        # Thread-safe entry point: events from plain threads are batched here
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Deque[Event] = deque()
+        self._pending_lock = threading.Lock()
+        self._wakeup_scheduled = False
+        self._pump_task: Optional[asyncio.Task] = None
+        self._owns_loop = False
+        self.threadsafe_batches = 0
+        self.threadsafe_events = 0
+    
+    def attach_log(self, event_log):
+        """Persist every published event to an on-disk EventLog."""
+        self.event_log = event_log
+    
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Set the loop that publish_threadsafe() delivers into."""
+        self.loop = loop
     
-    def subscribe(self, event_type: EventType, callback: Callable):
-        """Subscribe to an event type."""
-        if event_type not in self.subscribers:
-            self.subscribers[event_type] = []
-        self.subscribers[event_type].append(callback)
-        logger.info(f"Subscriber registered for {event_type.value}")
+    def start_in_thread(self) -> asyncio.AbstractEventLoop:
+        """Run a dedicated event loop in a daemon thread and bind to it."""
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="event-bus", daemon=True).start()
+        self.bind_loop(loop)
+        self._owns_loop = True
+        return loop
     
-    def unsubscribe(self, event_type: EventType, callback: Callable):
-        """Unsubscribe from an event type."""
-        if event_type in self.subscribers:
-            self.subscribers[event_type].remove(callback)
+    async def close(self):
+        """Cancel the pump and every consumer task, and wait for them to exit."""
+        tasks = [s.task for subs in self.subscribers.values() for s in subs
+                 if s.task is not None and not s.task.done()]
+        if self._pump_task is not None and not self._pump_task.done():
+            tasks.append(self._pump_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pump_task = None
+        with self._pending_lock:
+            self._wakeup_scheduled = False
+    
+    def stop(self, timeout: float = 5.0):
+        """Close the bus from outside its loop; stops the loop if start_in_thread() made it."""
+        loop = self.loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self.close(), loop).result(timeout)
+        if self._owns_loop:
+            loop.call_soon_threadsafe(loop.stop)
+            self.loop = None
+            self._owns_loop = False
+    
+    def publish_threadsafe(self, event: Event):
+        """
+        Publish from any thread. Events are queued and handed to the loop in
+        batches: one call_soon_threadsafe wakeup per batch, not per event.
+        Order is preserved (globally, hence per producer).
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("EventBus has no loop; call bind_loop() or start_in_thread() first")
+        with self._pending_lock:
+            self._pending.append(event)
+            if self._wakeup_scheduled:
+                return  # the running pump will pick it up
+            self._wakeup_scheduled = True
+        loop.call_soon_threadsafe(self._on_wakeup)
+    
+    def _on_wakeup(self):
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.get_running_loop().create_task(self._pump())
+    
+    async def _pump(self):
+        while True:
+            with self._pending_lock:
+                if not self._pending:
+                    self._wakeup_scheduled = False
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+            self.threadsafe_batches += 1
+            self.threadsafe_events += len(batch)
+            for event in batch:
+                await self.publish(event)
+    
+    def subscribe(self, event_type: Optional[EventType], callback: Callable, maxsize: int = 256,
+                  overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+                  name: Optional[str] = None, session_id: Optional[str] = None,
+                  station_id: Optional[str] = None,
+                  predicate: Optional[Callable[[Event], bool]] = None) -> Subscription:
+        """
+        Subscribe with a bounded queue and overflow policy.
+        
+        event_type=None subscribes to every type. session_id / station_id
+        restrict delivery to one session or station through the index;
+        `predicate` is an extra check run only on indexed matches.
+        """
+        subscription = Subscription(event_type, callback, maxsize, overflow, name,
+                                    session_id, station_id, predicate)
+        self.subscribers.setdefault(subscription.key, []).append(subscription)
+        self._session_subscriptions += session_id is not None
+        self._station_subscriptions += station_id is not None
+        logger.info(f"Subscriber registered for {event_type.value if event_type else '*'}")
+        return subscription
+    
+    def unsubscribe(self, event_type: Optional[EventType], callback: Callable,
+                    session_id: Optional[str] = None, station_id: Optional[str] = None):
+        """Unsubscribe a callback registered with the same type and filters."""
+        key = (event_type, session_id, station_id)
+        for subscription in self.subscribers.get(key, []):
+            if subscription.callback == callback:
+                subscription.cancel()
+                self.subscribers[key].remove(subscription)
+                if not self.subscribers[key]:
+                    del self.subscribers[key]
+                self._session_subscriptions -= session_id is not None
+                self._station_subscriptions -= station_id is not None
+                return
+    
+    def matching(self, event: Event) -> List[Subscription]:
+        """Subscriptions an event is delivered to."""
+        types = (event.type, None)
+        sessions = ((event.session_id, None) if event.session_id and self._session_subscriptions
+                    else (None,))
+        station_id = getattr(event, 'station_id', None)
+        stations = (station_id, None) if station_id and self._station_subscriptions else (None,)
+        
+        matched = []
+        for event_type in types:
+            for session_id in sessions:
+                for station in stations:
+                    for subscription in self.subscribers.get((event_type, session_id, station), ()):
+                        if subscription.predicate is None or subscription.predicate(event):
+                            matched.append(subscription)
+        return matched
     
     async def publish(self, event: Event):
-        """Publish an event to all subscribers."""
-        async with self.lock:
-            # Store in history
-            self.event_history.append(event)
-            logger.debug(f"Event published: {event.type.value}")
-            
-            # Notify subscribers
-            if event.type in self.subscribers:
-                for callback in self.subscribers[event.type]:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(event)
-                    else:
-                        callback(event)
+        """Publish an event to all subscribers (from the loop; see publish_threadsafe)."""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        # History is appended before, not inside, the fan-out
+        self.event_history.append(event)
+        if self.event_log is not None:
+            self.event_log.append_event(event)
+        logger.debug(f"Event published: {event.type.value}")
+        
+        for subscription in self.matching(event):
+            await subscription.offer(event)
+    
+    async def drain(self):
+        """Wait until every subscriber has handled everything queued so far."""
+        for subscriptions in list(self.subscribers.values()):
+            for subscription in subscriptions:
+                await subscription.join()
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-subscriber queue, lag and drop metrics."""
+        return {s.name: s.stats() for subs in self.subscribers.values() for s in subs}
     
     async def publish_broadcast(self, event: Event, broadcast_fn: Callable):
         """Publish event and broadcast via WebSocket."""
@@ -172,31 +486,31 @@ class EventBus:
     
     def get_history(self) -> List[Dict[str, Any]]:
         """Get event history as list of dicts."""
-        return [json.loads(e.to_json()) for e in self.event_history]
+        return [e.to_dict() for e in self.event_history]
     
     def get_history_json(self) -> str:
-        """Get event history as JSON string."""
-        return json.dumps(self.get_history())
+        """Get event history as JSON string, reusing each event's cached JSON."""
+        return '[' + ', '.join(e.to_json() for e in self.event_history) + ']'
 
 
 # Global event bus instance
 event_bus = EventBus()
 
 
+_EVENT_CLASSES: Dict[EventType, Type[Event]] = {
+    cls.event_type: cls for cls in (
+        StationOnlineEvent, StationOfflineEvent, StationLockedEvent, MatchedEvent,
+        MismatchEvent, SessionTimeoutEvent, AudioStartedEvent, StateChangedEvent,
+        SystemErrorEvent,
+    )
+}
+
+
 def create_event(event_type: EventType, **kwargs) -> Event:
     """Factory function to create typed events."""
-    event_class_map = {
-        EventType.STATION_ONLINE: StationOnlineEvent,
-        EventType.STATION_OFFLINE: StationOfflineEvent,
-        EventType.STATION_LOCKED: StationLockedEvent,
-        EventType.MATCHED: MatchedEvent,
-        EventType.MISMATCH: MismatchEvent,
-        EventType.SESSION_TIMEOUT: SessionTimeoutEvent,
-        EventType.AUDIO_STARTED: AudioStartedEvent,
-        EventType.STATE_CHANGED: StateChangedEvent,
-    }
-    
-    event_class = event_class_map.get(event_type, Event)
+    event_class = _EVENT_CLASSES.get(event_type)
+    if event_class is None:
+        return Event(event_type, **kwargs)
     return event_class(**kwargs)
 
 
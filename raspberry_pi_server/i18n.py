@@ -3,36 +3,99 @@ Internationalization (i18n) setup for Blind Date.
 Supports 6 languages: EN, ES, FR, DE, JA, HI
 """
 
-from flask_babel import Babel, lazy_gettext
+import glob
+import hashlib
+import logging
+import os
+from functools import lru_cache
+
+from babel.messages.mofile import write_mo
+from babel.messages.pofile import read_po
 from flask import request
+from flask_babel import Babel, force_locale, get_translations, lazy_gettext
+from werkzeug.datastructures import LanguageAccept
+from werkzeug.http import parse_accept_header
+
+logger = logging.getLogger(__name__)
+
+TRANSLATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translations')
+
+# Supported languages
+LANGUAGES = {
+    'en': 'English',
+    'es': 'Español',
+    'fr': 'Français',
+    'de': 'Deutsch',
+    'ja': '日本語',
+    'hi': 'हिन्दी'
+}
 
 babel = None
 
+def _po_files(translations_dir: str):
+    return sorted(glob.glob(os.path.join(translations_dir, '*', 'LC_MESSAGES', '*.po')))
+
+def catalog_version(translations_dir: str = TRANSLATIONS_DIR) -> str:
+    """Fingerprint of the .po catalogs; changes whenever any catalog is edited."""
+    digest = hashlib.sha1()
+    for po_path in _po_files(translations_dir):
+        stat = os.stat(po_path)
+        digest.update(f"{po_path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()[:12]
+
+def compile_catalogs(translations_dir: str = TRANSLATIONS_DIR) -> int:
+    """Compile .po catalogs whose .mo is missing or older. Returns count compiled."""
+    compiled = 0
+    for po_path in _po_files(translations_dir):
+        mo_path = po_path[:-3] + '.mo'
+        if os.path.exists(mo_path) and os.path.getmtime(mo_path) >= os.path.getmtime(po_path):
+            continue
+        with open(po_path, 'rb') as po_file:
+            catalog = read_po(po_file)
+        with open(mo_path, 'wb') as mo_file:
+            write_mo(mo_file, catalog)
+        compiled += 1
+    if compiled:
+        logger.info(f"Compiled {compiled} translation catalogs")
+    return compiled
+
+def preload_translations(app):
+    """Load every catalog into Flask-Babel's cache so requests never touch disk."""
+    with app.test_request_context():
+        for lang in LANGUAGES:
+            with force_locale(lang):
+                get_translations()
+
+def reload_catalogs(app):
+    """Recompile changed catalogs and replace the cached translations."""
+    compile_catalogs()
+    app.extensions['babel'].instance.domain_instance.cache.clear()
+    preload_translations(app)
+
+@lru_cache(maxsize=256)
+def _best_language(accept_language: str) -> str:
+    accepted = parse_accept_header(accept_language, LanguageAccept)
+    return accepted.best_match(LANGUAGES.keys()) or 'en'
+
+def get_locale():
+    # Priority: URL parameter > Accept-Language header > default (en)
+    lang = request.args.get('lang')
+    if lang in LANGUAGES:
+        return lang
+
+    # Accept-Language header, parsed once per distinct header value
+    return _best_language(request.headers.get('Accept-Language', ''))
+
 def init_i18n(app):
     """Initialize Flask-Babel with supported locales."""
     global babel
-    babel = Babel(app)
-    
-    # Supported languages
-    app.config['LANGUAGES'] = {
-        'en': 'English',
-        'es': 'Español',
-        'fr': 'Français',
-        'de': 'Deutsch',
-        'ja': '日本語',
-        'hi': 'हिन्दी'
-    }
-    
-    @babel.localeselector
-    def get_locale():
-        # Priority: URL parameter > Accept-Language header > default (en)
-        if 'lang' in request.args:
-            lang = request.args.get('lang')
-            if lang in app.config['LANGUAGES']:
-                return lang
-        
-        # Accept-Language header
-        return request.accept_languages.best_match(app.config['LANGUAGES'].keys()) or 'en'
+    app.config['LANGUAGES'] = LANGUAGES
+    app.config['BABEL_TRANSLATION_DIRECTORIES'] = TRANSLATIONS_DIR
+
+    # Compile and load all catalogs once at startup
+    compile_catalogs()
+    babel = Babel(app, locale_selector=get_locale)
+    preload_translations(app)
 
 # String catalog for translation
 UI_STRINGS = {
@@ -0,0 +1,168 @@
+"""
+Bridge path latency probe (bridge path + reported device latency).
+
+A short logarithmic chirp is mixed into one station's captured audio at the
+bridge's capture tap, stamped with the ADC time of the block it entered in.
+The other station's bridged output is recorded at the playback tap, stamped
+with the DAC time of the first recorded block. FFT cross-correlation finds
+the chirp in the recording, so
+
+    latency = first DAC time + peak offset / rate - chirp ADC time
+
+The chirp never leaves the digital domain: the bridge path (taps, jitter
+buffer) is measured, while the ADC and DAC legs are the buffer timestamps
+PortAudio reports for the devices. It is not an acoustic mouth-to-ear
+figure; converter delays a driver does not report and the air path are not
+included. Results are kept per direction (probe_bridge_path_<src>_to_<dst>_ms
+histograms and exact percentiles/jitter over recent runs). A probe whose
+correlation peak is too weak is counted as lost.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+from bridge import LATENCY_BUCKETS_MS, PEER, ROLES
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def make_chirp(samplerate: int, duration_s: float = 0.1, f0: float = 300.0, f1: float = 3400.0,
+               level: float = 0.25) -> np.ndarray:
+    """Hann-windowed logarithmic sweep, kept inside the voice band."""
+    n = int(samplerate * duration_s)
+    t = np.arange(n) / samplerate
+    k = np.log(f1 / f0) / duration_s
+    phase = 2 * np.pi * f0 * (np.exp(k * t) - 1) / k
+    return (level * np.sin(phase) * np.hanning(n)).astype(np.float32)
+
+
+def find_delay(recording: np.ndarray, reference: np.ndarray):
+    """(offset of reference in recording, normalized correlation at that offset)."""
+    size = 1 << int(len(recording) + len(reference) - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(recording, size) * np.conj(np.fft.rfft(reference, size)), size)
+    corr = corr[:len(recording) - len(reference) + 1]
+    offset = int(np.argmax(corr))
+    segment = recording[offset:offset + len(reference)]
+    score = corr[offset] / (np.linalg.norm(reference) * np.linalg.norm(segment) + 1e-12)
+    return offset, float(score)
+
+
+class LatencyProbe:
+    """Per-direction chirp probe of bridge path + reported device latency through a DuplexBridge."""
+
+    def __init__(self, bridge, chirp_s: float = 0.1, level: float = 0.25, max_latency_s: float = 0.5,
+                 min_score: float = 0.5, history: int = 200):
+        self.bridge = bridge
+        self.chirp_s = chirp_s
+        self.level = level
+        self.max_latency_s = max_latency_s
+        self._allocate()
+        self.min_score = min_score
+        self.results: Dict[str, Deque[float]] = {role: deque(maxlen=history) for role in ROLES}
+        self.lost = {role: 0 for role in ROLES}
+        self.histograms = {role: metrics.histogram(f'probe_bridge_path_{role}_to_{PEER[role]}_ms',
+                                                   LATENCY_BUCKETS_MS) for role in ROLES}
+        self.lock = threading.Lock()  # one measurement at a time
+        self._done = threading.Event()
+        self._inject_pos = 0
+        self._inject_time = 0.0
+        self._record_pos = 0
+        self._record_start = 0.0
+
+    def _allocate(self):
+        """Chirp and buffers for the bridge's current rate and block size."""
+        bridge = self.bridge
+        self.samplerate = bridge.samplerate
+        self.blocksize = bridge.blocksize
+        self.chirp = make_chirp(self.samplerate, self.chirp_s, level=self.level)
+        self.window = len(self.chirp) + int(self.max_latency_s * self.samplerate)
+        self.recording = np.zeros((self.window + bridge.blocksize, bridge.channels), dtype=np.float32)
+        self.scratch = np.zeros((bridge.blocksize, bridge.channels), dtype=np.float32)
+
+    def _inject(self, src: str):
+        def tap(indata, time_info):
+            pos = self._inject_pos
+            if pos == 0:
+                self._inject_time = time_info.inputBufferAdcTime
+            frames = len(indata)
+            n = min(frames, len(self.chirp) - pos)
+            block = self.scratch[:frames]
+            block[:] = indata
+            block[:n] += self.chirp[pos:pos + n, None]
+            self._inject_pos = pos + n
+            if self._inject_pos >= len(self.chirp):
+                self.bridge.capture_taps[src] = None
+            return block
+        return tap
+
+    def _record(self, dst: str):
+        def tap(outdata, time_info):
+            pos = self._record_pos
+            if pos == 0:
+                self._record_start = time_info.outputBufferDacTime
+            n = min(len(outdata), self.window - pos)
+            self.recording[pos:pos + n] = outdata[:n]
+            self._record_pos = pos + n
+            if self._record_pos >= self.window:
+                self.bridge.playback_taps[dst] = None
+                self._done.set()
+        return tap
+
+    def measure(self, src: str, timeout_s: float = 2.0,
+                advance: Optional[Callable[[float], Any]] = None) -> Optional[float]:
+        """
+        Bridge path + reported device latency in ms from station src to its
+        peer, or None if the chirp was not found. advance(seconds) drives a simulated clock instead of waiting.
+        """
+        dst = PEER[src]
+        with self.lock:
+            if not self.bridge.connected:
+                raise RuntimeError("Latency probe needs a connected bridge")
+            if (self.samplerate, self.blocksize) != (self.bridge.samplerate, self.bridge.blocksize):
+                self._allocate()  # bridge was reconfigured (autotune)
+            self._done.clear()
+            self._inject_pos = self._record_pos = 0
+            # Record first: the recording must start no later than the chirp
+            self.bridge.playback_taps[dst] = self._record(dst)
+            self.bridge.capture_taps[src] = self._inject(src)
+            if advance is not None:
+                advance(self.window / self.samplerate + 0.05)
+            completed = self._done.wait(0 if advance is not None else timeout_s)
+            if not completed or self._inject_pos < len(self.chirp):
+                self.bridge.capture_taps[src] = None
+                self.bridge.playback_taps[dst] = None
+                self.lost[src] += 1
+                logger.warning(f"Latency probe {src}->{dst}: timed out")
+                return None
+            offset, score = find_delay(self.recording[:self.window, 0], self.chirp)
+            if score < self.min_score:
+                self.lost[src] += 1
+                logger.warning(f"Latency probe {src}->{dst}: chirp not found (score {score:.2f})")
+                return None
+            latency_ms = (self._record_start + offset / self.samplerate - self._inject_time) * 1000
+            self.results[src].append(latency_ms)
+            self.histograms[src].observe(latency_ms)
+            return latency_ms
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency distribution and jitter per direction over recent probes."""
+        summary = {}
+        for src in ROLES:
+            samples = np.array(self.results[src])
+            entry: Dict[str, Any] = {'count': len(samples), 'lost': self.lost[src]}
+            if len(samples):
+                entry.update({
+                    'last_ms': round(float(samples[-1]), 2),
+                    'min_ms': round(float(samples.min()), 2),
+                    'p50_ms': round(float(np.percentile(samples, 50)), 2),
+                    'p95_ms': round(float(np.percentile(samples, 95)), 2),
+                    'max_ms': round(float(samples.max()), 2),
+                    'jitter_ms': round(float(samples.std()), 2),
+                })
+            summary[f'{src}->{PEER[src]}'] = entry
+        return summary
@@ -2,6 +2,9 @@ try:
     import yaml
 except ImportError:
     raise ImportError("PyYAML required: pip install PyYAML")
+import atexit
+import signal
+import sys
 import threading
 import time
 import os
@@ -11,7 +14,17 @@ from typing import Optional
 from mqtt_handler import MQTTHandler
 from matcher import Matcher
 from audio import AudioHandler
-from dashboard.app import app, socketio, update_state, add_event
+from dashboard.app import (app, socketio, update_state, add_event, attach_fanout, attach_recovery,
+                           attach_store, attach_tournament)
+from dashboard.fanout import FanoutPublisher, start_workers
+from metrics import metrics
+from events import event_bus, create_event, EventType
+from event_log import EventLog
+from db import create_db_engine, create_session_factory
+from resilience import PartitionHandler, SessionRecovery
+from router import AudioRouter
+from storage import MatchStore
+from tournament import TournamentBracket, TournamentRound
 
 class LockPayload(BaseModel):
     station: str
@@ -46,29 +59,124 @@ def on_mqtt_message(topic: str, payload: dict):
 
     if topic == 'blinddate/lock':
         matcher.handle_lock(validated.station, validated.track, validated.timestamp)
+        partition.handle_split_brain(validated.station, validated.track)
+        event_bus.publish_threadsafe(create_event(
+            EventType.STATION_LOCKED, station_id=validated.station, track_id=validated.track))
     elif topic == 'blinddate/heartbeat':
         # Handle heartbeat
         add_event('heartbeat', {'station': validated.station})
+        store.record_station(validated.station, 'online')
+        event_bus.publish_threadsafe(create_event(EventType.HEARTBEAT))
 
 def on_matcher_event(event: str, data: dict):
     if event == 'matched':
         audio.play_success_and_bridge()
+        # Stations do not report a sync time yet; None is kept out of sync_times
+        metrics.record_match('A', 'B', None, data['track'])
+        session_id = store.record_session('A', 'B', 'matched', track=data['track'])
+        store.record_match(session_id, 'A', 'B', data['track'])
+        update_state({'sync_count': len(metrics.matches)})
         add_event('matched', data)
+        event_bus.publish_threadsafe(create_event(EventType.MATCHED, track_id=data['track']))
     elif event == 'state_change':
         update_state({'current_state': data['state']})
         add_event('state_change', data)
+        event_bus.publish_threadsafe(create_event(EventType.STATE_CHANGED, new_state=data['state']))
+    elif event == 'mismatch':
+        audio.play_cue('mismatch')
+        store.record_session('A', 'B', 'mismatch')
+    elif event == 'timeout':
+        audio.play_cue('timeout')
     elif event == 'reset':
         audio.stop_bridging()
+        partition.reset()
         add_event('reset', {})
+    elif event == 'released':
+        add_event('released', data)
+
+def on_partition(station: str, track: int):
+    # The other station never locked: free this one instead of waiting for a manual reset
+    matcher.release_station(station)
+    metrics.record_error('split_brain', f"Station {station} stranded on track {track}")
+    event_bus.publish_threadsafe(create_event(
+        EventType.SYSTEM_ERROR, error='split_brain', station_id=station,
+        details=f"Released station {station} after {partition.timeout_s}s without a partner lock"))
 
 if __name__ == "__main__":
     config = load_config()
     
+    # Shared event pipeline; threaded components publish via publish_threadsafe
+    event_bus.start_in_thread()
+    log_config = config.get('event_log')
+    if log_config:
+        event_log = EventLog(log_config['directory'],
+                             segment_bytes=log_config.get('segment_mb', 16) * 1024 * 1024,
+                             fsync_interval_s=log_config.get('fsync_interval_s', 0.5))
+        event_bus.attach_log(event_log)
+        atexit.register(event_log.close)  # flush and fsync the tail on shutdown
+    atexit.register(event_bus.stop)  # runs before event_log.close: consumers exit first
+    
     # Initialize components
     mqtt_handler = MQTTHandler(config, on_mqtt_message)
     matcher = Matcher(config, on_matcher_event)
+    partition = PartitionHandler(timeout_s=config['session'].get('partition_timeout', 15),
+                                 on_partition=on_partition)
     audio = AudioHandler(config)
     
+    # Tournament mode: each configured station gets its own stream, and the
+    # router connects the pairs of the bracket's unfinished matches
+    stations = config['audio'].get('stations') or {}
+    bracket = router = None
+    if stations:
+        bracket = TournamentBracket(len(stations))
+        if sorted(stations) != sorted(bracket.stations):
+            raise ValueError(f"audio.stations must be keyed {', '.join(bracket.stations)}")
+        router = AudioRouter(audio.devices, stations, audio.sd, samplerate=audio.rate,
+                             blocksize=audio.chunk)
+        attach_tournament(bracket)
+        atexit.register(router.stop)
+    
+    # Crash recovery: restore the last checkpoint, then checkpoint write-behind
+    engine = create_db_engine()
+    recovery = SessionRecovery(create_session_factory(engine))
+    recovery.register('matcher', matcher.snapshot, matcher.restore, lambda: matcher.version)
+    attach_recovery(recovery)
+    recovery.restore_all()
+    recovery.start()
+    atexit.register(recovery.stop)
+    
+    # Match/session history, written in batches off the MQTT thread
+    store = MatchStore(engine)
+    store.start()
+    atexit.register(store.stop)
+    attach_store(store)
+    
+    routed_version = None
+    
+    def follow_bracket():
+        # Store and route the bracket; a routing failure must not take down the
+        # server or the timeout checker
+        global routed_version
+        routed_version = bracket.version
+        for match in bracket.matches:
+            store.record_bracket_match(match)  # latest status per match wins
+        try:
+            router.sync_matches(bracket.matches)
+        except Exception as e:
+            print(f"Tournament routing error: {e}")
+    
+    if bracket is not None:
+        if not bracket.matches:
+            bracket.start_round(TournamentRound.ROUND_1)
+        follow_bracket()
+    
+    # systemctl stop/restart sends SIGTERM; exit normally so the final flush runs
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    # Tune before MQTT is up: the trials own the bridge, so no match may start meanwhile
+    if audio.needs_autotune:
+        audio.autotune()
+    
     # Connect MQTT
     mqtt_handler.connect()
     
@@ -76,10 +184,26 @@ if __name__ == "__main__":
     def timeout_checker():
         while True:
             matcher.check_timeout()
+            if bracket is not None and bracket.version != routed_version:
+                follow_bracket()  # a result or a new round: follow the bracket
             time.sleep(1)
     
     threading.Thread(target=timeout_checker, daemon=True).start()
-    threading.Thread(target=audio.play_tracks_loop, daemon=True).start()
+    audio.play_tracks_loop()
+    probe_interval = config['audio'].get('latency_probe_interval_s', 0)
+    if probe_interval:
+        audio.start_latency_probes(probe_interval)
+    
+    # Socket.IO frontend workers fed over the local ZeroMQ bus
+    dashboard_config = config.get('dashboard', {})
+    num_workers = dashboard_config.get('workers', 0)
+    if num_workers > 0:
+        publisher = FanoutPublisher(dashboard_config['fanout_endpoint'],
+                                    dashboard_config['snapshot_endpoint'])
+        attach_fanout(publisher)
+        start_workers(num_workers, port=dashboard_config.get('worker_port', 5001),
+                      pub_endpoint=publisher.pub_endpoint,
+                      snapshot_endpoint=publisher.snapshot_endpoint)
     
     # Start Flask
     socketio.run(app, host='0.0.0.0', port=5000, debug=config.get('debug', False))
\ No newline at end of file
@@ -18,12 +18,15 @@ class Matcher:
         self.on_event = on_event
         self.state = State.IDLE
         self.stations: Dict[str, Dict[str, Any]] = {'A': {}, 'B': {}}
-        self.lock = threading.Lock()
+        # Re-entrant: check_timeout() calls reset() while holding the lock
+        self.lock = threading.RLock()
         self.session_start = 0
+        self.version = 0  # bumped on every change, polled by SessionRecovery
 
     def handle_lock(self, station: str, track: int, timestamp: int):
         with self.lock:
             self.stations[station] = {'track': track, 'timestamp': timestamp}
+            self.version += 1
             self._update_state()
 
     def _update_state(self):
@@ -60,4 +63,32 @@ class Matcher:
         with self.lock:
             self.stations = {'A': {}, 'B': {}}
             self.state = State.IDLE
-            self.on_event('reset', {})
\ No newline at end of file
+            self.version += 1
+            self.on_event('reset', {})
+
+    def release_station(self, station: str):
+        """Drop one station's lock (e.g. stranded by a network partition)."""
+        with self.lock:
+            if not self.stations.get(station):
+                return
+            self.stations[station] = {}
+            self.version += 1
+            self.on_event('released', {'station': station})
+            self._update_state()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable state for crash recovery."""
+        with self.lock:
+            return {
+                'state': self.state.value,
+                'stations': {k: dict(v) for k, v in self.stations.items()},
+                'session_start': self.session_start,
+            }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Resume from a snapshot(); a running session keeps its original start time."""
+        with self.lock:
+            self.state = State(snapshot['state'])
+            self.stations = {k: dict(v) for k, v in snapshot['stations'].items()}
+            self.session_start = snapshot['session_start']
+            self.version += 1
\ No newline at end of file
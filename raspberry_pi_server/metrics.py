@@ -4,11 +4,65 @@ Generate daily reports, track statistics, export data.
 """
 
 import json
+import threading
 import time
+from bisect import bisect_right
 from collections import defaultdict
 from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List
+
+# Upper bounds (exclusive) of the sync-time histogram buckets, in ms
+SYNC_HISTOGRAM_BINS = [0, 50, 100, 150, 200, 500]
+
+# Default bucket bounds for latency/recovery histograms, in ms
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+
+
+class Histogram:
+    """Fixed-bucket histogram with running count, sum, min and max."""
+    
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket: >= bounds[-1]
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.lock = threading.Lock()
+    
+    def observe(self, value: float):
+        with self.lock:
+            self.counts[bisect_right(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+    
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0..1)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+    
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                'bins': [f'<{b}' for b in self.bounds] + [f'>={self.bounds[-1]}'],
+                'counts': list(self.counts),
+                'count': self.count,
+                'mean': self.total / self.count if self.count else 0.0,
+                'min': self.min,
+                'max': self.max,
+                'p50': self.percentile(0.5),
+                'p95': self.percentile(0.95),
+            }
 
 
 @dataclass
@@ -37,21 +91,47 @@ class MetricsCollector:
         self.hourly_matches = defaultdict(int)
         self.start_time = time.time()
         self.downtime_seconds = 0
+        self.histogram_counts = [0] * len(SYNC_HISTOGRAM_BINS)
+        self.version = 0  # bumped on every change, used by snapshot caches
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.histograms: Dict[str, Histogram] = {}
+    
+    def histogram(self, name: str, bounds: List[float] = LATENCY_BUCKETS_MS) -> Histogram:
+        """Named histogram, created on first use."""
+        if name not in self.histograms:
+            self.histograms.setdefault(name, Histogram(bounds))
+        return self.histograms[name]
+    
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Call back with each recorded match dict."""
+        self.listeners.append(callback)
     
     def record_match(self, station_a: str, station_b: str, sync_ms: int, track: int):
         """Record a successful match."""
-        self.matches.append({
+        match = {
             'time': datetime.now().isoformat(),
             'station_a': station_a,
             'station_b': station_b,
             'sync_time_ms': sync_ms,
             'track': track,
-        })
-        self.sync_times.append(sync_ms)
+        }
+        self.matches.append(match)
+        if sync_ms is not None:  # stations don't all report a sync time
+            self.sync_times.append(sync_ms)
         self.track_count[track] += 1
         
         hour = datetime.now().hour
         self.hourly_matches[hour] += 1
+        
+        # Incremental histogram: no rescan of sync_times per request
+        if sync_ms is not None:
+            bucket = bisect_right(SYNC_HISTOGRAM_BINS, sync_ms)
+            if bucket < len(SYNC_HISTOGRAM_BINS):
+                self.histogram_counts[bucket] += 1
+        self.version += 1
+        
+        for callback in self.listeners:
+            callback(match)
     
     def record_error(self, error_type: str, details: str):
         """Record system error."""
@@ -60,10 +140,19 @@ class MetricsCollector:
             'type': error_type,
             'details': details,
         })
+        self.version += 1
     
     def record_downtime(self, seconds: int):
         """Record system downtime."""
         self.downtime_seconds += seconds
+        self.version += 1
+    
+    def sync_histogram(self) -> Dict[str, List]:
+        """Sync time histogram from the incrementally maintained counts."""
+        return {
+            'bins': [f'<{b}ms' for b in SYNC_HISTOGRAM_BINS],
+            'counts': list(self.histogram_counts),
+        }
     
     def generate_daily_report(self) -> DailyReport:
         """Generate end-of-day report."""
@@ -96,9 +185,9 @@ class MetricsCollector:
             total_matches=len(self.matches),
             match_rate=len(self.matches) / max(len(set(m['station_a'] for m in self.matches) | 
                                                      set(m['station_b'] for m in self.matches)), 1),
-            avg_sync_time_ms=sum((x for x in self.sync_times if x is not None), default=0) / max(len([x for x in self.sync_times if x is not None]), 1),
-            fastest_sync_ms=min((x for x in self.sync_times if x is not None), default=0),
-            slowest_sync_ms=max((x for x in self.sync_times if x is not None), default=0),
+            avg_sync_time_ms=sum(self.sync_times) / max(len(self.sync_times), 1),
+            fastest_sync_ms=min(self.sync_times, default=0),
+            slowest_sync_ms=max(self.sync_times, default=0),
             most_popular_track=max((x for x in self.track_count), default=0) if self.track_count else 0,
             peak_hour=peak_hour,
             uptime_percent=uptime_percent,
@@ -133,19 +222,12 @@ def setup_metrics_routes(app):
     @app.route('/api/v1/metrics/sync-histogram')
     def get_sync_histogram():
         """Return sync time histogram."""
-        bins = [0, 50, 100, 150, 200, 500]
-        counts = [0] * len(bins)
-        
-        for sync_time in metrics.sync_times:
-            for i, b in enumerate(bins):
-                if sync_time < b:
-                    counts[i] += 1
-                    break
-        
-        return jsonify({
-            'bins': [f'<{b}ms' for b in bins],
-            'counts': counts,
-        })
+        return jsonify(metrics.sync_histogram())
+    
+    @app.route('/api/v1/metrics/histograms')
+    def get_histograms():
+        """Return latency/recovery histograms (e.g. mqtt_time_to_recover_ms)."""
+        return jsonify({name: h.snapshot() for name, h in metrics.histograms.items()})
     
     @app.route('/api/v1/metrics/export')
     def export_metrics():
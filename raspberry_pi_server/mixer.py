@@ -0,0 +1,134 @@
+"""
+Voice mixer for a device's persistent output stream.
+
+Rather than one sd.play() thread per clip, every device keeps a single
+output callback and each clip plays as a voice that the callback sums in.
+Control threads only queue commands, which the callback applies at the start
+of its next block. Start times are given in the device's own frame count,
+so a cue begins on an exact sample. A looping voice runs its clips back to
+back with no gap.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Union
+
+import numpy as np
+
+Clip = np.ndarray  # (frames, channels) float32
+
+
+class Voice:
+    """A playlist of clips scheduled on one mixer."""
+
+    __slots__ = ('clips', 'name', 'start_frame', 'loop', 'gain', 'index', 'position', 'done', 'finished')
+
+    def __init__(self, clips: Sequence[Clip], name: str, start_frame: Optional[int], loop: bool, gain: float):
+        self.clips = [clip for clip in clips if len(clip)]
+        self.name = name
+        self.start_frame = start_frame  # None: first frame of the next block
+        self.loop = loop
+        self.gain = gain
+        self.index = 0
+        self.position = 0
+        self.done = not self.clips
+        self.finished = threading.Event()
+        if self.done:
+            self.finished.set()
+
+    @property
+    def frames(self) -> int:
+        """Length of one pass through the playlist."""
+        return sum(len(clip) for clip in self.clips)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+
+class Mixer:
+    """Sums scheduled voices into an output buffer, one block per callback."""
+
+    def __init__(self, blocksize: int, channels: int = 1, samplerate: int = 44100):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frame = 0  # frames rendered so far, advanced by the callback only
+        self.voices: List[Voice] = []  # callback only
+        self.commands: Deque = deque()  # control threads append, the callback pops
+        self.scratch = np.zeros((blocksize, channels), dtype=np.float32)
+
+    def resize(self, blocksize: int, samplerate: Optional[int] = None):
+        """New block size (and rate) while the stream is closed; voices are kept."""
+        self.scratch = np.zeros((blocksize, self.channels), dtype=np.float32)
+        self.samplerate = samplerate or self.samplerate
+
+    def play(self, clips: Union[Clip, Sequence[Clip]], name: str = '', start_frame: Optional[int] = None,
+             loop: bool = False, gain: float = 1.0) -> Voice:
+        """
+        Schedule a clip (or a playlist of clips). start_frame is in this
+        mixer's frame count; a start time already past plays immediately.
+        """
+        if isinstance(clips, np.ndarray):
+            clips = [clips]
+        voice = Voice(clips, name, start_frame, loop, gain)
+        if not voice.done:
+            self.commands.append(('play', voice))
+        return voice
+
+    def stop(self, name: Optional[str] = None):
+        """Stop voices by name, or all of them, at the next block."""
+        self.commands.append(('stop', name))
+
+    def frame_after(self, seconds: float) -> int:
+        return self.frame + int(round(seconds * self.samplerate))
+
+    def mix_into(self, outdata: np.ndarray, frames: int):
+        """Add all active voices to outdata[:frames] (called from the audio callback)."""
+        while self.commands:
+            command, arg = self.commands.popleft()
+            if command == 'play':
+                if arg.start_frame is None:
+                    arg.start_frame = self.frame
+                self.voices.append(arg)
+            else:
+                for voice in self.voices:
+                    if arg is None or voice.name == arg:
+                        self._finish(voice)
+        if not self.voices:
+            self.frame += frames
+            return
+        block_end = self.frame + frames
+        for voice in self.voices:
+            if voice.done or voice.start_frame >= block_end:
+                continue
+            offset = max(0, voice.start_frame - self.frame)
+            self._render(voice, outdata, offset, frames)
+        self.voices = [voice for voice in self.voices if not voice.done]
+        self.frame = block_end
+
+    def _render(self, voice: Voice, outdata: np.ndarray, offset: int, frames: int):
+        while offset < frames:
+            clip = voice.clips[voice.index]
+            n = min(frames - offset, len(clip) - voice.position)
+            src = clip[voice.position:voice.position + n]
+            dst = outdata[offset:offset + n]
+            if voice.gain == 1.0:
+                np.add(dst, src, out=dst)
+            else:
+                scaled = self.scratch[:n]
+                np.multiply(src, voice.gain, out=scaled)
+                np.add(dst, scaled, out=dst)
+            offset += n
+            voice.position += n
+            if voice.position == len(clip):
+                voice.position = 0
+                voice.index += 1
+                if voice.index == len(voice.clips):
+                    if not voice.loop:
+                        self._finish(voice)
+                        return
+                    voice.index = 0
+
+    @staticmethod
+    def _finish(voice: Voice):
+        voice.done = True
+        voice.finished.set()
@@ -3,10 +3,24 @@ import json
 import threading
 import ssl
 import os
-from typing import Callable, Dict, Any
+import time
+from typing import Callable, Dict, Any, Optional
+from metrics import metrics
+from resilience import CircuitBreaker, CircuitBreakerState, MQTTMessageQueue
+
+SUBSCRIPTIONS = ("blinddate/lock", "blinddate/heartbeat", "blinddate/status")
 
 class MQTTHandler:
-    """Handles MQTT communication with reconnect logic, TLS, and auth."""
+    """
+    Handles MQTT communication with reconnect logic, TLS, and auth.
+
+    A single supervisor thread drives the paho network loop and owns
+    reconnects: an unexpected disconnect is retried immediately, further
+    failures back off through a full-jitter CircuitBreaker whose HALF_OPEN
+    probe is one connect attempt. On reconnect topics are resubscribed,
+    messages published while offline are flushed, and the outage duration
+    goes into the mqtt_time_to_recover_ms histogram.
+    """
 
     def __init__(self, config: Dict[str, Any], on_message: Callable[[str, Dict], None]):
         self.config = config
@@ -16,22 +30,50 @@ class MQTTHandler:
         self.client.on_message = self._on_message
         self.client.on_disconnect = self._on_disconnect
         self.client.will_set("blinddate/status", json.dumps({"status": "offline"}), retain=True)
-        
+
         # TLS and auth
         self.client.tls_set(ca_certs=os.getenv('MQTT_CA_CERT', self.config['mqtt'].get('ca_cert')), tls_version=ssl.PROTOCOL_TLS)
         self.client.username_pw_set(os.getenv('MQTT_USER'), os.getenv('MQTT_PASS'))
-        
+
+        mqtt_config = self.config['mqtt']
+        self.keepalive = mqtt_config.get('keepalive', 60)
+        self.connack_timeout_s = mqtt_config.get('connack_timeout_s', 5.0)
+        self.client.connect_timeout = self.connack_timeout_s
+        self.breaker = CircuitBreaker(base_delay_ms=mqtt_config.get('reconnect_base_ms', 250),
+                                      max_delay_ms=mqtt_config.get('reconnect_max_ms', 30000),
+                                      name="mqtt", jitter=True)
+        self.outbox = MQTTMessageQueue(max_size=mqtt_config.get('outbox_size', 1000))
+        self.recovery_histogram = metrics.histogram('mqtt_time_to_recover_ms')
+
         self.connected = False
         self.lock = threading.Lock()
+        self.reconnects = 0
+        self._connecting_until: Optional[float] = None  # waiting for CONNACK
+        self._disconnected_at: Optional[float] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
 
     def _on_connect(self, client, userdata, flags, rc):
+        self._connecting_until = None
         if rc == 0:
-            self.connected = True
-            self.client.subscribe("blinddate/lock")
-            self.client.subscribe("blinddate/heartbeat")
-            self.client.subscribe("blinddate/status")
-            print("MQTT connected")
+            self.breaker.record_success()
+            for topic in SUBSCRIPTIONS:
+                self.client.subscribe(topic)
+            with self.lock:
+                # Queued messages go out before anything published from now on
+                self._drain_outbox()
+                self.connected = True
+            if self._disconnected_at is not None:
+                recovery_ms = (time.monotonic() - self._disconnected_at) * 1000
+                self.recovery_histogram.observe(recovery_ms)
+                self.reconnects += 1
+                self._disconnected_at = None
+                print(f"MQTT reconnected after {recovery_ms:.0f}ms")
+            else:
+                print("MQTT connected")
         else:
+            self.breaker.record_failure()
             print(f"MQTT connection failed: {rc}")
 
     def _on_message(self, client, userdata, msg):
@@ -45,23 +87,68 @@ class MQTTHandler:
             print(f"Invalid JSON: {msg.payload}")
 
     def _on_disconnect(self, client, userdata, rc):
+        if self.connected and self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
         self.connected = False
+        if self._connecting_until is not None:
+            self._connecting_until = None
+            self.breaker.record_failure()
+        self._wake.set()
         print("MQTT disconnected")
 
-    def connect(self):
+    def _attempt_connect(self):
+        """One connect attempt; success/failure is settled by CONNACK or its timeout."""
         try:
-            self.client.connect(self.config['mqtt']['broker'], self.config['mqtt']['port'], 60)
-            self.client.loop_start()
+            self.client.connect(self.config['mqtt']['broker'], self.config['mqtt']['port'], self.keepalive)
+            self._connecting_until = time.monotonic() + self.connack_timeout_s
         except Exception as e:
+            self._connecting_until = None
+            self.breaker.record_failure()
             print(f"MQTT connect error: {e}")
 
+    def _supervise(self):
+        while not self._stop.is_set():
+            if self.connected or self._connecting_until is not None:
+                self.client.loop(timeout=0.1)
+                if (not self.connected and self._connecting_until is not None
+                        and time.monotonic() > self._connecting_until):
+                    self._connecting_until = None
+                    self.breaker.record_failure()
+                    print("MQTT CONNACK timeout")
+                continue
+            if self.breaker.allow_request():
+                if self.breaker.state == CircuitBreakerState.HALF_OPEN:
+                    print("MQTT probing broker")
+                self._attempt_connect()
+            else:
+                self._wake.wait(min(self.breaker.seconds_until_retry(), 1.0))
+                self._wake.clear()
+
+    def connect(self):
+        """First connect attempt on the caller's thread, then hand over to the supervisor."""
+        self._attempt_connect()
+        if self._supervisor is None:
+            self._stop.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="mqtt-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def _drain_outbox(self):
+        while self.outbox.size():
+            topic, payload, _ = self.outbox.get_nowait()
+            self.client.publish(topic, json.dumps(payload))
+
     def publish(self, topic: str, payload: Dict[str, Any]):
         with self.lock:
             if self.connected:
                 self.client.publish(topic, json.dumps(payload))
             else:
-                print("MQTT not connected, message dropped")
+                # Sent by _drain_outbox() as soon as the connection is back
+                self.outbox.put(topic, payload)
 
     def disconnect(self):
-        self.client.loop_stop()
-        self.client.disconnect()
\ No newline at end of file
+        self._stop.set()
+        self._wake.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        self.client.disconnect()
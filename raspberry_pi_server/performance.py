@@ -4,45 +4,43 @@ Audio prebuffering, caching, database indexes.
 """
 
 import os
-import time
-import wave
 from functools import lru_cache
 from typing import Optional
 
-import numpy as np
+from clip_store import ClipStore
 
 
 class AudioPreloader:
-    """Preload all audio files into memory at startup."""
+    """Map all audio clips at startup (see clip_store.ClipStore)."""
     
-    def __init__(self, audio_dir: str):
-        self.audio_cache = {}
+    def __init__(self, audio_dir: str, samplerate: int = 44100, channels: int = 1):
+        self.store = ClipStore(audio_dir, samplerate, channels)
         self.preload_all(audio_dir)
     
     def preload_all(self, audio_dir: str):
-        """Load all WAV files into memory."""
+        """Map (converting once if needed) every WAV file."""
         if not os.path.exists(audio_dir):
             return
         
-        for filename in os.listdir(audio_dir):
+        for filename in sorted(os.listdir(audio_dir)):
             if filename.endswith('.wav'):
-                filepath = os.path.join(audio_dir, filename)
                 try:
-                    with wave.open(filepath, 'rb') as f:
-                        frames = f.readframes(f.getnframes())
-                        self.audio_cache[filename] = {
-                            'frames': frames,
-                            'params': f.getparams(),
-                            'duration_s': f.getnframes() / f.getframerate()
-                        }
+                    self.store.get(filename[:-4])
                     print(f"✓ Preloaded: {filename}")
                 except Exception as e:
                     print(f"✗ Failed to preload {filename}: {e}")
     
     def get_audio(self, track_id: int) -> Optional[dict]:
         """Retrieve preloaded audio."""
-        filename = f"track_{track_id}.wav"
-        return self.audio_cache.get(filename, None)
+        name = f"track{track_id}"
+        if not os.path.exists(self.store.path(name)):
+            return None
+        samples = self.store.get(name)
+        return {
+            'samples': samples,
+            'samplerate': self.store.samplerate,
+            'duration_s': len(samples) / self.store.samplerate
+        }
 
 @lru_cache(maxsize=128)
 def get_cached_leaderboard(session_id: str, ttl_ms: int = 5000):
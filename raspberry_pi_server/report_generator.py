@@ -3,6 +3,7 @@ Daily report generation template.
 Auto-generates YYYY-MM-DD_report.md in docs/reports/
 """
 
+from collections import Counter
 from datetime import date, datetime, timedelta
 
 REPORT_TEMPLATE = """# Blind Date with Bandwidth - Daily Report
@@ -73,9 +74,28 @@ Generated: {generation_time}
 Report Version: 1.0
 """
 
-def generate_daily_report(metrics, location: str = "Unknown"):
-    """Generate markdown report."""
+def generate_daily_report(metrics, location: str = "Unknown", event_log=None, store=None):
+    """
+    Generate markdown report. Technical notes are counted from `event_log` if
+    given. With a storage.MatchStore, match totals, sync times and the track
+    distribution come from the day's stored sessions, so they survive restarts.
+    """
     report = metrics.generate_daily_report()
+    event_counts = Counter(e['type'] for _, e in event_log.replay_events()) if event_log else Counter()
+    totals = {
+        'total_matches': report.total_matches,
+        'avg_sync_time_ms': report.avg_sync_time_ms,
+        'fastest_sync_ms': report.fastest_sync_ms,
+        'slowest_sync_ms': report.slowest_sync_ms,
+        'most_popular_track': report.most_popular_track,
+    }
+    track_count = metrics.track_count
+    if store is not None:
+        day = datetime.strptime(report.date, '%Y-%m-%d').timestamp()
+        summary = store.report_summary(day, day + 86400)
+        track_count = summary['track_count']
+        totals = {key: summary[key] for key in totals if key in summary}
+        totals['most_popular_track'] = max(track_count, key=track_count.get, default=0)
     
     # Calculate percentiles
     sync_times = sorted(metrics.sync_times)
@@ -87,28 +107,28 @@ def generate_daily_report(metrics, location: str = "Unknown"):
         date=report.date,
         location=location,
         total_participants=report.total_participants,
-        total_matches=report.total_matches,
+        total_matches=totals['total_matches'],
         match_rate=report.match_rate,
-        avg_sync_time_ms=report.avg_sync_time_ms,
+        avg_sync_time_ms=totals['avg_sync_time_ms'],
         uptime_percent=report.uptime_percent,
         errors_count=report.errors_count,
-        fastest_sync_ms=report.fastest_sync_ms,
-        slowest_sync_ms=report.slowest_sync_ms,
+        fastest_sync_ms=totals['fastest_sync_ms'],
+        slowest_sync_ms=totals['slowest_sync_ms'],
         median_sync_ms=sync_times[median_idx] if sync_times else 0,
         p95_sync_ms=sync_times[p95_idx] if sync_times else 0,
-        most_popular_track=report.most_popular_track,
+        most_popular_track=totals['most_popular_track'],
         peak_hour=report.peak_hour,
         peak_matches=max(metrics.hourly_matches.values()) if metrics.hourly_matches else 0,
         peak_participants=0,  # Would need per-hour tracking
-        track_1_count=metrics.track_count.get(1, 0),
-        track_2_count=metrics.track_count.get(2, 0),
-        track_3_count=metrics.track_count.get(3, 0),
-        track_4_count=metrics.track_count.get(4, 0),
-        track_5_count=metrics.track_count.get(5, 0),
-        wifi_dropouts=0,
+        track_1_count=track_count.get(1, 0),
+        track_2_count=track_count.get(2, 0),
+        track_3_count=track_count.get(3, 0),
+        track_4_count=track_count.get(4, 0),
+        track_5_count=track_count.get(5, 0),
+        wifi_dropouts=event_counts['station_offline'],
         mqtt_reconnects=0,
         audio_failures=0,
-        critical_errors=0,
+        critical_errors=event_counts['system_error'],
         generation_time=datetime.now().isoformat(),
     )
     
@@ -7,11 +7,14 @@ import hashlib
 import json
 import logging
 import queue
+import random
 import threading
 import time
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db import checkpoints
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +26,17 @@ class CircuitBreakerState(Enum):
 
 
 class CircuitBreaker:
-    """Exponential backoff circuit breaker for MQTT reconnection."""
+    """
+    Exponential backoff circuit breaker for MQTT reconnection.
+    With jitter=True the delay is drawn uniformly from [0, backoff] ("full
+    jitter") so clients that lost the network together don't retry in lockstep.
+    """
     
-    def __init__(self, base_delay_ms=1000, max_delay_ms=60000, name="unnamed"):
+    def __init__(self, base_delay_ms=1000, max_delay_ms=60000, name="unnamed", jitter=False):
         self.base_delay_ms = base_delay_ms
         self.max_delay_ms = max_delay_ms
         self.name = name
+        self.jitter = jitter
         
         self.state = CircuitBreakerState.CLOSED
         self.failure_count = 0
@@ -48,6 +56,8 @@ class CircuitBreaker:
         
         # Exponential backoff: 1s, 2s, 4s, 8s, 16s, 32s, 60s (max)
         delay_ms = min(self.base_delay_ms * (2 ** (self.failure_count - 1)), self.max_delay_ms)
+        if self.jitter:
+            delay_ms = int(random.uniform(0, delay_ms))
         self.next_retry_time = self.last_failure_time + (delay_ms / 1000.0)
         
         self.state = CircuitBreakerState.OPEN
@@ -66,6 +76,12 @@ class CircuitBreaker:
             return False
         
         return True  # HALF_OPEN, allow one test request
+    
+    def seconds_until_retry(self) -> float:
+        """How long until allow_request() can succeed (0 when it already can)."""
+        if self.state != CircuitBreakerState.OPEN or self.next_retry_time is None:
+            return 0.0
+        return max(0.0, self.next_retry_time - time.time())
 
 
 class MQTTMessageQueue:
@@ -129,41 +145,172 @@ class AudioDeviceResilient:
 
 
 class SessionRecovery:
-    """Session state persistence and crash recovery."""
+    """
+    Session state persistence and crash recovery.
+    
+    Components register a snapshot and a restore function (plus optionally
+    a version function). A write-behind thread checkpoints components whose
+    version changed or that were marked dirty, coalescing everything since
+    the last pass into one transaction, so callers on the hot path never
+    wait on the database.
+    """
     
-    def __init__(self, db_session_func: Callable):
+    def __init__(self, db_session_func: Callable, checkpoint_interval_s: float = 1.0):
         """
         Args:
             db_session_func: callable that returns SQLAlchemy session
+                (e.g. a sessionmaker); if it returns None, state is kept in memory only
+            checkpoint_interval_s: how often the writer flushes pending checkpoints
         """
         self.db_session = db_session_func
-        self.current_state = {}
+        self.checkpoint_interval_s = checkpoint_interval_s
+        self.current_state: Dict[str, Any] = {}  # name -> last checkpointed state
+        self.components: Dict[str, Tuple[Callable, Callable, Optional[Callable]]] = {}
         self.last_checkpoint = None
-        self.checkpoint_interval_s = 5
         self.lock = threading.Lock()
-    
-    def checkpoint_state(self, state: Dict[str, Any]):
-        """Persist state to database."""
-        now = time.time()
-        if self.last_checkpoint and (now - self.last_checkpoint) < self.checkpoint_interval_s:
-            return
         
+        self._pending: Dict[str, Any] = {}  # name -> state not yet written
+        self._dirty = set()  # registered components to snapshot on the next pass
+        self._versions: Dict[str, Any] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer = None
+        self.writes = 0
+        self.write_errors = 0
+    
+    def register(self, name: str, snapshot_fn: Callable[[], Dict[str, Any]],
+                 restore_fn: Callable[[Dict[str, Any]], None],
+                 version_fn: Optional[Callable[[], Any]] = None):
+        """Checkpoint a component; with version_fn it is re-snapshotted whenever the version changes."""
         with self.lock:
+            self.components[name] = (snapshot_fn, restore_fn, version_fn)
+            self._dirty.add(name)
+    
+    def mark_dirty(self, name: str):
+        """Ask for a component to be checkpointed on the next writer pass (cheap)."""
+        with self.lock:
+            self._dirty.add(name)
+    
+    def checkpoint_state(self, state: Dict[str, Any], name: str = 'session'):
+        """Queue a state dict for persistence; the latest one per name wins."""
+        with self.lock:
+            self._pending[name] = state.copy()
+    
+    def start(self):
+        """Start the write-behind thread."""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="session-checkpoint",
+                                            daemon=True)
+            self._writer.start()
+    
+    def stop(self):
+        """Stop the writer after a final flush."""
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+    
+    def _write_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.checkpoint_interval_s)
+            self._wake.clear()
             try:
-                self.current_state = state.copy()
-                # In a real implementation, save to database
-                self.last_checkpoint = now
-                logger.debug(f"State checkpoint saved: {state}")
+                self.flush()
             except Exception as e:
+                self.write_errors += 1
                 logger.error(f"Failed to checkpoint state: {e}")
     
-    def restore_state(self) -> Dict[str, Any]:
-        """Restore state from database."""
+    def _collect(self) -> Dict[str, Any]:
         with self.lock:
-            if self.current_state:
-                logger.info(f"State recovered from checkpoint: {self.current_state}")
-                return self.current_state.copy()
-            return {}
+            dirty = set(self._dirty)
+            self._dirty.clear()
+            batch = self._pending
+            self._pending = {}
+            components = dict(self.components)
+        
+        for name, (snapshot_fn, _, version_fn) in components.items():
+            if version_fn is not None:
+                version = version_fn()
+                if self._versions.get(name) != version:
+                    self._versions[name] = version
+                    dirty.add(name)
+        for name in dirty:
+            if name not in components:
+                continue
+            try:
+                batch[name] = components[name][0]()
+            except Exception as e:
+                logger.warning(f"Snapshot of {name} failed, retrying next pass: {e}")
+                self._versions.pop(name, None)
+                self.mark_dirty(name)
+        return batch
+    
+    def flush(self) -> int:
+        """Write all pending checkpoints in one transaction. Returns how many were written."""
+        batch = self._collect()
+        if not batch:
+            return 0
+        
+        now = time.time()
+        rows = [{'name': name, 'state': json.dumps(state), 'updated_at': now}
+                for name, state in batch.items()]
+        session = self.db_session()
+        if session is not None:
+            with session, session.begin():
+                session.execute(checkpoints.delete().where(checkpoints.c.name.in_(list(batch))))
+                session.execute(checkpoints.insert(), rows)
+        
+        with self.lock:
+            self.current_state.update(batch)
+            self.last_checkpoint = now
+        self.writes += 1
+        logger.debug(f"State checkpoint saved: {', '.join(batch)}")
+        return len(batch)
+    
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """All checkpointed states, read in one query."""
+        session = self.db_session()
+        if session is None:
+            with self.lock:
+                return dict(self.current_state)
+        with session:
+            rows = session.execute(checkpoints.select()).all()
+        return {row.name: json.loads(row.state) for row in rows}
+    
+    def restore_state(self, name: str = 'session') -> Dict[str, Any]:
+        """Restore one state from database."""
+        with self.lock:
+            if name in self.current_state:
+                return dict(self.current_state[name])
+        state = self.load().get(name, {})
+        if state:
+            logger.info(f"State recovered from checkpoint: {name}")
+        return state
+    
+    def restore_all(self) -> List[str]:
+        """Feed every registered component its last checkpoint. Returns the restored names."""
+        started = time.perf_counter()
+        states = self.load()
+        restored = []
+        for name, (_, restore_fn, version_fn) in list(self.components.items()):
+            if name not in states:
+                continue
+            try:
+                restore_fn(states[name])
+            except Exception as e:
+                logger.error(f"Failed to restore {name}: {e}")
+                continue
+            restored.append(name)
+            with self.lock:
+                self.current_state[name] = states[name]
+                self._dirty.discard(name)
+            if version_fn is not None:
+                self._versions[name] = version_fn()  # restored state is already on disk
+        logger.info(f"Recovered {', '.join(restored) or 'nothing'} in "
+                    f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return restored
 
 
 class ReplayAttackPrevention:
@@ -199,37 +346,79 @@ class ReplayAttackPrevention:
 
 
 class PartitionHandler:
-    """Handle network partitions (split-brain scenarios)."""
+    """
+    Handle network partitions (split-brain scenarios).
+    
+    When only one station has locked, a deadline is armed; if the other
+    station hasn't locked when it expires, on_partition(station, track) is
+    called from the timer thread, even if no further traffic arrives.
+    """
     
-    def __init__(self, timeout_s=15):
+    def __init__(self, timeout_s=15, on_partition: Optional[Callable[[str, int], None]] = None):
         self.timeout_s = timeout_s
+        self.on_partition = on_partition
         self.station_a_locked_time = None
         self.station_b_locked_time = None
+        self.partitions_detected = 0
+        self.lock = threading.Lock()
+        self._timers: Dict[str, threading.Timer] = {}
     
     def handle_split_brain(self, locked_station: str, track: int) -> bool:
         """
         Detect if only one station locked (potential network partition).
-        Returns True if waiting timeout has elapsed.
+        Returns True if a deadline was armed (the other station has not locked).
         """
         now = time.time()
         
-        if locked_station == "A":
-            self.station_a_locked_time = now
-            if self.station_b_locked_time is None:
-                # Only A locked, check timeout
-                if now - self.station_a_locked_time > self.timeout_s:
-                    logger.warning("Split-brain: Station A locked but B offline for 15s")
-                    return True
-        elif locked_station == "B":
-            self.station_b_locked_time = now
-            if self.station_a_locked_time is None:
-                if now - self.station_b_locked_time > self.timeout_s:
-                    logger.warning("Split-brain: Station B locked but A offline for 15s")
-                    return True
-        
-        return False
+        with self.lock:
+            if locked_station == "A":
+                self.station_a_locked_time = now
+                other_locked = self.station_b_locked_time is not None
+            elif locked_station == "B":
+                self.station_b_locked_time = now
+                other_locked = self.station_a_locked_time is not None
+            else:
+                return False
+            
+            if other_locked:
+                # Both sides reached the broker: no partition
+                self._cancel_all()
+                return False
+            
+            self._cancel(locked_station)
+            timer = threading.Timer(self.timeout_s, self._expire, args=(locked_station, track))
+            timer.daemon = True
+            self._timers[locked_station] = timer
+            timer.start()
+            return True
+    
+    def _expire(self, station: str, track: int):
+        with self.lock:
+            if self._timers.get(station) is not threading.current_thread():
+                return  # cancelled or re-armed meanwhile
+            del self._timers[station]
+            self.partitions_detected += 1
+            if station == "A":
+                self.station_a_locked_time = None
+            else:
+                self.station_b_locked_time = None
+        other = "B" if station == "A" else "A"
+        logger.warning(f"Split-brain: Station {station} locked but {other} silent for {self.timeout_s}s")
+        if self.on_partition is not None:
+            self.on_partition(station, track)
+    
+    def _cancel(self, station: str):
+        timer = self._timers.pop(station, None)
+        if timer is not None:
+            timer.cancel()
+    
+    def _cancel_all(self):
+        for station in list(self._timers):
+            self._cancel(station)
     
     def reset(self):
         """Reset partition detector."""
-        self.station_a_locked_time = None
-        self.station_b_locked_time = None
+        with self.lock:
+            self._cancel_all()
+            self.station_a_locked_time = None
+            self.station_b_locked_time = None
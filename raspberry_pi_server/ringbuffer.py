@@ -0,0 +1,183 @@
+"""
+Preallocated single-producer/single-consumer audio ring buffer and the
+adaptive jitter buffer the bridge puts between the two stations.
+
+RingBuffer keeps monotonically increasing read/write positions. Only the
+producer moves write_pos and only the consumer moves read_pos, so two audio
+callbacks can share one without a lock. Blocks are copied straight from the
+input buffer into the ring and from the ring into the output buffer, and
+nothing is allocated per block.
+
+JitterBuffer sits on top. Two USB interfaces run from independent crystals,
+so one side slowly produces more samples than the other consumes. The
+buffer follows the smoothed fill level. When it drifts above the target, one
+sample is dropped from a block; when it drifts below, one is repeated. The
+target starts at one block, grows by a block on every underrun and shrinks
+again after a quiet period, so latency is only spent where the link needs it.
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+
+
+class RingBuffer:
+    """Lock-free SPSC ring of float32 frames."""
+
+    def __init__(self, capacity: int, channels: int = 1, dtype=np.float32):
+        self.capacity = capacity
+        self.channels = channels
+        self.data = np.zeros((capacity, channels), dtype=dtype)
+        self.write_pos = 0  # producer only
+        self.read_pos = 0   # consumer only
+
+    def available(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def free(self) -> int:
+        return self.capacity - self.available()
+
+    def write(self, block: np.ndarray) -> bool:
+        """Append a whole block; False (nothing written) if it doesn't fit."""
+        frames = len(block)
+        if frames > self.free():
+            return False
+        start = self.write_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        if first < frames:
+            self.data[:frames - first] = block[first:]
+        self.write_pos += frames
+        return True
+
+    def read_into(self, out: np.ndarray, frames: int) -> int:
+        """Copy up to `frames` frames into out[:frames]; returns frames read."""
+        frames = min(frames, self.available())
+        start = self.read_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        if first < frames:
+            out[first:frames] = self.data[:frames - first]
+        self.read_pos += frames
+        return frames
+
+    def clear(self):
+        """Only while neither side is running."""
+        self.write_pos = self.read_pos = 0
+
+
+class JitterBuffer:
+    """Adaptive-latency buffer for one bridge direction, with drift compensation."""
+
+    def __init__(self, blocksize: int, channels: int = 1, max_blocks: int = 8,
+                 samplerate: int = 44100, relax_after_s: float = 10.0,
+                 smoothing: float = 0.02, correct_every: int = 8):
+        self.blocksize = blocksize
+        self.samplerate = samplerate
+        self.ring = RingBuffer(blocksize * max_blocks, channels)
+        # Room for one block plus the sample a drift drop consumes
+        self.scratch = np.zeros((blocksize + 1, channels), dtype=np.float32)
+        self.min_target = blocksize
+        self.max_target = blocksize * max_blocks // 2
+        self.relax_after_blocks = max(1, int(relax_after_s * samplerate / blocksize))
+        self.smoothing = smoothing
+        self.correct_every = correct_every
+        self.reset()
+
+    def reset(self):
+        """Only while neither side is running."""
+        self.ring.clear()
+        self.target = self.min_target
+        self.priming = True
+        self.avg_fill = float(self.target)
+        self.last_fill = 0
+        self.blocks_since_underrun = 0
+        self.blocks_since_correction = 0
+        self.underruns = 0
+        self.overruns = 0
+        self.inserted = 0
+        self.dropped = 0
+
+    # Producer side
+
+    def write(self, block: np.ndarray):
+        if not self.ring.write(block):
+            self.overruns += 1  # consumer stalled; the newest block is lost
+
+    # Consumer side
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Fill out (one block) and return the frames that were queued ahead
+        of it, for latency accounting. Outputs silence while (re)priming.
+        """
+        frames = len(out)
+        fill = self.ring.available()
+        self.last_fill = fill
+        if self.priming:
+            if fill < self.target:
+                out.fill(0)
+                return fill
+            self.priming = False
+            self.avg_fill = float(fill)
+
+        self.avg_fill += self.smoothing * (fill - self.avg_fill)
+        self.blocks_since_correction += 1
+        correction = 0
+        if self.blocks_since_correction >= self.correct_every and fill > frames:
+            if self.avg_fill > self.target + frames:
+                correction = 1   # running ahead: consume one extra sample
+            elif self.avg_fill < self.target - frames / 2:
+                correction = -1  # running behind: repeat one sample
+        if correction:
+            self.blocks_since_correction = 0
+            self._read_corrected(out, frames, correction)
+        else:
+            got = self.ring.read_into(out, frames)
+            if got < frames:
+                out[got:].fill(0)
+                self._underrun()
+                return fill
+        self.blocks_since_underrun += 1
+        if (self.blocks_since_underrun >= self.relax_after_blocks
+                and self.target > self.min_target):
+            self.target = max(self.min_target, self.target - frames // 4)
+            self.blocks_since_underrun = 0
+        return fill
+
+    def drain(self):
+        """Consumer side: discard queued audio and prime again before playing."""
+        self.ring.read_pos = self.ring.write_pos
+        self.priming = True
+
+    def _read_corrected(self, out: np.ndarray, frames: int, correction: int):
+        scratch = self.scratch
+        self.ring.read_into(scratch, frames + correction)
+        mid = frames // 2
+        out[:mid] = scratch[:mid]
+        if correction > 0:
+            out[mid:] = scratch[mid + 1:frames + 1]
+            self.dropped += 1
+        else:
+            out[mid] = scratch[mid - 1]
+            out[mid + 1:] = scratch[mid:frames - 1]
+            self.inserted += 1
+
+    def _underrun(self):
+        self.underruns += 1
+        self.blocks_since_underrun = 0
+        self.target = min(self.max_target, self.target + self.blocksize)
+        self.priming = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'fill_frames': self.ring.available(),
+            'fill_ms': self.ring.available() / self.samplerate * 1000,
+            'avg_fill_frames': round(self.avg_fill, 1),
+            'target_frames': self.target,
+            'target_ms': self.target / self.samplerate * 1000,
+            'underruns': self.underruns,
+            'overruns': self.overruns,
+            'inserted': self.inserted,
+            'dropped': self.dropped,
+        }
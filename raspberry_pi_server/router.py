@@ -0,0 +1,340 @@
+"""
+N-station audio router for tournament mode.
+
+DuplexBridge joins exactly two stations. AudioRouter keeps one persistent
+duplex stream per station device (up to the 8 of a TournamentBracket) and
+connects any pairs of them. Each station's device callback only moves
+blocks: what it captured goes into that station's capture JitterBuffer,
+and it plays from its playback JitterBuffer plus its own Mixer.
+
+All routing happens in one block loop. It runs inside the callback of one
+clock-master station and reads a block from every active station into an
+(N, frames) matrix. A single matmul with the N x N gain matrix mixes every
+route at once, and the resulting rows go to each station's playback buffer.
+The jitter buffers absorb the drift between each device's clock and the
+master's. Routes are replaced as a whole (a new matrix and index list), so
+control threads never touch state that a callback is halfway through.
+
+Each station is a role in the AudioDeviceManager, so a station never shares
+a device with another station or a booth, and a lost stream fails over to
+the next free device like the booths' do.
+
+Per route, stats() reports mouth-to-ear latency in each direction. Latency
+is estimated as capture lag + both buffer fills + playback lead. It also
+reports CPU per block: both stations' callback time plus a share of the
+routing loop.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from audio_devices import DeviceSpec
+from mixer import Mixer
+from ringbuffer import JitterBuffer
+
+logger = logging.getLogger(__name__)
+
+Route = Tuple[str, str]
+
+
+class AudioRouter:
+    """Per-station duplex streams; connect(a, b) routes any pair through one vectorized loop."""
+
+    def __init__(self, devices, stations: Dict[str, DeviceSpec], sd_module=None, samplerate: int = 44100,
+                 blocksize: int = 256, channels: int = 1, latency: Any = 'low', max_queue_blocks: int = 8,
+                 history: int = 4096):
+        if sd_module is None:
+            import sounddevice as sd_module
+        self.sd = sd_module
+        self.devices = devices  # audio_devices.AudioDeviceManager: binding and failover
+        self.stations = dict(stations)  # station id -> device index or name substring
+        for station, spec in self.stations.items():
+            devices.register(station, spec)
+        self.names = list(self.stations)
+        self.index = {station: i for i, station in enumerate(self.names)}
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.latency = latency
+        n = len(self.names)
+
+        # Captured at a station, waiting for the routing loop
+        self.capture: List[JitterBuffer] = [
+            JitterBuffer(blocksize, channels, max_queue_blocks, samplerate) for _ in range(n)]
+        # Routed to a station, waiting for its callback
+        self.playback: List[JitterBuffer] = [
+            JitterBuffer(blocksize, channels, max_queue_blocks, samplerate) for _ in range(n)]
+        self.mixers: Dict[str, Mixer] = {station: Mixer(blocksize, channels, samplerate) for station in self.names}
+        self.routes: Dict[str, str] = {}  # station -> peer, both directions
+        self.gains: Dict[Route, float] = {}
+        # (active station indices, gain sub-matrix, active flag per station): swapped whole
+        self._plan = (np.zeros(0, dtype=np.intp), np.zeros((0, 0), dtype=np.float32), [False] * n)
+        self._captured = np.zeros((n, blocksize * channels), dtype=np.float32)
+        self._mixed = np.zeros((n, blocksize * channels), dtype=np.float32)
+
+        self.streams: Dict[str, Any] = {}
+        self.streams_lock = threading.Lock()
+        self.running = False
+        self.master: Optional[str] = None  # station whose callback runs the routing loop
+
+        self.capture_lag_s = [0.0] * n
+        self.capture_fill = [0] * n  # frames queued ahead of the last block the loop read
+        self.history = history  # latency estimates kept per direction
+        self.latency_samples: Dict[Route, Deque[float]] = {}
+        self.xruns = {station: 0 for station in self.names}
+        self.callback_s = [0.0] * n
+        self.callbacks = [0] * n
+        self.loop_s = 0.0
+        self.loops = 0
+
+    # Routing
+
+    def connect(self, a: str, b: str, gain: float = 1.0):
+        """Route a <-> b; either station's previous route is dropped first."""
+        if a == b or a not in self.index or b not in self.index:
+            raise ValueError(f"Cannot route {a!r} <-> {b!r} (stations: {', '.join(self.names)})")
+        if self.routes.get(a) == b:
+            return
+        for station in (a, b):
+            if station in self.routes:
+                self._unroute(station)
+        self.routes[a], self.routes[b] = b, a
+        self.gains[(a, b)] = self.gains[(b, a)] = gain
+        for direction in ((a, b), (b, a)):
+            self.latency_samples[direction] = deque(maxlen=self.history)
+        self._replan()
+        logger.info(f"Routed {a} <-> {b}")
+
+    def disconnect(self, station: Optional[str] = None):
+        """Drop a station's route, or every route."""
+        if station is None:
+            self.routes.clear()
+            self.gains.clear()
+        elif station in self.routes:
+            self._unroute(station)
+        else:
+            return
+        self._replan()
+
+    def _unroute(self, station: str):
+        peer = self.routes.pop(station)
+        self.routes.pop(peer, None)
+        self.gains.pop((station, peer), None)
+        self.gains.pop((peer, station), None)
+        logger.info(f"Unrouted {station} <-> {peer}")
+
+    def _replan(self):
+        active = sorted(self.index[station] for station in self.routes)
+        position = {i: k for k, i in enumerate(active)}
+        matrix = np.zeros((len(active), len(active)), dtype=np.float32)
+        for (src, dst), gain in self.gains.items():
+            matrix[position[self.index[dst]], position[self.index[src]]] = gain
+        flags = [False] * len(self.names)
+        for i in active:
+            flags[i] = True
+        self._plan = (np.array(active, dtype=np.intp), matrix, flags)
+
+    def route_pairs(self) -> List[Route]:
+        return sorted({tuple(sorted(pair)) for pair in self.routes.items()})
+
+    def sync_matches(self, matches: Iterable[Any]):
+        """
+        Route every unfinished tournament.Match pair and drop finished ones.
+        Also retries the streams of stations that are down (see start()).
+        """
+        live = set()
+        for match in matches:
+            pair = (match.station_a, match.station_b)
+            if match.status == 'completed':
+                if self.routes.get(match.station_a) == match.station_b:
+                    self.disconnect(match.station_a)
+            else:
+                live.add(pair)
+        if live:
+            self.start()
+        for a, b in sorted(live):
+            self.connect(a, b)
+
+    # Audio callbacks
+
+    def _route_block(self, frames: int):
+        """The routing loop: every active route, one block, one matmul."""
+        started = time.perf_counter()
+        active, matrix, flags = self._plan
+        captured = self._captured[:len(active), :frames * self.channels]
+        for i, buffer in enumerate(self.capture):
+            if not flags[i]:
+                buffer.drain()
+        for k, i in enumerate(active):
+            self.capture_fill[i] = self.capture[i].read_into(captured[k].reshape(frames, self.channels))
+        mixed = self._mixed[:len(active), :frames * self.channels]
+        np.matmul(matrix, captured, out=mixed)
+        for k, i in enumerate(active):
+            self.playback[i].write(mixed[k].reshape(frames, self.channels))
+        self.loop_s += time.perf_counter() - started
+        self.loops += 1
+
+    def _make_callback(self, station: str):
+        i = self.index[station]
+        capture = self.capture[i]
+        playback = self.playback[i]
+        mixer = self.mixers[station]
+
+        def callback(indata, outdata, frames, time_info, status):
+            started = time.perf_counter()
+            if status:
+                self.xruns[station] += 1
+            flags = self._plan[2]
+            if flags[i]:
+                self.capture_lag_s[i] = time_info.currentTime - time_info.inputBufferAdcTime
+                capture.write(indata)
+            if self.master == station:
+                loop_s = self.loop_s
+                self._route_block(frames)
+                started += self.loop_s - loop_s  # the loop is accounted separately
+            if flags[i]:
+                queued = playback.read_into(outdata)
+                peer = self.routes.get(station)
+                samples = self.latency_samples.get((peer, station))
+                if peer is not None and samples is not None and not playback.priming:
+                    j = self.index[peer]
+                    playback_lead = time_info.outputBufferDacTime - time_info.currentTime
+                    samples.append((self.capture_lag_s[j] + (self.capture_fill[j] + queued) / self.samplerate
+                                    + playback_lead) * 1000)
+            else:
+                playback.drain()
+                outdata.fill(0)
+            mixer.mix_into(outdata, frames)
+            self.callback_s[i] += time.perf_counter() - started
+            self.callbacks[i] += 1
+
+        return callback
+
+    # Streams
+
+    def _open(self, station: str, device: Optional[int]):
+        if device is None:
+            raise RuntimeError(f"No audio device for station {station} ({self.stations[station]!r})")
+        stream = self.sd.Stream(device=device, samplerate=self.samplerate, blocksize=self.blocksize,
+                                channels=self.channels, dtype='float32', latency=self.latency,
+                                callback=self._make_callback(station),
+                                finished_callback=lambda: self._on_finished(station, stream))
+        try:
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        return stream
+
+    def _on_finished(self, station: str, stream):
+        # Runs on the PortAudio thread, where a stream can't be replaced. The
+        # station keeps its route (its peer hears silence until failover) and
+        # another station takes over the routing loop right away.
+        if self.running and self.streams.get(station) is stream:
+            logger.error(f"Router: stream for station {station} stopped")
+            self.streams.pop(station, None)
+            if self.master == station:
+                self.master = next(iter(self.streams), None)
+            threading.Thread(target=self._failover, args=(station, stream),
+                             name=f"router-failover-{station}", daemon=True).start()
+
+    def _failover(self, station: str, broken):
+        started = time.perf_counter()
+        with self.streams_lock:
+            if not self.running or station in self.streams:
+                return
+            try:
+                broken.close()
+            except Exception:
+                pass
+            try:
+                self.streams[station] = self.devices.failover(
+                    station, lambda device: self._open(station, device), started)
+            except RuntimeError as e:
+                logger.error(f"Router: station {station} lost: {e}")
+                return
+            if self.master is None:
+                self.master = station
+
+    def _close(self, station: str):
+        stream = self.streams.pop(station, None)
+        if stream is not None:
+            try:
+                stream.abort()
+                stream.close()
+            except Exception:
+                pass
+
+    def start(self):
+        """
+        Open every station's stream; they run until stop(). A station whose
+        device fails to open goes through devices.failover; if no device is
+        free it stays down (its peer hears silence) while the others run, and
+        the next start() call tries it again.
+        """
+        with self.streams_lock:
+            if not self.running:
+                for buffer in self.capture + self.playback:
+                    buffer.reset()
+                self.running = True
+            for station in self.names:
+                if station in self.streams:
+                    continue
+                try:
+                    self.streams[station] = self._open(station, self.devices.device_for(station))
+                except Exception as e:
+                    logger.warning(f"Router: station {station} failed to open: {e}")
+                    try:
+                        self.streams[station] = self.devices.failover(
+                            station, lambda device: self._open(station, device))
+                    except RuntimeError as e:
+                        logger.error(f"Router: station {station} is down: {e}")
+            if self.master not in self.streams:
+                self.master = next((station for station in self.names if station in self.streams), None)
+
+    def stop(self):
+        with self.streams_lock:
+            self.running = False
+            self.master = None
+            for station in self.names:
+                self._close(station)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per route: latency per direction, buffer counters and CPU per block."""
+        block_s = self.blocksize / self.samplerate
+        loop_us = self.loop_s / max(self.loops, 1) * 1e6
+        pairs = self.route_pairs()
+        routes = {}
+        for a, b in pairs:
+            ia, ib = self.index[a], self.index[b]
+            cpu_us = (loop_us / len(pairs) + self.callback_s[ia] / max(self.callbacks[ia], 1) * 1e6
+                      + self.callback_s[ib] / max(self.callbacks[ib], 1) * 1e6)
+            entry: Dict[str, Any] = {'cpu_us': round(cpu_us, 1),
+                                     'cpu_percent': round(cpu_us / (block_s * 1e6) * 100, 2)}
+            for src, dst in ((a, b), (b, a)):
+                samples = np.array(self.latency_samples.get((src, dst), ()))
+                direction: Dict[str, Any] = {'count': len(samples)}
+                if len(samples):
+                    direction.update({
+                        'last_ms': round(float(samples[-1]), 2),
+                        'p50_ms': round(float(np.percentile(samples, 50)), 2),
+                        'p95_ms': round(float(np.percentile(samples, 95)), 2),
+                    })
+                direction['capture'] = self.capture[self.index[src]].stats()
+                direction['playback'] = self.playback[self.index[dst]].stats()
+                entry[f'{src}->{dst}'] = direction
+            routes[f'{a}<->{b}'] = entry
+        return {
+            'running': self.running,
+            'master': self.master,
+            'blocksize': self.blocksize,
+            'block_ms': block_s * 1000,
+            'loop_us': round(loop_us, 1),
+            'xruns': dict(self.xruns),
+            'routes': routes,
+        }
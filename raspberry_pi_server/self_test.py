@@ -54,31 +54,26 @@ def test_play_success():
             'audio': {'device_a': 1, 'device_b': 2},
             'session': {'duration': 10, 'num_tracks': 5}
         })
-        audio.play_wav('audio/success.wav', audio.device_a_out)
+        audio.play_wav('audio/success.wav', audio.devices.device_for('a'))
         return True
     except Exception as e:
         print(f"Play success error: {e}")
         return False
 
 def test_loopback():
-    # Simple loopback: record and check if data is present
+    # Chirp injected at station A's mic path, found at station B's output (and back)
     try:
         audio = AudioHandler(config={
             'audio': {'device_a': 1, 'device_b': 2},
             'session': {'duration': 10, 'num_tracks': 5}
         })
-        if audio.p is not None:
-            stream_in = audio.p.open(format=audio.format, channels=audio.channels, rate=audio.rate,
-                                     input=True, input_device_index=audio.device_a_in, frames_per_buffer=audio.chunk)
-            data = stream_in.read(audio.chunk)
-            stream_in.stop_stream()
-            stream_in.close()
-            # Check if data has non-zero values
-            import struct
-            samples = struct.unpack('<' + 'h' * audio.chunk, data)
-            return max(samples) > 100  # Some threshold
-        else:
+        stats = audio.probe_latency()
+        audio.bridge.stop()
+        if stats is None:
             return False
+        for direction, result in stats.items():
+            print(f"  {direction}: {result}")
+        return all(result['count'] for result in stats.values())
     except Exception as e:
         print(f"Loopback test error: {e}")
         return False
@@ -89,7 +84,7 @@ def main():
         ("MQTT pub/sub", test_mqtt),
         ("Audio devices", test_audio_devices),
         ("Play success.wav", test_play_success),
-        ("Mic loopback", test_loopback)
+        ("Bridge latency probe", test_loopback)
     ]
 
     results = []
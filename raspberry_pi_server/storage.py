@@ -0,0 +1,305 @@
+"""
+Persistent match/session store.
+
+Creates the sessions, matches, stations and tournament_brackets tables plus
+the indexes from performance.DatabaseIndexes.schema_v2. Writes are queued
+and inserted by a background thread in batched transactions; the query
+functions below are shaped to hit those indexes.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (Column, Float, Integer, String, Table, and_, bindparam, case, func,
+                        select, text)
+from sqlalchemy.engine import Engine
+
+from db import metadata
+from performance import DatabaseIndexes
+
+logger = logging.getLogger(__name__)
+
+sessions = Table(
+    'sessions', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('session_id', String(64), nullable=False, unique=True),
+    Column('station_a', String(32), nullable=False),
+    Column('station_b', String(32), nullable=False),
+    Column('track', Integer),
+    Column('outcome', String(16), nullable=False),  # matched, mismatch, timeout
+    Column('created_at', Float, nullable=False),
+)
+
+matches = Table(
+    'matches', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('session_id', String(64), nullable=False),
+    Column('station_a', String(32), nullable=False),
+    Column('station_b', String(32), nullable=False),
+    Column('track', Integer, nullable=False),
+    Column('sync_time_ms', Float),
+    Column('winner', String(32)),
+    Column('created_at', Float, nullable=False),
+)
+
+stations = Table(
+    'stations', metadata,
+    Column('station_id', String(32), primary_key=True),
+    Column('status', String(16), nullable=False),  # online, offline, locked
+    Column('last_seen', Float, nullable=False),
+)
+
+tournament_brackets = Table(
+    'tournament_brackets', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('match_id', String(32), nullable=False, unique=True),
+    Column('round', Integer, nullable=False),
+    Column('status', String(16), nullable=False),  # pending, in_progress, completed
+    Column('station_a', String(32), nullable=False),
+    Column('station_b', String(32), nullable=False),
+    Column('winner', String(32)),
+    Column('sync_time_ms', Float),
+    Column('updated_at', Float, nullable=False),
+)
+
+ALL_ROUNDS = (1, 2, 3, 4, 5)  # tournament.TournamentRound values
+
+
+def create_schema(engine: Engine):
+    """Create tables and the schema_v2 indexes (idempotent)."""
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in DatabaseIndexes.schema_v2().split(';'):
+            lines = [line for line in statement.splitlines() if not line.strip().startswith('--')]
+            sql = '\n'.join(lines).strip()
+            if sql:
+                conn.execute(text(sql))
+
+
+class MatchStore:
+    """Batched background writer plus indexed queries."""
+
+    def __init__(self, engine: Engine, batch_size: int = 1000, flush_interval_s: float = 0.5,
+                 max_queue: int = 100000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        create_schema(engine)
+
+        self.queue: 'queue.Queue[Tuple[str, Dict[str, Any]]]' = queue.Queue(maxsize=max_queue)
+        self._writer = None
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.dropped = 0
+
+    # Writes (non-blocking; rows land within flush_interval_s)
+
+    def _enqueue(self, table: str, row: Dict[str, Any]):
+        try:
+            self.queue.put_nowait((table, row))
+        except queue.Full:
+            self.dropped += 1
+            logger.error(f"Storage queue full, dropped {table} row (total: {self.dropped})")
+
+    def record_session(self, station_a: str, station_b: str, outcome: str,
+                       track: Optional[int] = None, session_id: Optional[str] = None,
+                       created_at: Optional[float] = None) -> str:
+        session_id = session_id or uuid.uuid4().hex
+        self._enqueue('sessions', {
+            'session_id': session_id, 'station_a': station_a, 'station_b': station_b,
+            'track': track, 'outcome': outcome, 'created_at': created_at or time.time(),
+        })
+        return session_id
+
+    def record_match(self, session_id: str, station_a: str, station_b: str, track: int,
+                     sync_time_ms: Optional[float] = None, winner: Optional[str] = None,
+                     created_at: Optional[float] = None):
+        self._enqueue('matches', {
+            'session_id': session_id, 'station_a': station_a, 'station_b': station_b,
+            'track': track, 'sync_time_ms': sync_time_ms, 'winner': winner,
+            'created_at': created_at or time.time(),
+        })
+
+    def record_station(self, station_id: str, status: str, last_seen: Optional[float] = None):
+        self._enqueue('stations', {'station_id': station_id, 'status': status,
+                                   'last_seen': last_seen or time.time()})
+
+    def record_bracket_match(self, match):
+        """Store a tournament.Match (latest status wins)."""
+        self._enqueue('tournament_brackets', {
+            'match_id': match.match_id, 'round': match.round_num.value, 'status': match.status,
+            'station_a': match.station_a, 'station_b': match.station_b, 'winner': match.winner,
+            'sync_time_ms': match.sync_time_ms, 'updated_at': time.time(),
+        })
+
+    def start(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="storage-writer",
+                                            daemon=True)
+            self._writer.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    def _write_loop(self):
+        while not self._stop.is_set():
+            try:
+                first = self.queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval_s
+            batch = [first]
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def flush(self):
+        """Write everything queued so far on the calling thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        by_table: Dict[str, List[Dict[str, Any]]] = {}
+        station_rows: Dict[str, Dict[str, Any]] = {}
+        bracket_rows: Dict[str, Dict[str, Any]] = {}
+        for table, row in batch:
+            if table == 'stations':
+                station_rows[row['station_id']] = row  # coalesce to latest
+            elif table == 'tournament_brackets':
+                bracket_rows[row['match_id']] = row
+            else:
+                by_table.setdefault(table, []).append(row)
+
+        try:
+            with self._flush_lock, self.engine.begin() as conn:
+                for table, rows in by_table.items():
+                    conn.execute(metadata.tables[table].insert(), rows)
+                if station_rows:
+                    self._replace(conn, stations, stations.c.station_id, 'station_id', station_rows)
+                if bracket_rows:
+                    self._replace(conn, tournament_brackets, tournament_brackets.c.match_id,
+                                  'match_id', bracket_rows)
+        except Exception as e:
+            logger.error(f"Storage batch of {len(batch)} rows failed: {e}")
+            return
+        self.rows_written += len(batch)
+        self.batches_written += 1
+
+    @staticmethod
+    def _replace(conn, table, key_column, key, rows: Dict[str, Dict[str, Any]]):
+        conn.execute(table.delete().where(key_column.in_(list(rows))))
+        conn.execute(table.insert(), list(rows.values()))
+
+    # Queries
+
+    def recent_sessions(self, since: float, until: Optional[float] = None,
+                        limit: int = 100) -> List[Dict[str, Any]]:
+        """Sessions in a time window, newest first (idx_sessions_timestamp)."""
+        query = select(sessions).where(sessions.c.created_at >= since)
+        if until is not None:
+            query = query.where(sessions.c.created_at < until)
+        query = query.order_by(sessions.c.created_at.desc()).limit(limit)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def matches_for_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """All match rows of one session (idx_matches_session)."""
+        query = select(matches).where(matches.c.session_id == session_id)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def report_summary(self, since: float, until: float) -> Dict[str, Any]:
+        """
+        Aggregates for a report window. Sessions are range-scanned by time and
+        matches joined through idx_matches_session.
+        """
+        window = and_(sessions.c.created_at >= since, sessions.c.created_at < until)
+        totals = select(
+            func.count(sessions.c.id),
+            func.sum(case((sessions.c.outcome == 'matched', 1), else_=0)),
+        ).where(window)
+        # One pass over the joined rows, aggregated per track
+        per_track = (
+            select(matches.c.track, func.count(), func.count(matches.c.sync_time_ms),
+                   func.sum(matches.c.sync_time_ms), func.min(matches.c.sync_time_ms),
+                   func.max(matches.c.sync_time_ms))
+            .select_from(sessions.join(matches, matches.c.session_id == sessions.c.session_id))
+            .where(window)
+            .group_by(matches.c.track)
+        )
+        with self.engine.connect() as conn:
+            total_sessions, matched_sessions = conn.execute(totals).one()
+            rows = conn.execute(per_track).all()
+
+        timed = sum(row[2] for row in rows)
+        fastest = [row[4] for row in rows if row[4] is not None]
+        slowest = [row[5] for row in rows if row[5] is not None]
+        return {
+            'total_sessions': total_sessions,
+            'matched_sessions': matched_sessions or 0,
+            'total_matches': sum(row[1] for row in rows),
+            'avg_sync_time_ms': sum(row[3] or 0 for row in rows) / timed if timed else 0.0,
+            'fastest_sync_ms': min(fastest, default=0),
+            'slowest_sync_ms': max(slowest, default=0),
+            'track_count': {row[0]: row[1] for row in rows},
+        }
+
+    def stations_by_status(self, status: str, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Stations in a status, most recently seen first (idx_stations_status)."""
+        query = select(stations).where(stations.c.status == status)
+        if since is not None:
+            query = query.where(stations.c.last_seen >= since)
+        query = query.order_by(stations.c.last_seen.desc())
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def bracket_round(self, round_num: int, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Bracket matches of one round (idx_bracket_round)."""
+        query = select(tournament_brackets).where(tournament_brackets.c.round == round_num)
+        if status is not None:
+            query = query.where(tournament_brackets.c.status == status)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def leaderboard(self, round_num: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Wins and fastest sync per station from completed bracket matches (idx_bracket_round)."""
+        rounds = ALL_ROUNDS if round_num is None else (round_num,)
+        query = (
+            select(tournament_brackets.c.winner.label('station'),
+                   func.count().label('matches_won'),
+                   func.min(tournament_brackets.c.sync_time_ms).label('fastest_sync_ms'),
+                   func.avg(tournament_brackets.c.sync_time_ms).label('avg_sync_ms'))
+            .where(tournament_brackets.c.round.in_(bindparam('rounds', expanding=True)),
+                   tournament_brackets.c.status == 'completed',
+                   tournament_brackets.c.winner.is_not(None))
+            .group_by(tournament_brackets.c.winner)
+            .order_by(text('matches_won DESC'))
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query, {'rounds': list(rounds)})]
@@ -0,0 +1,61 @@
+import gzip
+
+import brotli
+import pytest
+from flask import Flask, render_template_string
+
+from dashboard.assets import IMMUTABLE_CACHE_CONTROL, AssetPipeline
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / 'app.js').write_text('console.log("blind date");\n' * 50)
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG fake')
+    app = Flask(__name__, static_folder=str(tmp_path))
+    pipeline = AssetPipeline(app)
+
+    @app.route('/page')
+    def page():
+        return render_template_string("{{ asset_url('app.js') }}")
+
+    return app.test_client(), pipeline
+
+def test_asset_url_is_fingerprinted(client):
+    test_client, pipeline = client
+    url = test_client.get('/page').get_data(as_text=True)
+    asset = pipeline.assets['app.js']
+    assert url == f'/assets/{asset.fingerprinted}'
+    assert asset.digest in url
+
+def test_serves_brotli_when_accepted(client):
+    test_client, pipeline = client
+    asset = pipeline.assets['app.js']
+    resp = test_client.get(f'/assets/{asset.fingerprinted}', headers={'Accept-Encoding': 'gzip, br'})
+    assert resp.headers['Content-Encoding'] == 'br'
+    assert resp.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert resp.headers['Vary'] == 'Accept-Encoding'
+    assert brotli.decompress(resp.data) == asset.variants['identity']
+
+def test_falls_back_to_gzip_and_identity(client):
+    test_client, pipeline = client
+    asset = pipeline.assets['app.js']
+    url = f'/assets/{asset.fingerprinted}'
+    resp = test_client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(resp.data) == asset.variants['identity']
+    resp = test_client.get(url)
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.data == asset.variants['identity']
+
+def test_binary_assets_not_compressed(client):
+    _, pipeline = client
+    assert set(pipeline.assets['logo.png'].variants) == {'identity'}
+
+def test_etag_revalidation_and_unknown_asset(client):
+    test_client, pipeline = client
+    asset = pipeline.assets['app.js']
+    url = f'/assets/{asset.fingerprinted}'
+    etag = test_client.get(url, headers={'Accept-Encoding': 'br'}).headers['ETag']
+    resp = test_client.get(url, headers={'Accept-Encoding': 'br', 'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert test_client.get('/assets/app.000000000000.js').status_code == 404
@@ -1,26 +1,154 @@
 import pytest
-from unittest.mock import patch, Mock
+import numpy as np
 from audio import AudioHandler
 import os
+import time
+
+def virtual_config():
+    return {
+        'audio': {'device_a': 0, 'device_b': 1},
+        'session': {'duration': 0, 'num_tracks': 5},
+        'backend': 'virtual',
+        'virtual_audio': {'devices': [{'name': 'A', 'record': True}, {'name': 'B', 'record': True}]},
+    }
+
+@pytest.fixture(autouse=True)
+def clip_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
 
 def test_audio_handler_init():
-    config = {'audio': {'device_a': 1, 'device_b': 2}}
-    with patch('sounddevice.InputStream'), patch('sounddevice.OutputStream'):
-        handler = AudioHandler(config)
-        assert handler.config == config
+    config = virtual_config()
+    handler = AudioHandler(config)
+    assert handler.config == config
 
 def test_generate_clips():
-    config = {'audio': {'device_a': 1, 'device_b': 2}}
-    with patch('sounddevice.InputStream'), patch('sounddevice.OutputStream'):
-        handler = AudioHandler(config)
-        # Check if clips are generated
-        assert os.path.exists('audio_clips/success.wav')
-
-@patch('sounddevice.play')
-@patch('sounddevice.wait')
-def test_play_wav(mock_wait, mock_play):
-    config = {'audio': {'device_a': 1, 'device_b': 2}}
-    with patch('sounddevice.InputStream'), patch('sounddevice.OutputStream'):
-        handler = AudioHandler(config)
-        handler.play_wav('audio_clips/success.wav', 1)
-        mock_play.assert_called_once()
\ No newline at end of file
+    handler = AudioHandler(virtual_config())
+    handler.clip_library.wait()
+    # Check if clips are generated
+    assert os.path.exists('audio_clips/success.wav')
+
+def test_play_wav():
+    handler = AudioHandler(virtual_config())
+    handler.clip_library.wait()
+    handler.play_wav('audio_clips/success.wav', 0)
+    handler.sd.run(0.1)
+    device_a, device_b = handler.sd.devices
+    assert np.abs(np.concatenate(device_a.recorded)).max() > 0.1
+    assert not np.concatenate(device_b.recorded).any()
+
+def test_bridge_carries_audio_between_virtual_stations():
+    config = virtual_config()
+    config['virtual_audio']['devices'][0]['input'] = 'noise'
+    handler = AudioHandler(config)
+    handler.start_bridging()
+    handler.sd.run(0.5)
+    handler.stop_bridging()
+    assert np.abs(np.concatenate(handler.sd.devices[1].recorded)).max() > 0.001
+    assert handler.bridge.stats()['latency_p50_ms'] > 0
+
+def test_probe_latency_between_sessions():
+    handler = AudioHandler(virtual_config())
+    stats = handler.probe_latency(advance=handler.sd.run)
+    assert stats['a->b']['count'] == 1 and stats['b->a']['count'] == 1
+    assert not handler.bridge.connected
+    handler.session_active = True
+    assert handler.probe_latency(advance=handler.sd.run) is None
+
+def test_probe_between_sessions_does_not_route_the_booths():
+    config = virtual_config()
+    for device in config['virtual_audio']['devices']:
+        device['input'] = np.full(1024, 0.5, np.float32)  # a loud, steady booth
+    handler = AudioHandler(config)
+    stats = handler.probe_latency(advance=handler.sd.run)
+    assert stats['a->b']['count'] == 1 and stats['b->a']['count'] == 1
+    for device in handler.sd.devices:
+        # Only the chirp (level 0.25) reached the other booth
+        assert np.abs(np.concatenate(device.recorded)).max() < 0.3
+    assert not handler.bridge.private
+
+def test_auto_blocksize_is_tuned_once_per_hardware(tmp_path):
+    config = virtual_config()
+    config['audio'].update({'blocksize': 'auto', 'samplerate': 48000,
+                            'autotune': {'trial_s': 1.0, 'state_file': str(tmp_path / 'tuning.json')}})
+    handler = AudioHandler(config)
+    assert handler.rate == handler.bridge.samplerate == 48000
+    assert handler.chunk == 1024 and handler.needs_autotune
+    handler.clip_library.wait()
+    tuned = handler.autotune(run_trial=handler.sd.run)
+    assert tuned in (1024, 512, 256, 128) and handler.bridge.blocksize == tuned
+
+    restarted = AudioHandler(config)
+    assert not restarted.needs_autotune
+    assert restarted.chunk == restarted.bridge.blocksize == tuned
+
+def test_devices_given_by_name():
+    config = virtual_config()
+    config['virtual_audio']['devices'] = [{'name': 'Virtual Station A'}, {'name': 'Virtual Station B'}]
+    config['audio'].update({'device_a': 'Station A', 'device_b': 'Virtual Station B'})
+    handler = AudioHandler(config)
+    assert (handler.devices.device_for('a'), handler.devices.device_for('b')) == (0, 1)
+
+def test_session_runs_off_the_calling_thread():
+    config = virtual_config()
+    config['session']['duration'] = 60
+    handler = AudioHandler(config)
+    handler.clip_library.wait()
+    session = handler.play_success_and_bridge()
+    assert session.is_alive() and handler.session_active  # the MQTT callback is not held
+    while not handler.bridge.connected:
+        handler.sd.run(0.05)  # plays the success cue
+    handler.stop_bridging()  # a reset ends the session early
+    session.join(timeout=5)
+    assert not session.is_alive()
+    assert not handler.session_active and not handler.bridge.connected
+
+def test_session_starting_mid_probe_takes_over_the_bridge():
+    config = virtual_config()
+    config['session']['duration'] = 60
+    handler = AudioHandler(config)
+    handler.clip_library.wait()
+    sessions = []
+
+    def advance(seconds):
+        if not sessions:
+            sessions.append(handler.play_success_and_bridge())  # a match arrives mid-probe
+            handler.sd.run(2.0)  # the success cue plays out
+            time.sleep(0.2)  # and the session thread reaches the bridge
+        handler.sd.run(seconds)
+
+    handler.probe_latency(advance=advance)
+    session, = sessions
+    while not handler.bridging:
+        handler.sd.run(0.05)
+    assert handler.bridge.connected and not handler.bridge.private  # the session is audible
+    handler.sd.run(0.5)
+    assert handler.bridge.connected
+    handler.stop_bridging()
+    session.join(timeout=5)
+    assert not session.is_alive()
+
+def test_session_starting_mid_autotune_waits_for_it(tmp_path):
+    config = virtual_config()
+    config['session']['duration'] = 60
+    config['audio'].update({'blocksize': 'auto',
+                            'autotune': {'trial_s': 0.5, 'state_file': str(tmp_path / 'tuning.json')}})
+    handler = AudioHandler(config)
+    handler.clip_library.wait()
+    sessions = []
+
+    def trial(seconds):
+        if not sessions:
+            sessions.append(handler.play_success_and_bridge())
+            handler.sd.run(2.0)
+            time.sleep(0.2)
+        handler.sd.run(seconds)
+
+    assert handler.autotune(run_trial=trial) is not None
+    session, = sessions
+    while not handler.bridging:
+        handler.sd.run(0.05)
+    assert handler.bridge.connected and not handler.bridge.private
+    assert handler.autotune(run_trial=handler.sd.run) is None  # never during a session
+    handler.stop_bridging()
+    session.join(timeout=5)
+    assert not session.is_alive()
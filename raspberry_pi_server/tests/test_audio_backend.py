@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pytest
+
+from audio_backend import NullBackend, VirtualBackend, create_backend
+
+
+def counting_stream(backend, device, blocksize=100, **kwargs):
+    calls = []
+    stream = backend.Stream(device=device, samplerate=1000, blocksize=blocksize, channels=1,
+                            callback=lambda indata, outdata, frames, time_info, status:
+                            calls.append((indata.copy(), time_info.currentTime, bool(status))), **kwargs)
+    stream.start()
+    return stream, calls
+
+
+def test_simulated_clock_applies_drift():
+    backend = VirtualBackend([{'name': 'A'}, {'name': 'B', 'drift_ppm': 10000}])
+    _, calls_a = counting_stream(backend, 0)
+    _, calls_b = counting_stream(backend, 1)
+    start = time.perf_counter()
+    backend.run(100.0)
+    assert time.perf_counter() - start < 5  # far faster than real time
+    assert len(calls_a) == 1000
+    assert len(calls_b) == 1010
+    assert calls_a[0][1] == pytest.approx(0.1)
+
+
+def test_xrun_injection_and_loopback_input():
+    backend = VirtualBackend([{'name': 'A', 'input': 'loopback', 'xrun_rate': 0.5}], seed=1)
+
+    def callback(indata, outdata, frames, time_info, status):
+        outdata.fill(0.5)
+
+    stream = backend.Stream(device=0, samplerate=1000, blocksize=10, callback=callback)
+    stream.start()
+    backend.run(1.0)
+    assert 30 < stream.xruns < 70
+    assert stream.indata.max() in (0.0, 0.5)  # previous block's output, or zeroed by an xrun
+
+
+def test_array_input_loops_and_failure_fires_finished_callback():
+    finished = []
+    backend = VirtualBackend([{'name': 'A', 'input': np.arange(3.0)}])
+    stream, calls = counting_stream(backend, 0, blocksize=2, finished_callback=lambda: finished.append(1))
+    backend.run(0.006)
+    assert [block.ravel().tolist() for block, _, _ in calls] == [[0, 1], [2, 0], [1, 2]]
+    stream.fail()
+    backend.run(1.0)
+    assert finished == [1] and len(calls) == 3
+
+
+def test_realtime_clock_and_null_backend():
+    backend = VirtualBackend(1, realtime=True, speed=10.0)
+    _, calls = counting_stream(backend, 0)
+    time.sleep(0.2)
+    backend.stop_clock()
+    assert calls
+
+    null = NullBackend()
+    _, calls = counting_stream(null, 1)
+    null.run(10.0)
+    assert calls == []
+    assert len(null.query_devices()) == 2
+
+
+def test_create_backend_by_name():
+    assert isinstance(create_backend({'backend': 'virtual', 'virtual_audio': {'devices': 3}}), VirtualBackend)
+    assert isinstance(create_backend({'backend': 'null'}), NullBackend)
+    with pytest.raises(ValueError):
+        create_backend({'backend': 'alsa'})
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+
+from audio_devices import AudioDeviceManager
+
+
+def fake_sd(devices, default=0):
+    # attached: the hardware; listed: PortAudio's list, refreshed only by re-initialisation
+    sd = SimpleNamespace(attached=list(devices), listed=list(devices), initializations=0,
+                         default=SimpleNamespace(device=[default, default]))
+    sd.query_devices = lambda: [dict(name=name, max_input_channels=ins, max_output_channels=outs)
+                                for name, ins, outs in sd.listed]
+    sd._terminate = lambda: None
+
+    def initialize():
+        sd.listed = list(sd.attached)
+        sd.initializations += 1
+    sd._initialize = initialize
+    return sd
+
+DEVICES = [
+    ('bcm2835 Headphones', 0, 2),
+    ('USB Audio Device A', 1, 2),
+    ('USB Audio Device B', 1, 2),
+    ('Built-in duplex', 2, 2),
+]
+
+def test_resolve_by_index_and_name():
+    manager = AudioDeviceManager({'audio': {'device_a': 1, 'device_b': 'device b'}}, fake_sd(DEVICES))
+    assert manager.device_for('a') == 1
+    assert manager.device_for('b') == 2
+    assert manager.resolve(0) is None  # output-only device can't bridge
+
+def test_failover_tries_fallback_then_default():
+    config = {'audio': {'device_a': 1, 'device_b': 2, 'fallback_device': 'Built-in'}}
+    manager = AudioDeviceManager(config, fake_sd(DEVICES, default=2))
+    manager.device_for('a')
+    tried = []
+
+    def open_fn(device):
+        tried.append(device)
+        if device == 3:
+            raise OSError('device busy')
+        return f"stream-{device}"
+
+    assert manager.failover('a', open_fn) == 'stream-2'
+    assert tried == [3, 2]
+    assert manager.bound['a'] == 2
+    assert manager.failovers == 1
+    assert manager.failover_histogram.count >= 1
+
+def test_failover_never_takes_the_other_stations_device():
+    config = {'audio': {'device_a': 1, 'device_b': 2, 'fallback_device': 'Built-in'}}
+    manager = AudioDeviceManager(config, fake_sd(DEVICES, default=2))
+    manager.device_for('a')
+    manager.device_for('b')
+    tried = []
+
+    def open_fn(device):
+        tried.append(device)
+        raise OSError('device busy')
+
+    with pytest.raises(RuntimeError):
+        manager.failover('a', open_fn)
+    # fallback, then the failed device (again after a rescan); never B's device 2
+    assert tried == [3, 1, 3, 1]
+    assert manager.bound == {'a': 1, 'b': 2}
+
+def test_name_specs_and_output_only_default():
+    manager = AudioDeviceManager({'audio': {'device_a': 'device a', 'device_b': 'device b'}},
+                                 fake_sd(DEVICES, default=0))
+    assert manager.default_device() is None  # headphones can't capture
+    assert (manager.device_for('a'), manager.device_for('b')) == (1, 2)
+
+def test_failover_retries_failed_device_last_and_raises_when_exhausted():
+    manager = AudioDeviceManager({'audio': {'device_a': 1}}, fake_sd(DEVICES, default=-1))
+    manager.device_for('a')
+    with pytest.raises(RuntimeError):
+        manager.failover('a', lambda device: (_ for _ in ()).throw(OSError('gone')))
+
+def test_failover_rescans_for_a_reattached_device():
+    sd = fake_sd(DEVICES, default=-1)
+    manager = AudioDeviceManager({'audio': {'device_a': 'device a', 'device_b': 'device b'}}, sd)
+    assert (manager.device_for('a'), manager.device_for('b')) == (1, 2)
+
+    def open_fn(device):
+        name = sd.listed[device][0]
+        if name not in [attached[0] for attached in sd.attached]:
+            raise OSError('unplugged')
+        return name
+
+    sd.attached = [DEVICES[0], DEVICES[2], DEVICES[3]]  # A unplugged
+    with pytest.raises(RuntimeError):
+        manager.failover('a', open_fn)
+    assert sd.initializations == 1
+
+    sd.attached.append(DEVICES[1])  # A plugged back in, at a new index
+    assert manager.failover('a', open_fn) == 'USB Audio Device A'
+    assert manager.bound['a'] == 3 and sd.initializations == 2
@@ -0,0 +1,76 @@
+import json
+
+from audio_backend import VirtualBackend
+from audio_devices import AudioDeviceManager
+from autotune import AutoTuner
+from bridge import DuplexBridge
+
+
+def make_tuner(tmp_path, overhead_s=0.0, **kwargs):
+    backend = VirtualBackend([
+        {'name': 'Station A', 'input': 'noise', 'callback_overhead_s': overhead_s},
+        {'name': 'Station B', 'input': 'noise', 'callback_overhead_s': overhead_s},
+    ])
+    devices = AudioDeviceManager({'audio': {'device_a': 0, 'device_b': 1}}, backend)
+    bridge = DuplexBridge(devices, backend, blocksize=1024)
+    tuner = AutoTuner(bridge, run_trial=backend.run, trial_s=2.0,
+                      state_file=str(tmp_path / 'tuning.json'), **kwargs)
+    return tuner, bridge
+
+
+def test_settles_on_smallest_block_size_when_all_are_stable(tmp_path):
+    tuner, bridge = make_tuner(tmp_path)
+    assert tuner.tune() == 128
+    assert bridge.blocksize == 128
+    assert [trial['blocksize'] for trial in tuner.trials] == [1024, 512, 256, 128]
+    assert all(trial['stable'] and trial['callbacks'] > 0 for trial in tuner.trials)
+    assert not bridge.connected and not bridge.private
+
+
+def test_trials_do_not_route_the_microphones(tmp_path):
+    tuner, bridge = make_tuner(tmp_path)
+    heard = []
+    bridge.playback_taps['b'] = lambda outdata, time_info: heard.append(float(abs(outdata).max()))
+    tuner.trial_s = 0.5
+    tuner.tune()
+    assert heard and max(heard) == 0.0  # station A's noise never reached B
+
+
+def test_stops_at_first_block_size_that_xruns(tmp_path):
+    # 4ms of host cost per callback: 256 frames (5.8ms) keep up, 128 (2.9ms) do not
+    tuner, bridge = make_tuner(tmp_path, overhead_s=0.004)
+    assert tuner.tune() == 256
+    assert bridge.blocksize == 256
+    assert tuner.trials[-1]['blocksize'] == 128
+    assert tuner.trials[-1]['xruns'] > 0 and not tuner.trials[-1]['stable']
+
+
+def test_callback_load_limit(tmp_path):
+    tuner, _ = make_tuner(tmp_path, max_load=0.0)
+    assert tuner.tune() == 1024  # nothing is stable: keep the largest
+    assert len(tuner.trials) == 1
+
+
+def test_result_is_persisted_per_hardware(tmp_path):
+    tuner, bridge = make_tuner(tmp_path, overhead_s=0.004)
+    assert tuner.load() is None
+    tuner.tune()
+    assert tuner.load() == 256
+    state = json.load(open(tmp_path / 'tuning.json'))
+    (key, entry), = state.items()
+    assert 'Station A|Station B@44100' in key
+    assert entry['blocksize'] == 256 and len(entry['trials']) == 4
+
+    other, _ = make_tuner(tmp_path)
+    other.bridge.samplerate = 48000
+    assert other.load() is None  # a different rate is tuned separately
+
+
+def test_probe_follows_reconfigured_bridge(tmp_path):
+    from latency_probe import LatencyProbe
+    tuner, bridge = make_tuner(tmp_path)
+    probe = LatencyProbe(bridge)
+    tuner.tune()
+    bridge.connect()
+    assert probe.measure('a', advance=bridge.devices.sd.run) is not None
+    assert probe.scratch.shape[0] == 128
@@ -0,0 +1,115 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from audio_devices import AudioDeviceManager
+from bridge import DuplexBridge
+
+DEVICES = [('USB Audio Device A', 1, 2), ('USB Audio Device B', 1, 2), ('Built-in duplex', 2, 2)]
+
+
+class FakeStream:
+    def __init__(self, device, callback, finished_callback, blocksize, channels, **kwargs):
+        self.device = device
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.blocksize = blocksize
+        self.channels = channels
+        self.active = False
+
+    def start(self):
+        self.active = True
+
+    def abort(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+    def tick(self, value, adc_lag=0.004, dac_lead=0.006, status=None):
+        """Run one callback period with a constant-valued input block."""
+        indata = np.full((self.blocksize, self.channels), value, dtype=np.float32)
+        outdata = np.empty_like(indata)
+        now = 100.0
+        time_info = SimpleNamespace(currentTime=now, inputBufferAdcTime=now - adc_lag,
+                                    outputBufferDacTime=now + dac_lead)
+        self.callback(indata, outdata, self.blocksize, time_info, status)
+        return outdata
+
+
+def make_bridge(**kwargs):
+    opened = []
+
+    def stream(**stream_kwargs):
+        opened.append(FakeStream(**stream_kwargs))
+        return opened[-1]
+
+    sd = SimpleNamespace(
+        query_devices=lambda: [dict(name=name, max_input_channels=ins, max_output_channels=outs)
+                               for name, ins, outs in DEVICES],
+        default=SimpleNamespace(device=[2, 2]),
+        Stream=stream,
+    )
+    devices = AudioDeviceManager({'audio': {'device_a': 0, 'device_b': 1}}, sd)
+    return DuplexBridge(devices, sd, blocksize=64, **kwargs), opened
+
+
+def test_blocks_cross_between_callbacks_with_latency():
+    bridge, opened = make_bridge()
+    bridge.connect()
+    stream_a, stream_b = opened
+    assert (stream_a.device, stream_b.device) == (0, 1)
+
+    assert not stream_b.tick(0.0).any()  # nothing captured at A yet: priming
+    stream_a.tick(0.5)
+    assert np.all(stream_b.tick(0.0) == 0.5)
+    stats = bridge.stats()
+    assert stats['directions']['a']['underruns'] == 0
+    assert 10.0 <= bridge.last_latency_ms < 20.0  # 4ms capture + 1.5ms queued + 6ms playback
+    assert stats['latency_p50_ms'] > 0
+    bridge.stop()
+    assert not stream_a.active and not stream_b.active
+
+
+def test_overrun_drops_newest_block():
+    bridge, opened = make_bridge(max_queue_blocks=2)
+    bridge.connect()
+    stream_a, stream_b = opened
+    for value in (0.1, 0.2, 0.3):
+        stream_a.tick(value)
+    assert bridge.stats()['directions']['a']['overruns'] == 1
+    assert np.allclose(stream_b.tick(0.0), 0.1)
+    assert np.allclose(stream_b.tick(0.0), 0.2)
+
+
+def test_finished_stream_fails_over_to_next_device():
+    bridge, opened = make_bridge()
+    bridge.start()
+    broken = opened[0]
+    broken.finished_callback()
+    broken.finished_callback()  # a second notification must not fail over twice
+    deadline = time.time() + 2
+    while bridge.streams.get('a') in (None, broken) and time.time() < deadline:
+        time.sleep(0.01)
+    assert bridge.streams['a'].device == 2
+    assert bridge.devices.failovers == 1
+    bridge.stop()
+
+
+def test_mixer_plays_while_disconnected_and_mixes_over_bridge():
+    bridge, opened = make_bridge()
+    bridge.start()
+    stream_a, stream_b = opened
+    bridge.mixers['b'].play(np.full((64, 1), 0.25, dtype=np.float32), name='cue')
+    stream_a.tick(0.5)  # not connected: mic audio stays local
+    assert np.allclose(stream_b.tick(0.0), 0.25)
+    assert not stream_b.tick(0.0).any()
+
+    bridge.connect()
+    bridge.mixers['b'].play(np.full((64, 1), 0.25, dtype=np.float32), name='cue')
+    stream_a.tick(0.5)
+    assert np.allclose(stream_b.tick(0.0), 0.75)
+    bridge.disconnect()
+    stream_a.tick(0.5)
+    assert not stream_b.tick(0.0).any()
@@ -0,0 +1,57 @@
+import json
+import os
+
+from clip_manifest import DEFAULT_MANIFEST, STATE_FILE, ClipLibrary, clip_digest
+from clip_store import ClipStore, read_wav_info
+
+MANIFEST = {
+    'beep': {'generator': 'tone', 'params': {'frequency': 1000, 'duration': 0.1}},
+    'track1': {'generator': 'procedural', 'params': {'method': 'track_1', 'duration': 0.2}},
+}
+
+
+def test_missing_clips_are_built_in_pool_and_mapped_lazily(tmp_path):
+    library = ClipLibrary(ClipStore(str(tmp_path), samplerate=8000), MANIFEST, max_workers=2)
+    assert sorted(library.prepare()) == ['beep', 'track1']
+    assert library.get('beep').shape == (800, 1)
+    library.wait()
+    assert library.built == 2
+    assert read_wav_info(str(tmp_path / 'track1.wav')).format_tag == 3  # float32: mapped as is
+    with open(tmp_path / STATE_FILE) as f:
+        assert set(json.load(f)) == {'beep', 'track1'}
+
+    again = ClipLibrary(ClipStore(str(tmp_path), samplerate=8000), MANIFEST)
+    assert again.prepare() == []
+    assert again.get('track1').shape == (1600, 1)
+
+
+def test_changed_params_or_rate_regenerate_only_that_clip(tmp_path):
+    first = ClipLibrary(ClipStore(str(tmp_path), samplerate=8000), MANIFEST)
+    first.prepare()
+    first.wait()
+    changed = dict(MANIFEST, beep={'generator': 'tone', 'params': {'frequency': 500, 'duration': 0.2}})
+    library = ClipLibrary(ClipStore(str(tmp_path), samplerate=8000), changed)
+    assert library.stale() == ['beep']
+    library.prepare()
+    assert len(library.get('beep')) == 1600
+
+    os.remove(tmp_path / 'track1.wav')
+    assert library.stale() == ['track1']
+    assert clip_digest(MANIFEST['beep'], 8000, 1) != clip_digest(MANIFEST['beep'], 44100, 1)
+
+
+def test_default_manifest_covers_tracks_and_cues():
+    assert {f'track{i}' for i in range(1, 6)} | {'success', 'mismatch', 'timeout'} == set(DEFAULT_MANIFEST)
+    for entry in DEFAULT_MANIFEST.values():
+        clip_digest(entry, 44100, 1)  # every generator/method resolves
+
+
+def test_foreign_wav_with_matching_state_is_rebuilt(tmp_path):
+    library = ClipLibrary(ClipStore(str(tmp_path), samplerate=8000), MANIFEST)
+    library.prepare()
+    library.wait()
+    # A 16-bit file dropped in place of the generated clip (e.g. a legacy checkout)
+    with open(tmp_path / 'track1.wav', 'wb') as f:
+        f.write(b'RIFF\x24\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01\x00\x01\x00\x40\x1f\x00\x00'
+                b'\x80\x3e\x00\x00\x02\x00\x10\x00data\x00\x00\x00\x00')
+    assert library.stale() == ['track1']
@@ -0,0 +1,57 @@
+import os
+import wave
+
+import numpy as np
+
+from clip_store import ClipStore, read_wav_info, write_float_wav
+from performance import AudioPreloader
+
+
+def write_pcm(path, samples, rate):
+    with wave.open(str(path), 'w') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.int16(samples * 32767).tobytes())
+
+
+def test_pcm_is_resampled_once_and_mapped_read_only(tmp_path):
+    write_pcm(tmp_path / 'track1.wav', np.linspace(-0.5, 0.5, 2205), 22050)
+    store = ClipStore(str(tmp_path), samplerate=44100)
+    clip = store.get('track1')
+    assert clip.shape == (4410, 1) and clip.dtype == np.float32
+    assert not clip.flags.writeable
+    assert abs(clip[0, 0] + 0.5) < 1e-3 and abs(clip[-1, 0] - 0.5) < 1e-3
+    assert store.get('track1') is clip
+    assert read_wav_info(os.path.join(store.cache_dir, 'track1.44100hz1ch.wav')).format_tag == 3
+
+    other = ClipStore(str(tmp_path), samplerate=44100)  # e.g. another process
+    assert np.array_equal(other.get('track1'), clip)
+    assert other.conversions == 0
+
+
+def test_changed_source_is_converted_again(tmp_path):
+    write_pcm(tmp_path / 'success.wav', np.zeros(100), 44100)
+    store = ClipStore(str(tmp_path))
+    store.get('success')
+    write_pcm(tmp_path / 'success.wav', np.zeros(300), 44100)
+    os.utime(tmp_path / 'success.wav', ns=(0, 10**18))
+    store.invalidate('success')
+    assert len(store.get('success')) == 300
+    assert store.conversions == 2
+
+
+def test_float_wav_at_device_rate_is_mapped_directly(tmp_path):
+    samples = np.linspace(0, 1, 64, dtype=np.float32).reshape(-1, 1)
+    write_float_wav(str(tmp_path / 'cue.wav'), samples, 44100)
+    store = ClipStore(str(tmp_path))
+    assert np.array_equal(store.get('cue'), samples)
+    assert store.conversions == 0
+    assert not os.path.exists(store.cache_dir)
+
+
+def test_preloader_finds_track_files(tmp_path):
+    write_pcm(tmp_path / 'track2.wav', np.zeros(441), 44100)
+    preloader = AudioPreloader(str(tmp_path))
+    assert preloader.get_audio(2)['duration_s'] == 0.01
+    assert preloader.get_audio(3) is None
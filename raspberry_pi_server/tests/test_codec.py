@@ -0,0 +1,42 @@
+import msgpack
+
+from dashboard import app as dashboard
+from dashboard import codec
+
+
+def received(client, name):
+    return [msg['args'][0] for msg in client.get_received() if msg['name'] == name]
+
+def test_negotiate_falls_back_to_json():
+    assert codec.negotiate({'codec': 'msgpack'}) == 'msgpack'
+    assert codec.negotiate({'codec': 'cbor'}) == 'json'
+    assert codec.negotiate(None) == 'json'
+
+def test_clients_receive_their_codec():
+    json_client = dashboard.socketio.test_client(dashboard.app)
+    msgpack_client = dashboard.socketio.test_client(dashboard.app, auth={'codec': 'msgpack'})
+    try:
+        json_client.get_received()
+        msgpack_client.get_received()
+
+        dashboard.update_state({'countdown': 17})
+
+        [json_state] = received(json_client, 'status_update')
+        [packed_state] = received(msgpack_client, 'status_update')
+        assert json_state['countdown'] == 17
+        assert isinstance(packed_state, bytes)
+        assert msgpack.unpackb(packed_state) == json_state
+    finally:
+        json_client.disconnect()
+        msgpack_client.disconnect()
+    assert codec.client_count('msgpack') == 0
+
+def test_index_loads_decoder_from_fingerprinted_assets():
+    dashboard.page_cache.pages.clear()
+    client = dashboard.app.test_client()
+    page = client.get('/', base_url='https://localhost').get_data(as_text=True)
+    decoder = dashboard.app.extensions['asset_pipeline'].assets['msgpack.js']
+    assert f'/assets/{decoder.fingerprinted}' in page
+    assert 'unpkg.com' not in page
+    response = client.get(f'/assets/{decoder.fingerprinted}', base_url='https://localhost')
+    assert response.status_code == 200 and b'MessagePack' in response.data
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from dsp import DSPPipeline, PolyphaseResampler
+
+
+@pytest.mark.parametrize('rates', [(44100, 16000), (16000, 44100), (48000, 16000)])
+def test_streaming_resampler_matches_one_shot_upfirdn(rates):
+    resampler = PolyphaseResampler(*rates)
+    x = np.random.default_rng(0).standard_normal(5000).astype(np.float32)
+    out = np.concatenate([resampler.process(x[i:i + 256]) for i in range(0, len(x), 256)])
+    max_rate = max(resampler.up, resampler.down)
+    h = signal.firwin(20 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * resampler.up
+    reference = signal.upfirdn(h, x, resampler.up, resampler.down)
+    assert len(out) == -(-len(x) * rates[1] // rates[0])
+    np.testing.assert_allclose(out, reference[:len(out)], atol=1e-5)
+
+
+def test_voice_band_pipeline_keeps_block_size_and_tone():
+    pipeline = DSPPipeline(44100, processing_rate=16000)
+    t = np.arange(44100) / 44100
+    tone = (np.sin(2 * np.pi * 1000 * t) * 8000).astype(np.int16)
+    out = [pipeline.process_incoming(tone[i:i + 256])[0] for i in range(0, len(tone) - 255, 256)]
+    assert all(len(block) == 256 and block.dtype == np.int16 for block in out)
+    settled = np.concatenate(out)[22050:].astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(settled))
+    peak_hz = np.argmax(spectrum) * 44100 / len(settled)
+    assert abs(peak_hz - 1000) < 5
+
+
+def test_voice_band_path_drops_content_above_8khz():
+    pipeline = DSPPipeline(44100, processing_rate=16000)
+    t = np.arange(44100) / 44100
+    tone = (np.sin(2 * np.pi * 12000 * t) * 8000).astype(np.int16)
+    out = np.concatenate([pipeline.process_incoming(tone[i:i + 256])[0]
+                          for i in range(0, len(tone) - 255, 256)])
+    assert np.abs(out[22050:]).max() < 100
@@ -0,0 +1,49 @@
+import os
+
+from event_log import HEADER, EventLog, segment_name
+from events import EventType, create_event
+
+
+def payloads(log, offset=0):
+    return [payload for _, payload in log.replay(offset)]
+
+def test_append_and_replay_from_offset(tmp_path):
+    log = EventLog(str(tmp_path), fsync_interval_s=0)
+    offsets = [log.append(f"event-{i}".encode()) for i in range(10)]
+    assert payloads(log) == [f"event-{i}".encode() for i in range(10)]
+    assert payloads(log, offsets[7]) == [b"event-7", b"event-8", b"event-9"]
+    assert payloads(log, log.end_offset) == []
+    log.close()
+
+def test_rotates_segments_by_size(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=64, fsync_interval_s=0)
+    offsets = [log.append(b"x" * 20) for _ in range(10)]
+    assert len(log.segments) > 1
+    assert sorted(os.listdir(tmp_path)) == [segment_name(base) for base in log.segments]
+    assert [o for o, _ in log.replay(offsets[4])] == offsets[4:]
+    log.close()
+
+def test_reopen_truncates_torn_tail(tmp_path):
+    log = EventLog(str(tmp_path), fsync_interval_s=0)
+    log.append(b"first")
+    log.append(b"second")
+    log.close()
+    path = os.path.join(tmp_path, segment_name(0))
+    with open(path, 'ab') as f:
+        f.write(HEADER.pack(100, 0) + b"partial")  # crash mid-write
+
+    log = EventLog(str(tmp_path), fsync_interval_s=0)
+    assert payloads(log) == [b"first", b"second"]
+    log.append(b"third")
+    assert payloads(log) == [b"first", b"second", b"third"]
+    log.close()
+
+def test_read_pages_events(tmp_path):
+    log = EventLog(str(tmp_path), fsync_interval_s=0)
+    for track in range(5):
+        log.append_event(create_event(EventType.MATCHED, track_id=track))
+    first, next_offset = log.read(0, limit=3)
+    rest, end = log.read(next_offset, limit=3)
+    assert [e['data']['track_id'] for e in first + rest] == [0, 1, 2, 3, 4]
+    assert end == log.end_offset
+    log.close()
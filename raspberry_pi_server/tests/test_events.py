@@ -0,0 +1,191 @@
+import asyncio
+import json
+import threading
+
+import pytest
+import pytest_asyncio
+
+from events import Event, EventBus, EventType, OverflowPolicy, StationLockedEvent, create_event
+
+
+def make_event(session_id=""):
+    return Event(type=EventType.HEARTBEAT, session_id=session_id)
+
+@pytest_asyncio.fixture
+async def bus():
+    bus = EventBus()
+    yield bus
+    await bus.close()
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_delay_others(bus):
+    fast_received = []
+    release = asyncio.Event()
+
+    async def slow(event):
+        await release.wait()
+
+    bus.subscribe(EventType.HEARTBEAT, slow, maxsize=10)
+    bus.subscribe(EventType.HEARTBEAT, fast_received.append)
+
+    for _ in range(5):
+        await bus.publish(make_event())
+    await asyncio.sleep(0.01)
+    assert len(fast_received) == 5
+
+    release.set()
+    await bus.drain()
+    assert all(s['delivered'] == 5 for s in bus.stats().values())
+
+@pytest.mark.asyncio
+async def test_drop_oldest_policy(bus):
+    received = []
+    sub = bus.subscribe(EventType.HEARTBEAT, lambda e: received.append(e.session_id),
+                        maxsize=2, overflow=OverflowPolicy.DROP_OLDEST)
+    for i in range(5):
+        await bus.publish(make_event(str(i)))  # consumer has no chance to run in between
+    await bus.drain()
+    assert received == ['3', '4']
+    assert sub.dropped == 3
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_keeps_latest_per_session(bus):
+    received = []
+    sub = bus.subscribe(EventType.HEARTBEAT, lambda e: received.append(e.session_id),
+                        overflow=OverflowPolicy.COALESCE)
+    for session_id in ['a', 'b', 'a', 'a', 'c']:
+        await bus.publish(make_event(session_id))
+    await bus.drain()
+    assert received == ['a', 'b', 'c']
+    assert sub.coalesced == 2
+
+@pytest.mark.asyncio
+async def test_block_policy_applies_backpressure(bus):
+    release = asyncio.Event()
+
+    async def slow(event):
+        await release.wait()
+
+    sub = bus.subscribe(EventType.HEARTBEAT, slow, maxsize=1)
+    await bus.publish(make_event())  # taken by the consumer
+    await asyncio.sleep(0)
+    await bus.publish(make_event())  # fills the queue
+    blocked = asyncio.ensure_future(bus.publish(make_event()))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await bus.drain()
+    assert sub.delivered == 3 and sub.dropped == 0
+
+@pytest.mark.asyncio
+async def test_history_recorded_without_subscribers():
+    bus = EventBus(max_history=3)
+    for i in range(5):
+        await bus.publish(make_event(str(i)))
+    assert [e['session_id'] for e in bus.get_history()] == ['2', '3', '4']
+    await bus.close()
+
+def test_publish_threadsafe_batches_and_keeps_producer_order():
+    bus = EventBus(max_history=4000)
+    loop = bus.start_in_thread()
+    received = []
+    asyncio.run_coroutine_threadsafe(
+        _subscribe(bus, lambda e: received.append(e.session_id)), loop).result(1)
+
+    def produce(name):
+        for i in range(1000):
+            bus.publish_threadsafe(make_event(f"{name}:{i}"))
+
+    producers = [threading.Thread(target=produce, args=(name,)) for name in 'abc']
+    for t in producers:
+        t.start()
+    for t in producers:
+        t.join()
+    asyncio.run_coroutine_threadsafe(_settle(bus), loop).result(5)
+    bus.stop()
+
+    assert len(received) == 3000
+    for name in 'abc':
+        seqs = [int(s.split(':')[1]) for s in received if s.startswith(name + ':')]
+        assert seqs == list(range(1000))
+    assert bus.threadsafe_events == 3000
+    assert bus.threadsafe_batches < 3000
+
+def test_publish_threadsafe_requires_loop():
+    with pytest.raises(RuntimeError):
+        EventBus().publish_threadsafe(make_event())
+
+async def _subscribe(bus, callback):
+    return bus.subscribe(EventType.HEARTBEAT, callback, maxsize=4000)
+
+async def _settle(bus):
+    while bus._wakeup_scheduled:
+        await asyncio.sleep(0.001)
+    await bus.drain()
+
+def test_typed_events_use_slots_and_cache_json():
+    event = create_event(EventType.STATION_LOCKED, station_id='A', track_id=3, session_id='s1')
+    assert isinstance(event, StationLockedEvent)
+    assert not hasattr(event, '__dict__')
+    assert event.to_json() is event.to_json()
+    assert json.loads(event.to_json()) == event.to_dict() == {
+        'type': 'station_locked', 'timestamp': event.timestamp, 'session_id': 's1',
+        'data': {'station_id': 'A', 'track_id': 3}}
+    with pytest.raises(TypeError):
+        create_event(EventType.MATCHED, station_id='A')
+
+@pytest.mark.asyncio
+async def test_history_json_matches_history(bus):
+    await bus.publish(create_event(EventType.MATCHED, track_id=2))
+    await bus.publish(make_event('x'))
+    assert json.loads(bus.get_history_json()) == bus.get_history()
+
+@pytest.mark.asyncio
+async def test_indexed_subscriptions_by_session_station_and_wildcard(bus):
+    pair_1, station_b, everything, big_tracks = [], [], [], []
+    bus.subscribe(None, pair_1.append, session_id='pair-1')
+    bus.subscribe(EventType.STATION_LOCKED, station_b.append, station_id='B')
+    bus.subscribe(None, everything.append)
+    bus.subscribe(EventType.STATION_LOCKED, big_tracks.append,
+                  predicate=lambda e: e.track_id >= 3)
+
+    events = [
+        create_event(EventType.STATION_LOCKED, station_id='A', track_id=1, session_id='pair-1'),
+        create_event(EventType.STATION_LOCKED, station_id='B', track_id=4, session_id='pair-2'),
+        create_event(EventType.MATCHED, track_id=4, session_id='pair-1'),
+        make_event('pair-3'),
+    ]
+    for event in events:
+        await bus.publish(event)
+    await bus.drain()
+
+    assert pair_1 == [events[0], events[2]]
+    assert station_b == [events[1]]
+    assert everything == events
+    assert big_tracks == [events[1]]
+    assert bus.matching(make_event('pair-9')) == bus.subscribers[(None, None, None)]
+
+def test_unsubscribe_removes_index_entry():
+    bus = EventBus()
+    callback = lambda e: None
+    bus.subscribe(EventType.HEARTBEAT, callback, session_id='s1')
+    bus.unsubscribe(EventType.HEARTBEAT, callback, session_id='s1')
+    assert bus.subscribers == {}
+    assert bus.matching(make_event('s1')) == []
+
+@pytest.mark.asyncio
+async def test_close_cancels_consumer_tasks(bus):
+    sub = bus.subscribe(EventType.HEARTBEAT, lambda e: None)
+    await bus.publish(make_event())
+    await bus.close()
+    assert sub.task.done()
+
+def test_stop_shuts_down_thread_loop():
+    bus = EventBus()
+    loop = bus.start_in_thread()
+    sub = asyncio.run_coroutine_threadsafe(_subscribe(bus, lambda e: None), loop).result(1)
+    bus.publish_threadsafe(make_event())
+    asyncio.run_coroutine_threadsafe(_settle(bus), loop).result(5)
+    bus.stop()
+    assert sub.task.done() and bus.loop is None
@@ -0,0 +1,179 @@
+import json
+import time
+
+import pyotp
+import pytest
+
+from dashboard import app as dashboard
+from dashboard.fanout import FanoutPublisher, FanoutSubscriber
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def endpoints(tmp_path):
+    return f'ipc://{tmp_path}/pub', f'ipc://{tmp_path}/snapshot'
+
+
+@pytest.fixture
+def publisher(endpoints):
+    publisher = FanoutPublisher(*endpoints)
+    publisher.start({'sync_count': 0, 'current_state': 'idle'}, [{'event': 'matched', 'data': {}}])
+    yield publisher
+    publisher.stop()
+
+
+def make_subscriber(endpoints, **kwargs):
+    worker = {'state': {}, 'history': None}
+    subscriber = FanoutSubscriber(worker['state'].update, *endpoints, snapshot_timeout_ms=500,
+                                  on_history=lambda history: worker.update(history=list(history)),
+                                  on_event=lambda event: worker['history'].append(event), **kwargs)
+    subscriber.start()
+    return subscriber, worker
+
+
+def test_worker_applies_published_deltas(endpoints, publisher):
+    subscriber, worker = make_subscriber(endpoints)
+    try:
+        wait_for(lambda: worker['history'] is not None)  # snapshot fetched
+        time.sleep(0.2)  # let the SUB connection settle
+        publisher.publish({'sync_count': 1})
+        publisher.publish({'current_state': 'matched'})
+        wait_for(lambda: subscriber.last_seq == 2)
+        assert worker['state'] == {'sync_count': 1, 'current_state': 'matched'}
+        assert subscriber.resyncs == 0
+    finally:
+        subscriber.stop()
+
+
+def test_late_joiner_gets_snapshot_and_history(endpoints, publisher):
+    publisher.publish({'sync_count': 3})
+    subscriber, worker = make_subscriber(endpoints)
+    try:
+        wait_for(lambda: worker['history'] is not None)
+        assert worker['state'] == {'sync_count': 3, 'current_state': 'idle'}
+        assert worker['history'] == [{'event': 'matched', 'data': {}}]
+        assert subscriber.last_seq == 1
+    finally:
+        subscriber.stop()
+
+
+def test_events_after_the_snapshot_reach_the_worker(endpoints, publisher):
+    subscriber, worker = make_subscriber(endpoints)
+    try:
+        wait_for(lambda: worker['history'] is not None)
+        time.sleep(0.2)
+        publisher.publish_event({'event': 'heartbeat', 'data': {}})
+        publisher.publish({'sync_count': 1})
+        wait_for(lambda: subscriber.last_seq == 2)
+        assert [event['event'] for event in worker['history']] == ['matched', 'heartbeat']
+        assert worker['state']['sync_count'] == 1 and subscriber.resyncs == 0
+    finally:
+        subscriber.stop()
+
+
+def test_sequence_gap_triggers_resync(endpoints, publisher):
+    subscriber, worker = make_subscriber(endpoints)
+    try:
+        wait_for(lambda: worker['history'] is not None)
+        time.sleep(0.2)
+        with publisher.lock:
+            publisher.seq += 1  # a delta the worker never received
+            publisher.state['countdown'] = 5
+        publisher.publish({'sync_count': 2})
+        wait_for(lambda: subscriber.resyncs == 1 and subscriber.last_seq == 2)
+        assert worker['state']['countdown'] == 5 and worker['state']['sync_count'] == 2
+    finally:
+        subscriber.stop()
+
+
+def test_admin_request_runs_in_core(endpoints, publisher):
+    actions = []
+    publisher.admin_handler = lambda action: (actions.append(action) or {'status': action}, 200)
+    subscriber = FanoutSubscriber(dict, *endpoints, snapshot_timeout_ms=500)
+    assert subscriber.request_admin('reset') == {'body': {'status': 'reset'}, 'status': 200}
+    assert actions == ['reset']
+
+
+def test_admin_request_without_core(endpoints):
+    subscriber = FanoutSubscriber(dict, *endpoints, snapshot_timeout_ms=100)
+    assert subscriber.request_admin('reset') is None
+
+
+def test_worker_admin_routes_forward_to_core(endpoints, publisher, monkeypatch):
+    actions = []
+    publisher.admin_handler = lambda action: (actions.append(action) or {'status': 'done'}, 200)
+    totp = pyotp.TOTP(pyotp.random_base32())
+    monkeypatch.setattr(dashboard, 'totp', totp)
+    monkeypatch.setattr(dashboard, 'core_link', FanoutSubscriber(dict, *endpoints, snapshot_timeout_ms=500))
+    client = dashboard.app.test_client()
+
+    response = client.post('/admin/reset', headers={'X-TOTP': totp.now()}, base_url='https://localhost')
+    assert response.status_code == 200 and response.get_json() == {'status': 'done'}
+    response = client.post('/api/v1/admin/force-recover', headers={'Authorization': f'Bearer {totp.now()}'},
+                           base_url='https://localhost')
+    assert response.status_code == 200
+    assert actions == ['reset', 'force_recover']
+
+    publisher.stop()
+    response = client.post('/admin/reset', headers={'X-TOTP': totp.now()}, base_url='https://localhost')
+    assert response.status_code == 503
+
+
+def test_core_runs_forwarded_admin_actions(monkeypatch):
+    monkeypatch.setattr(dashboard, 'session_recovery', None)
+    assert dashboard.run_admin('force_recover')[1] == 503
+    assert dashboard.run_admin('bogus')[1] == 400
+    dashboard.update_state({'sync_count': 7})
+    assert dashboard.run_admin('reset') == ({'status': 'reset'}, 200)
+    assert dashboard.state['sync_count'] == 0
+
+
+def test_worker_snapshot_matches_the_core(endpoints, publisher, monkeypatch):
+    from metrics import MetricsCollector
+    from dashboard.snapshot import SnapshotCache
+    core_metrics = MetricsCollector()
+    core_metrics.record_match('A', 'B', 250, 3)
+    core = SnapshotCache()
+    for name in dashboard.snapshot_cache.sections:
+        core.register(name, lambda name=name: {'section': name, 'matches': len(core_metrics.matches)},
+                      lambda: core_metrics.version)
+    publisher.sections_handler = core.snapshot
+    monkeypatch.setattr(dashboard, 'core_link', FanoutSubscriber(dict, *endpoints, snapshot_timeout_ms=500))
+    client = dashboard.app.test_client()
+
+    for fields in ('report,leaderboard', None):
+        url = '/api/v1/snapshot' + (f'?fields={fields}' if fields else '')
+        response = client.get(url, base_url='https://localhost')
+        body, etag = core.snapshot(fields.split(',') if fields else dashboard.snapshot_cache.sections)
+        assert response.status_code == 200
+        assert response.data.decode() == body and response.headers['ETag'] == f'"{etag}"'
+        assert json.loads(response.data)['report']['matches'] == 1
+    assert client.get('/api/v1/snapshot?fields=bogus', base_url='https://localhost').status_code == 400
+    publisher.stop()
+    assert client.get('/api/v1/snapshot', base_url='https://localhost').status_code == 503
+
+
+def test_core_forwards_event_bus_events(endpoints, monkeypatch):
+    import asyncio
+    from events import EventBus, EventType, create_event
+    bus = EventBus()
+    monkeypatch.setattr(dashboard, 'event_bus', bus)
+    monkeypatch.setattr(dashboard, 'fanout_publisher', None)
+    publisher = FanoutPublisher(*endpoints)
+    dashboard.attach_fanout(publisher)
+    try:
+        async def publish():
+            await bus.publish(create_event(EventType.HEARTBEAT))
+            await bus.drain()
+            await bus.close()
+        asyncio.run(publish())
+        seq, _, history = publisher.snapshot()
+        assert seq == 1 and [event['type'] for event in history] == ['heartbeat']
+    finally:
+        publisher.stop()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from audio_backend import VirtualBackend
+from audio_devices import AudioDeviceManager
+from bridge import DuplexBridge
+from latency_probe import LatencyProbe, find_delay, make_chirp
+
+
+def virtual_bridge(drift_ppm=0.0, blocksize=256):
+    backend = VirtualBackend([{'name': 'A', 'input': 'noise'},
+                              {'name': 'B', 'input': 'noise', 'drift_ppm': drift_ppm}])
+    devices = AudioDeviceManager({'audio': {'device_a': 0, 'device_b': 1}}, backend)
+    return backend, DuplexBridge(devices, backend, blocksize=blocksize)
+
+
+def test_find_delay_locates_chirp_in_noise():
+    chirp = make_chirp(16000)
+    recording = np.random.default_rng(0).standard_normal(8000).astype(np.float32) * 0.05
+    recording[1234:1234 + len(chirp)] += chirp
+    offset, score = find_delay(recording, chirp)
+    assert offset == 1234
+    assert score > 0.5
+
+
+def test_probe_measures_each_direction():
+    backend, bridge = virtual_bridge()
+    bridge.connect()
+    backend.run(0.5)
+    probe = LatencyProbe(bridge)
+    a_to_b = probe.measure('a', advance=backend.run)
+    b_to_a = probe.measure('b', advance=backend.run)
+    # Each way: 5ms ADC + one block capture + jitter buffer + one block + 5ms DAC
+    block_ms = 256 / 44100 * 1000
+    for latency in (a_to_b, b_to_a):
+        assert 10 + 2 * block_ms <= latency <= 10 + 6 * block_ms
+    stats = probe.stats()
+    assert stats['a->b']['count'] == 1 and stats['b->a']['lost'] == 0
+    assert bridge.capture_taps == {'a': None, 'b': None}
+
+
+def test_smaller_blocks_measure_lower_latency():
+    results = []
+    for blocksize in (512, 128):
+        backend, bridge = virtual_bridge(blocksize=blocksize)
+        bridge.connect()
+        backend.run(0.5)
+        results.append(LatencyProbe(bridge).measure('a', advance=backend.run))
+    assert results[1] < results[0]
+
+
+def test_probe_needs_connected_bridge_and_counts_lost_chirps():
+    backend, bridge = virtual_bridge()
+    probe = LatencyProbe(bridge)
+    with pytest.raises(RuntimeError):
+        probe.measure('a', advance=backend.run)
+    bridge.connect()
+    assert probe.measure('a', advance=lambda seconds: None) is None  # clock never advanced
+    assert probe.stats()['a->b'] == {'count': 0, 'lost': 1}
@@ -0,0 +1,38 @@
+import numpy as np
+
+from mixer import Mixer
+
+
+def render(mixer, blocks, blocksize=8):
+    out = np.zeros((blocks * blocksize, 1), dtype=np.float32)
+    for i in range(blocks):
+        block = out[i * blocksize:(i + 1) * blocksize]
+        mixer.mix_into(block, blocksize)
+    return out[:, 0]
+
+
+def test_voice_starts_on_exact_frame():
+    mixer = Mixer(blocksize=8)
+    voice = mixer.play(np.ones((4, 1), dtype=np.float32), name='cue', start_frame=13)
+    out = render(mixer, 4)
+    assert out.nonzero()[0].tolist() == [13, 14, 15, 16]
+    assert voice.done and voice.wait(0)
+    assert mixer.voices == []
+
+
+def test_playlist_loops_without_gaps_until_stopped():
+    mixer = Mixer(blocksize=8)
+    clips = [np.full((3, 1), 1, dtype=np.float32), np.full((2, 1), 2, dtype=np.float32)]
+    mixer.play(clips, name='tracks', loop=True)
+    out = render(mixer, 3)
+    assert out.tolist() == [1, 1, 1, 2, 2] * 4 + [1, 1, 1, 2]
+    mixer.stop('tracks')
+    assert not render(mixer, 1).any()
+
+
+def test_voices_sum_with_gain():
+    mixer = Mixer(blocksize=8)
+    mixer.play(np.ones((8, 1), dtype=np.float32), gain=0.5)
+    mixer.play(np.ones((8, 1), dtype=np.float32), start_frame=4)
+    out = render(mixer, 2)
+    assert out.tolist() == [0.5] * 4 + [1.5] * 4 + [1] * 4 + [0] * 4
@@ -14,6 +14,7 @@ def test_mqtt_connect(mock_loop, mock_connect):
     handler = MQTTHandler(config, lambda t, p: None)
     handler.connect()
     mock_connect.assert_called_with('localhost', 1883, 60)
+    handler.disconnect()
 
 def test_mqtt_publish():
     config = {'mqtt': {'broker': 'localhost', 'port': 1883}}
@@ -21,4 +22,31 @@ def test_mqtt_publish():
     handler.connected = True
     with patch.object(handler.client, 'publish') as mock_publish:
         handler.publish('test/topic', {'key': 'value'})
-        mock_publish.assert_called_with('test/topic', '{"key": "value"}')
\ No newline at end of file
+        mock_publish.assert_called_with('test/topic', '{"key": "value"}')
+
+
+def test_mqtt_queues_while_offline_and_flushes_on_reconnect():
+    config = {'mqtt': {'broker': 'localhost', 'port': 1883}}
+    handler = MQTTHandler(config, lambda t, p: None)
+    handler.connected = True
+    handler._on_disconnect(handler.client, None, 7)
+    handler.publish('blinddate/led', {'color': 'red'})
+    assert handler.outbox.size() == 1
+
+    with patch.object(handler.client, 'publish') as mock_publish, \
+            patch.object(handler.client, 'subscribe') as mock_subscribe:
+        handler._on_connect(handler.client, None, {}, 0)
+        mock_publish.assert_called_once_with('blinddate/led', '{"color": "red"}')
+        assert mock_subscribe.call_count == 3
+    assert handler.connected
+    assert handler.reconnects == 1
+    assert handler.recovery_histogram.count >= 1
+
+@patch('paho.mqtt.client.Client.connect', side_effect=OSError('network unreachable'))
+def test_mqtt_failed_connect_opens_breaker(mock_connect):
+    config = {'mqtt': {'broker': 'localhost', 'port': 1883, 'reconnect_base_ms': 10000}}
+    handler = MQTTHandler(config, lambda t, p: None)
+    handler._attempt_connect()
+    assert handler.breaker.state.value == 'open'
+    assert handler.breaker.failure_count == 1
+    assert 0 <= handler.breaker.seconds_until_retry() <= 10
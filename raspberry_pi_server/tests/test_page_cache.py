@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from dashboard.app import app, page_cache
+from i18n import _best_language
+
+
+@pytest.fixture
+def client():
+    page_cache.pages.clear()
+    return app.test_client()
+
+def get_index(client, accept_language):
+    return client.get('/', base_url='https://localhost',
+                      headers={'Accept-Language': accept_language})
+
+def test_best_language_from_header():
+    assert _best_language('fr-CH, fr;q=0.9, en;q=0.8') == 'fr'
+    assert _best_language('pt-BR') == 'en'
+    assert _best_language('') == 'en'
+
+def test_index_rendered_once_per_locale(client):
+    misses = page_cache.misses
+    es = get_index(client, 'es')
+    get_index(client, 'es-MX, es;q=0.9')
+    fr = get_index(client, 'fr')
+    assert 'Cita Ciega con Ancho de Banda' in es.get_data(as_text=True)
+    assert 'lang="fr"' in fr.get_data(as_text=True)
+    assert page_cache.misses - misses == 2
+    assert len(page_cache.pages) == 2
+
+def test_template_change_invalidates_cache(client):
+    get_index(client, 'en')
+    template = os.path.join(app.root_path, app.template_folder, 'index.html')
+    stat = os.stat(template)
+    try:
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        page_cache.last_check = float('-inf')
+        misses = page_cache.misses
+        get_index(client, 'en')
+        assert page_cache.misses == misses + 1
+        assert len(page_cache.pages) == 1
+    finally:
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns))
@@ -0,0 +1,122 @@
+import time
+
+from db import create_db_engine, create_session_factory
+from matcher import Matcher, State
+from resilience import SessionRecovery
+from tournament import TournamentBracket, TournamentRound
+
+
+class Component:
+    def __init__(self):
+        self.state = {'count': 0}
+        self.version = 0
+        self.snapshots = 0
+
+    def bump(self):
+        self.state['count'] += 1
+        self.version += 1
+
+    def snapshot(self):
+        self.snapshots += 1
+        return dict(self.state)
+
+    def restore(self, state):
+        self.state = dict(state)
+
+
+def make_recovery(tmp_path, component):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    recovery = SessionRecovery(create_session_factory(engine), checkpoint_interval_s=0.05)
+    recovery.register('component', component.snapshot, component.restore,
+                      lambda: component.version)
+    return recovery
+
+def test_sqlite_uses_wal(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == 'wal'
+
+def test_write_behind_coalesces_and_survives_restart(tmp_path):
+    component = Component()
+    recovery = make_recovery(tmp_path, component)
+    recovery.start()
+    for _ in range(1000):
+        component.bump()  # hot path only bumps a version
+    time.sleep(0.2)
+    recovery.stop()
+    assert component.snapshots < 10
+    assert recovery.current_state['component'] == {'count': 1000}
+
+    restarted = Component()
+    recovery = make_recovery(tmp_path, restarted)
+    started = time.perf_counter()
+    assert recovery.restore_all() == ['component']
+    assert time.perf_counter() - started < 1.0
+    assert restarted.state == {'count': 1000}
+
+def test_checkpoint_state_without_database():
+    recovery = SessionRecovery(lambda: None)
+    recovery.checkpoint_state({'current_state': 'matched'})
+    recovery.flush()
+    assert recovery.restore_state() == {'current_state': 'matched'}
+
+def test_matcher_snapshot_restore():
+    matcher = Matcher({'session': {'duration': 90}}, lambda e, d: None)
+    matcher.handle_lock('A', 2, 1000)
+    matcher.handle_lock('B', 2, 1001)
+
+    restored = Matcher({'session': {'duration': 90}}, lambda e, d: None)
+    restored.restore(matcher.snapshot())
+    assert restored.state == State.MATCHED
+    assert restored.stations == matcher.stations
+    assert restored.session_start == matcher.session_start
+
+def test_tournament_snapshot_restore():
+    bracket = TournamentBracket(num_stations=4)
+    bracket.start_round(TournamentRound.ROUND_1)
+    bracket.record_match_result(bracket.matches[0].match_id, 3, 3, 140)
+
+    restored = TournamentBracket(num_stations=2)
+    restored.restore(bracket.snapshot())
+    assert restored.get_leaderboard() == bracket.get_leaderboard()
+    assert restored.snapshot() == bracket.snapshot()
+
+def test_circuit_breaker_full_jitter():
+    from resilience import CircuitBreaker
+
+    cb = CircuitBreaker(base_delay_ms=100, max_delay_ms=400, jitter=True)
+    for attempt in range(6):
+        cb.record_failure()
+        cap_s = min(0.1 * 2 ** attempt, 0.4)
+        assert 0 <= cb.next_retry_time - cb.last_failure_time <= cap_s + 1e-6
+
+def test_partition_deadline_fires_without_further_traffic():
+    import threading
+    from resilience import PartitionHandler
+
+    fired = []
+    done = threading.Event()
+    handler = PartitionHandler(timeout_s=0.05,
+                               on_partition=lambda s, t: (fired.append((s, t)), done.set()))
+    assert handler.handle_split_brain('A', 3)
+    assert done.wait(1)
+    assert fired == [('A', 3)]
+    assert handler.partitions_detected == 1
+
+def test_partition_cancelled_when_partner_locks():
+    from resilience import PartitionHandler
+
+    fired = []
+    handler = PartitionHandler(timeout_s=0.05, on_partition=lambda s, t: fired.append(s))
+    handler.handle_split_brain('A', 3)
+    assert not handler.handle_split_brain('B', 1)
+    time.sleep(0.15)
+    assert fired == []
+
+def test_matcher_release_station():
+    events = []
+    matcher = Matcher({}, lambda e, d: events.append((e, d)))
+    matcher.handle_lock('A', 2, 1000)
+    matcher.release_station('A')
+    assert matcher.state == State.IDLE
+    assert ('released', {'station': 'A'}) in events
@@ -0,0 +1,58 @@
+import numpy as np
+
+from ringbuffer import JitterBuffer, RingBuffer
+
+
+def test_ring_wraps_around_without_losing_order():
+    ring = RingBuffer(8)
+    out = np.zeros((8, 1), dtype=np.float32)
+    for start in range(0, 30, 5):
+        assert ring.write(np.arange(start, start + 5, dtype=np.float32).reshape(-1, 1))
+        assert ring.read_into(out, 5) == 5
+        assert out[:5, 0].tolist() == list(range(start, start + 5))
+    assert not ring.write(np.zeros((9, 1), dtype=np.float32))
+    assert ring.available() == 0
+
+
+def test_underrun_grows_target_and_reprimes():
+    jitter = JitterBuffer(blocksize=4, max_blocks=8)
+    out = np.zeros((4, 1), dtype=np.float32)
+    jitter.write(np.ones((4, 1), dtype=np.float32))
+    jitter.read_into(out)
+    assert out.sum() == 4
+    jitter.read_into(out)  # producer missed a period
+    assert jitter.underruns == 1
+    assert jitter.target == 8
+    assert jitter.priming
+    jitter.write(np.ones((4, 1), dtype=np.float32))
+    jitter.read_into(out)
+    assert not out.any()  # still priming up to the new target
+
+
+def test_fast_producer_is_compensated_by_dropping_samples():
+    jitter = JitterBuffer(blocksize=64, max_blocks=64, correct_every=1, smoothing=0.5)
+    out = np.zeros((64, 1), dtype=np.float32)
+    block = np.ones((64, 1), dtype=np.float32)
+    for i in range(2000):
+        jitter.write(block)
+        if i % 100 == 0:
+            jitter.write(block[:16])  # 0.25% fast clock
+        jitter.read_into(out)
+    assert jitter.dropped > 0
+    assert jitter.overruns == 0
+    assert jitter.ring.available() <= jitter.target + 2 * 64
+
+
+def test_slow_producer_is_compensated_by_inserting_samples():
+    jitter = JitterBuffer(blocksize=64, max_blocks=64, correct_every=1, smoothing=0.5)
+    out = np.zeros((64, 1), dtype=np.float32)
+    jitter.write(np.ones((64 * 3, 1), dtype=np.float32))
+    jitter.target = 64 * 3
+    for _ in range(3):
+        jitter.read_into(out)
+        jitter.write(np.ones((63, 1), dtype=np.float32))  # slow clock
+    for _ in range(100):
+        jitter.write(np.ones((63, 1), dtype=np.float32))
+        jitter.read_into(out)
+    assert jitter.inserted > 0
+    assert np.all(out == 1)  # repeated samples, not silence
@@ -0,0 +1,139 @@
+import time
+
+import numpy as np
+import pytest
+
+from audio_backend import VirtualBackend
+from audio_devices import AudioDeviceManager
+from router import AudioRouter
+from tournament import TournamentBracket, TournamentRound
+
+
+def make_router(n=4, names=None, **kwargs):
+    # Each station's mic carries a constant level, so what a station hears identifies its peer
+    backend = VirtualBackend([{'name': f'Station {i}', 'input': np.full(512, 0.1 * (i + 1), np.float32),
+                               'record': True, 'drift_ppm': 40 * i} for i in range(n)])
+    devices = AudioDeviceManager({'audio': {}}, backend)
+    names = names or [f'STATION_{i}' for i in range(n)]
+    router = AudioRouter(devices, {name: i for i, name in enumerate(names)}, backend, **kwargs)
+    return router, backend
+
+
+def heard(backend, i, blocks=8):
+    levels = np.unique(np.round(np.concatenate(backend.devices[i].recorded[-blocks:]), 3))
+    return float(levels[0]) if len(levels) == 1 else None
+
+
+def test_routes_every_pair_through_one_loop():
+    router, backend = make_router(8)
+    router.start()
+    for i in range(0, 8, 2):
+        router.connect(f'STATION_{i}', f'STATION_{i + 1}')
+    backend.run(2.0)
+    for i in range(8):
+        assert heard(backend, i) == pytest.approx(0.1 * ((i ^ 1) + 1))
+    stats = router.stats()
+    assert router.loops == router.callbacks[0] > 0
+    assert len(stats['routes']) == 4
+    route = stats['routes']['STATION_0<->STATION_1']
+    assert route['cpu_us'] > 0
+    for direction in ('STATION_0->STATION_1', 'STATION_1->STATION_0'):
+        assert route[direction]['count'] > 0
+        assert 5 < route[direction]['p50_ms'] < 100
+
+
+def test_unrouted_stations_hear_silence_and_reroute():
+    router, backend = make_router(4)
+    router.start()
+    router.connect('STATION_0', 'STATION_1')
+    backend.run(1.0)
+    assert heard(backend, 2) == 0.0
+    router.connect('STATION_1', 'STATION_2')  # replaces STATION_0 <-> STATION_1
+    backend.run(1.0)
+    assert router.route_pairs() == [('STATION_1', 'STATION_2')]
+    assert heard(backend, 0) == 0.0
+    assert heard(backend, 1) == pytest.approx(0.3)
+    assert heard(backend, 2) == pytest.approx(0.2)
+
+
+def test_sync_matches_routes_tournament_round():
+    router, backend = make_router(8)
+    bracket = TournamentBracket(8)
+    bracket.start_round(TournamentRound.ROUND_1)
+    router.sync_matches(bracket.matches)
+    assert router.route_pairs() == sorted(tuple(sorted((m.station_a, m.station_b))) for m in bracket.matches)
+    backend.run(1.0)
+    first = bracket.matches[0]
+    bracket.record_match_result(first.match_id, 1, 1, 1000)
+    router.sync_matches(bracket.matches)
+    assert len(router.route_pairs()) == 3
+    assert first.station_a not in router.routes
+
+
+def test_master_station_loss_hands_over_the_loop():
+    router, backend = make_router(4)
+    router.start()
+    router.connect('STATION_2', 'STATION_3')
+    backend.run(0.5)
+    router.streams['STATION_0'].fail()
+    assert router.master == 'STATION_1'
+    loops = router.loops
+    backend.run(0.5)
+    assert router.loops > loops
+    assert heard(backend, 3) == pytest.approx(0.3)
+
+
+def wait_for_stream(router, station, broken):
+    deadline = time.time() + 2
+    while router.streams.get(station) in (None, broken) and time.time() < deadline:
+        time.sleep(0.01)
+    return router.streams.get(station)
+
+
+def test_lost_station_fails_over_to_a_free_device():
+    backend = VirtualBackend([{'name': f'Station {i}', 'input': np.full(512, 0.1 * (i + 1), np.float32),
+                               'record': True} for i in range(3)] + [{'name': 'Spare', 'record': True}])
+    devices = AudioDeviceManager({'audio': {'fallback_device': 'Spare'}}, backend)
+    router = AudioRouter(devices, {f'STATION_{i}': i for i in range(3)}, backend)
+    router.start()
+    router.connect('STATION_0', 'STATION_1')
+    backend.run(0.5)
+    broken = router.streams['STATION_1']
+    backend.devices[1].channels = 0  # unplugged: no longer listed as duplex
+    devices.devices(refresh=True)
+    broken.fail()
+    stream = wait_for_stream(router, 'STATION_1', broken)
+    assert stream.device is backend.devices[3]  # the spare, not another station's device
+    assert devices.bound['STATION_1'] == 3 and devices.failovers == 1
+    assert router.route_pairs() == [('STATION_0', 'STATION_1')]
+    backend.run(0.5)
+    assert heard(backend, 3) == pytest.approx(0.1)  # the spare now hears STATION_0
+    router.stop()
+
+
+def test_stations_never_take_a_booths_device():
+    backend = VirtualBackend(3)
+    devices = AudioDeviceManager({'audio': {'device_a': 0, 'device_b': 1}}, backend)
+    devices.device_for('a')
+    router = AudioRouter(devices, {'STATION_0': 0, 'STATION_1': 2}, backend)
+    router.start()  # device 0 is booth A's and the default is booth A's too
+    assert router.running and list(router.streams) == ['STATION_1']
+    assert router.master == 'STATION_1'
+
+
+def test_missing_station_does_not_stop_the_others_and_is_retried():
+    router, backend = make_router(4)
+    backend.devices[0].channels = 0  # STATION_0's interface is unplugged
+    router.devices.devices(refresh=True)
+    router.start()
+    assert sorted(router.streams) == ['STATION_1', 'STATION_2', 'STATION_3']
+    router.connect('STATION_2', 'STATION_3')
+    backend.run(0.5)
+    assert heard(backend, 3) == pytest.approx(0.3)
+
+    backend.devices[0].channels = 1  # plugged back in
+    router.devices.devices(refresh=True)
+    bracket = TournamentBracket(4)
+    bracket.start_round(TournamentRound.ROUND_1)
+    router.sync_matches(bracket.matches)
+    assert 'STATION_0' in router.streams and len(router.route_pairs()) == 2
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from dashboard import app as dashboard
+from dashboard.snapshot import SnapshotCache
+from metrics import MetricsCollector
+from tournament import TournamentBracket, TournamentRound
+
+
+@pytest.fixture
+def client():
+    return dashboard.app.test_client()
+
+def get_snapshot(client, fields=None, headers=None):
+    url = '/api/v1/snapshot' + (f'?fields={fields}' if fields else '')
+    return client.get(url, base_url='https://localhost', headers=headers or {})
+
+def test_fragment_serialized_once_per_version():
+    calls = []
+    version = [0]
+    cache = SnapshotCache()
+    cache.register('demo', lambda: calls.append(1) or {'n': len(calls)}, lambda: version[0])
+    assert cache.fragment('demo') == (0, '{"n": 1}')
+    assert cache.fragment('demo') == (0, '{"n": 1}')
+    version[0] += 1
+    assert cache.fragment('demo') == (1, '{"n": 2}')
+    assert len(calls) == 2
+
+def test_snapshot_combines_requested_sections(client):
+    dashboard.update_state({'sync_count': 7})
+    data = json.loads(get_snapshot(client, 'status,stats').data)
+    assert set(data) == {'versions', 'status', 'stats'}
+    assert data['status']['sync_count'] == 7
+    assert data['stats'] == {'sync_count': 7, 'avg_sync_time': dashboard.state['avg_sync_time']}
+
+def test_snapshot_defaults_to_all_sections(client):
+    data = json.loads(get_snapshot(client).data)
+    assert {'status', 'stats', 'report', 'histogram', 'leaderboard'} <= set(data)
+
+def test_report_section_after_matches(client):
+    from metrics import metrics
+    # main records matches without a sync time until stations report one
+    metrics.record_match('A', 'B', None, 1)
+    metrics.record_match('A', 'B', None, 2)
+    metrics.record_match('A', 'B', 300, 2)
+    for fields in (None, 'report'):
+        resp = get_snapshot(client, fields)
+        assert resp.status_code == 200
+        report = json.loads(resp.data)['report']
+        assert report['avg_sync_time_ms'] == 300 and report['fastest_sync_ms'] == 300
+
+def test_daily_report_skips_missing_sync_times():
+    from report_generator import generate_daily_report
+    collector = MetricsCollector()
+    collector.record_match('A', 'B', None, 1)
+    collector.record_match('A', 'B', None, 1)
+    assert '## ' in generate_daily_report(collector)
+    assert collector.generate_daily_report().avg_sync_time_ms == 0
+
+def test_unknown_field_rejected(client):
+    resp = get_snapshot(client, 'status,bogus')
+    assert resp.status_code == 400
+    assert 'bogus' in resp.get_json()['error']
+
+def test_etag_changes_with_state(client):
+    etag = get_snapshot(client, 'status').headers['ETag']
+    assert get_snapshot(client, 'status', {'If-None-Match': etag}).status_code == 304
+    dashboard.update_state({'countdown': 42})
+    assert get_snapshot(client, 'status', {'If-None-Match': etag}).status_code == 200
+
+def test_leaderboard_follows_tournament(client):
+    bracket = TournamentBracket(num_stations=2)
+    dashboard.attach_tournament(bracket)
+    try:
+        bracket.start_round(TournamentRound.ROUND_1)
+        bracket.record_match_result(bracket.matches[0].match_id, 2, 2, 120)
+        board = json.loads(get_snapshot(client, 'leaderboard').data)['leaderboard']
+        assert sum(row['matches_won'] for row in board) == 1
+    finally:
+        dashboard.attach_tournament(None)
+
+def test_histogram_updated_incrementally():
+    collector = MetricsCollector()
+    for sync_ms in (10, 60, 499, 900):
+        collector.record_match('A', 'B', sync_ms, 1)
+    assert collector.sync_histogram()['counts'] == [0, 1, 1, 0, 0, 1]
+    assert collector.version == 4
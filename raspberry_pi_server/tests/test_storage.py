@@ -0,0 +1,101 @@
+from db import create_db_engine
+from storage import MatchStore
+from tournament import TournamentBracket, TournamentRound
+
+
+def make_store(tmp_path):
+    return MatchStore(create_db_engine(f"sqlite:///{tmp_path / 'store.db'}"))
+
+def test_schema_v2_indexes_exist(tmp_path):
+    store = make_store(tmp_path)
+    with store.engine.connect() as conn:
+        names = {row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_sessions_timestamp', 'idx_matches_session',
+            'idx_stations_status', 'idx_bracket_round'} <= names
+
+def test_batched_writes_and_report_queries(tmp_path):
+    store = make_store(tmp_path)
+    store.start()
+    for i in range(10):
+        session_id = store.record_session('A', 'B', 'matched', track=i % 2 + 1,
+                                          created_at=1000.0 + i)
+        store.record_match(session_id, 'A', 'B', i % 2 + 1, sync_time_ms=100 + i,
+                           created_at=1000.0 + i)
+    store.record_session('A', 'B', 'mismatch', created_at=1005.5)
+    store.record_station('A', 'online', last_seen=50.0)
+    store.record_station('A', 'offline', last_seen=60.0)
+    store.stop()
+    assert store.batches_written < store.rows_written
+
+    recent = store.recent_sessions(since=1008.0)
+    assert [s['created_at'] for s in recent] == [1009.0, 1008.0]
+    assert len(store.matches_for_session(recent[0]['session_id'])) == 1
+
+    summary = store.report_summary(1000.0, 1010.0)
+    assert summary['total_sessions'] == 11
+    assert summary['matched_sessions'] == 10
+    assert summary['fastest_sync_ms'] == 100 and summary['slowest_sync_ms'] == 109
+    assert summary['track_count'] == {1: 5, 2: 5}
+
+    assert store.stations_by_status('online') == []
+    assert [s['station_id'] for s in store.stations_by_status('offline')] == ['A']
+
+def test_bracket_round_and_leaderboard(tmp_path):
+    store = make_store(tmp_path)
+    bracket = TournamentBracket(num_stations=4)
+    bracket.start_round(TournamentRound.ROUND_1)
+    for match in bracket.matches:
+        store.record_bracket_match(match)
+    for match in bracket.matches:
+        bracket.record_match_result(match.match_id, 2, 2, 150)
+        store.record_bracket_match(match)
+    store.flush()
+
+    assert len(store.bracket_round(1, 'completed')) == 2
+    assert store.bracket_round(1, 'pending') == []
+    board = store.leaderboard(round_num=1)
+    assert {row['station'] for row in board} == set(bracket.get_winners())
+    assert all(row['matches_won'] == 1 for row in board)
+
+def test_daily_report_reads_the_store(tmp_path):
+    import time
+    from metrics import MetricsCollector
+    from report_generator import generate_daily_report
+    store = make_store(tmp_path)
+    now = time.time()
+    for track, sync_ms in ((2, 120), (2, 180), (4, None)):
+        session_id = store.record_session('A', 'B', 'matched', track=track, created_at=now)
+        store.record_match(session_id, 'A', 'B', track, sync_time_ms=sync_ms, created_at=now)
+    store.flush()
+    report = generate_daily_report(MetricsCollector(), store=store)  # e.g. after a restart
+    assert '**Total Matches**: 3' in report
+    assert '**Average Sync Time**: 150.0ms' in report
+    assert 'Most Popular Track | Track 2' in report
+    assert '2 matches' in report and 'Fastest Sync | 120' in report
+
+def test_tournament_endpoints_read_the_store(tmp_path, monkeypatch):
+    from dashboard import app as dashboard
+    store = make_store(tmp_path)
+    client = dashboard.app.test_client()
+
+    def get(url):
+        return client.get(url, base_url='https://localhost')
+
+    assert get('/api/v1/tournament/leaderboard').status_code == 503
+    monkeypatch.setattr(dashboard, 'match_store', store)
+    bracket = TournamentBracket(num_stations=4)
+    bracket.start_round(TournamentRound.ROUND_1)
+    first = bracket.matches[0]
+    bracket.record_match_result(first.match_id, 3, 3, 200)
+    for match in bracket.matches:
+        store.record_bracket_match(match)
+    store.flush()
+
+    rows = get('/api/v1/tournament/bracket?round=1').get_json()['matches']
+    assert {row['match_id'] for row in rows} == {m.match_id for m in bracket.matches}
+    completed = get('/api/v1/tournament/bracket?round=1&status=completed').get_json()['matches']
+    assert [row['winner'] for row in completed] == [first.winner]
+    board = get('/api/v1/tournament/leaderboard?round=1').get_json()['leaderboard']
+    assert board == [{'station': first.winner, 'matches_won': 1, 'fastest_sync_ms': 200.0,
+                      'avg_sync_ms': 200.0}]
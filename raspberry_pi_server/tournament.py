@@ -8,7 +8,7 @@ import logging
 import random
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional, Tuple
 
@@ -70,6 +70,7 @@ class TournamentBracket:
         }
         self.current_round = TournamentRound.ROUND_1
         self.lock = threading.Lock()
+        self.version = 0  # bumped whenever matches or leaderboard change
     
     def generate_pairings(self) -> List[Tuple[str, str]]:
         """Generate random station pairings for current round."""
@@ -98,6 +99,7 @@ class TournamentBracket:
                 )
                 self.matches.append(match)
                 logger.info(f"Match created: {station_a} vs {station_b} in {round_num.value}")
+            self.version += 1
     
     def record_match_result(self, match_id: str, station_a_track: int, station_b_track: int, sync_time_ms: int):
         """Record result of a match."""
@@ -111,6 +113,7 @@ class TournamentBracket:
             match.track_b = station_b_track
             match.status = "completed"
             match.sync_time_ms = sync_time_ms
+            self.version += 1
             
             if station_a_track == station_b_track:
                 match.winner = match.station_a if random.random() < 0.5 else match.station_b
@@ -155,8 +158,8 @@ class TournamentBracket:
         
         return False
     
-    def get_leaderboard_json(self) -> str:
-        """Serialize leaderboard to JSON."""
+    def get_leaderboard(self) -> List[Dict]:
+        """Leaderboard rows sorted by matches won."""
         board_list = []
         for station, stats in sorted(
             self.leaderboard.items(),
@@ -172,7 +175,45 @@ class TournamentBracket:
                 'avg_sync_ms': int(avg_sync)
             })
         
-        return json.dumps(board_list)
+        return board_list
+    
+    def get_leaderboard_json(self) -> str:
+        """Serialize leaderboard to JSON."""
+        return json.dumps(self.get_leaderboard())
+    
+    def snapshot(self) -> Dict:
+        """Serializable bracket state for crash recovery."""
+        with self.lock:
+            matches = [dict(asdict(m), round_num=m.round_num.value) for m in self.matches]
+            leaderboard = [
+                dict(asdict(stats), fastest_sync_ms=None if stats.fastest_sync_ms == float('inf')
+                     else stats.fastest_sync_ms)
+                for stats in self.leaderboard.values()
+            ]
+            return {
+                'num_stations': self.num_stations,
+                'stations': list(self.stations),
+                'current_round': self.current_round.value,
+                'matches': matches,
+                'leaderboard': leaderboard,
+            }
+    
+    def restore(self, snapshot: Dict):
+        """Replace bracket state with a snapshot()."""
+        with self.lock:
+            self.num_stations = snapshot['num_stations']
+            self.num_rounds = {2: 1, 4: 2, 8: 3}[self.num_stations]
+            self.stations = list(snapshot['stations'])
+            self.current_round = TournamentRound(snapshot['current_round'])
+            self.matches = [Match(**dict(m, round_num=TournamentRound(m['round_num'])))
+                            for m in snapshot['matches']]
+            self.leaderboard = {}
+            for row in snapshot['leaderboard']:
+                stats = Leaderboard(**row)
+                if stats.fastest_sync_ms is None:
+                    stats.fastest_sync_ms = float('inf')
+                self.leaderboard[stats.station_id] = stats
+            self.version += 1
 
 
 class NeoPixelColors:
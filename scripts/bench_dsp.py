@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+DSPPipeline CPU per stream: full rate vs the 16kHz voice-band path.
+
+Feeds a speech-like signal (band-limited noise with a syllable-rate envelope,
+plus an attenuated, delayed copy of the far end as echo) through
+DSPPipeline.process_incoming in device-sized blocks. It reports microseconds
+per block, CPU as a share of one core per stream, and how many streams one
+core could carry. The voice-band path includes its down/up resampling.
+
+Usage:
+  python scripts/bench_dsp.py --seconds 5 --blocksize 256 --voice-rate 16000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi_server'))
+
+from dsp import DSPPipeline, PolyphaseResampler  # noqa: E402
+
+
+def speech_like(rate: int, seconds: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = int(rate * seconds)
+    b, a = signal.butter(4, [200, 3500], fs=rate, btype='band')
+    voice = signal.lfilter(b, a, rng.standard_normal(n))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * np.arange(n) / rate)  # ~4 syllables/s
+    return voice / np.abs(voice).max() * envelope * 0.3
+
+
+def run(label: str, pipeline: DSPPipeline, incoming: np.ndarray, outgoing, blocksize: int, rate: int):
+    blocks = len(incoming) // blocksize
+    start = time.process_time()
+    for i in range(blocks):
+        block = slice(i * blocksize, (i + 1) * blocksize)
+        pipeline.process_incoming(incoming[block], None if outgoing is None else outgoing[block])
+    cpu_s = time.process_time() - start
+    load = cpu_s / (blocks * blocksize / rate)
+    print(f"{label:<28} {cpu_s / blocks * 1e6:>9.1f}us/block  cpu {load * 100:>7.2f}%/stream  "
+          f"{1 / load if load else float('inf'):>7.1f} streams/core")
+    return load
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSPPipeline CPU per stream")
+    parser.add_argument('--seconds', type=float, default=5.0, help="audio per configuration")
+    parser.add_argument('--rate', type=int, default=44100)
+    parser.add_argument('--blocksize', type=int, default=256)
+    parser.add_argument('--voice-rate', type=int, default=16000)
+    parser.add_argument('--no-echo', action='store_true', help="skip the echo canceller runs")
+    args = parser.parse_args()
+
+    far = speech_like(args.rate, args.seconds, seed=1)
+    near = speech_like(args.rate, args.seconds, seed=2)
+    delay = int(0.03 * args.rate)
+    echo = np.concatenate([np.zeros(delay), far[:-delay]]) * 0.3
+    incoming = ((near + echo) * 32767).astype(np.int16)
+    outgoing = (far * 32767).astype(np.int16)
+
+    print("=" * 72)
+    print(f"DSPPipeline: {args.seconds:g}s per run, {args.blocksize} frames @ {args.rate}Hz, "
+          f"voice band {args.voice_rate}Hz")
+    print("=" * 72)
+
+    resampler = PolyphaseResampler(args.rate, args.voice_rate)
+    print(f"resampler    {resampler.up}/{resampler.down}, {resampler.taps} taps per phase")
+    for echo_on in ([False] if args.no_echo else [False, True]):
+        name = "gate+agc+filter+aec" if echo_on else "gate+agc+filter"
+        far_end = outgoing if echo_on else None
+        before = run(f"{name} @ {args.rate}", DSPPipeline(args.rate), incoming, far_end,
+                     args.blocksize, args.rate)
+        after = run(f"{name} @ {args.voice_rate}", DSPPipeline(args.rate, processing_rate=args.voice_rate),
+                    incoming, far_end, args.blocksize, args.rate)
+        print(f"{'':<28} {before / after:>9.2f}x less CPU per stream")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+EventBus fan-out throughput benchmark.
+
+Publishes N events and waits until every subscriber has handled them,
+reporting events/s and per-subscriber lag for 1 vs many subscribers, plus
+a run with one deliberately slow subscriber. A tournament-style run then
+compares per-pair consumers that filter every event themselves with
+consumers indexed by session_id.
+
+Usage:
+  python scripts/bench_eventbus.py --events 20000 --subscribers 1 50 --pairs 32
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi_server'))
+
+from events import Event, EventBus, EventType, OverflowPolicy  # noqa: E402
+
+
+async def run(num_events, num_subscribers, slow_ms=0.0):
+    bus = EventBus()
+
+    async def handler(event):
+        pass
+
+    async def slow_handler(event):
+        await asyncio.sleep(slow_ms / 1000)
+
+    subscriptions = [bus.subscribe(EventType.HEARTBEAT, handler, maxsize=1024, name=f"sub{i}")
+                     for i in range(num_subscribers)]
+    if slow_ms:
+        subscriptions.append(bus.subscribe(EventType.HEARTBEAT, slow_handler, maxsize=64,
+                                           overflow=OverflowPolicy.DROP_OLDEST, name="slow"))
+
+    start = time.perf_counter()
+    for _ in range(num_events):
+        await bus.publish(Event(type=EventType.HEARTBEAT))
+    publish_s = time.perf_counter() - start
+    for sub in subscriptions:
+        if sub.name != "slow":
+            await sub.join()
+    total_s = time.perf_counter() - start
+
+    stats = bus.stats()
+    fast = [s for name, s in stats.items() if name != "slow"]
+    label = f"{num_subscribers} subscribers" + (f" + slow {slow_ms:g}ms" if slow_ms else "")
+    print(f"{label:<28} publish {num_events / publish_s:>10,.0f} ev/s   "
+          f"delivered {num_events * num_subscribers / total_s:>10,.0f} deliveries/s   "
+          f"max lag {max(s['max_lag_ms'] for s in fast):7.2f}ms")
+    if slow_ms:
+        print(f"{'':<28} slow subscriber: delivered {stats['slow']['delivered']}, "
+              f"dropped {stats['slow']['dropped']}")
+    for sub in subscriptions:
+        sub.cancel()
+
+
+async def run_pairs(num_events, num_pairs, indexed):
+    bus = EventBus()
+    handled = [0]
+
+    def make_handler(session_id):
+        def handler(event):
+            if indexed or event.session_id == session_id:
+                handled[0] += 1
+        return handler
+
+    subscriptions = [
+        bus.subscribe(EventType.HEARTBEAT, make_handler(f"pair-{i}"), maxsize=num_events,
+                      session_id=f"pair-{i}" if indexed else None)
+        for i in range(num_pairs)
+    ]
+    events = [Event(type=EventType.HEARTBEAT, session_id=f"pair-{i % num_pairs}")
+              for i in range(num_events)]
+
+    start = time.perf_counter()
+    for event in events:
+        await bus.publish(event)
+    await bus.drain()
+    total_s = time.perf_counter() - start
+
+    deliveries = sum(s.delivered for s in subscriptions)
+    label = f"{num_pairs} pairs, " + ("indexed" if indexed else "filter in callback")
+    print(f"{label:<28} {num_events / total_s:>10,.0f} ev/s   "
+          f"deliveries {deliveries:>9,}   handled {handled[0]:>7,}")
+    for sub in subscriptions:
+        sub.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EventBus fan-out benchmark")
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--subscribers', type=int, nargs='*', default=[1, 50])
+    parser.add_argument('--slow-ms', type=float, default=5.0)
+    parser.add_argument('--pairs', type=int, default=32)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"EventBus fan-out: {args.events} events")
+    print("=" * 72)
+    for n in args.subscribers:
+        asyncio.run(run(args.events, n))
+    asyncio.run(run(args.events, max(args.subscribers), slow_ms=args.slow_ms))
+    for indexed in (False, True):
+        asyncio.run(run_pairs(args.events, args.pairs, indexed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Event object cost: the previous dataclass events vs the __slots__ events.
+
+Creates N events with both implementations and reports construction time,
+retained memory (tracemalloc) and the cost of serializing a 100-entry
+history repeatedly, which is what every dashboard connect does.
+
+Usage:
+  python scripts/bench_events.py --events 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi_server'))
+
+from events import EventType, StationLockedEvent  # noqa: E402
+
+
+# The event layout events.py used before switching to __slots__
+@dataclass
+class LegacyEvent:
+    type: EventType
+    timestamp: float = field(default_factory=lambda: datetime.utcnow().timestamp())
+    session_id: str = ""
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'type': self.type.value,
+            'timestamp': self.timestamp,
+            'session_id': self.session_id,
+            'data': {k: v for k, v in asdict(self).items()
+                     if k not in ['type', 'timestamp', 'session_id']}
+        })
+
+
+@dataclass
+class LegacyStationLockedEvent(LegacyEvent):
+    station_id: str = ""
+    track_id: int = 0
+
+    def __post_init__(self):
+        self.type = EventType.STATION_LOCKED
+
+
+def build(num_events, make):
+    tracemalloc.start()
+    start = time.perf_counter()
+    events = [make(i) for i in range(num_events)]
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return events, elapsed, retained
+
+
+def history_cost(history, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        '[' + ', '.join(e.to_json() for e in history) + ']'
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event object allocation benchmark")
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--history-requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = (
+        ('dataclass', lambda i: LegacyStationLockedEvent(
+            type=EventType.STATION_LOCKED, session_id=f"s{i % 50}", station_id='A', track_id=i % 5)),
+        ('slots', lambda i: StationLockedEvent(
+            session_id=f"s{i % 50}", station_id='A', track_id=i % 5)),
+    )
+
+    print("=" * 72)
+    print(f"{'events':<10} {'create ms':>10} {'bytes/event':>12} {'MB total':>9} {'history us':>11}")
+    print("=" * 72)
+    for name, make in rows:
+        events, elapsed, retained = build(args.events, make)
+        cost = history_cost(events[-100:], args.history_requests)
+        print(f"{name:<10} {elapsed * 1000:>10.1f} {retained / args.events:>12.0f} "
+              f"{retained / 2**20:>9.1f} {cost:>11.1f}")
+        del events
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the dashboard ZeroMQ fan-out bus.
+
+Measures:
+  1. Bus broadcast latency: core publisher -> N subscriber processes
+  2. Clients per worker: core publisher -> one Socket.IO worker -> C browser-like clients
+
+Usage:
+  python scripts/bench_fanout.py --subscribers 1 4 8 --messages 2000
+  python scripts/bench_fanout.py --clients 10 50 100 --port 5901
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi_server'))
+
+from dashboard.fanout import FanoutPublisher, FanoutSubscriber  # noqa: E402
+
+PUB_ENDPOINT = "tcp://127.0.0.1:5957"
+SNAPSHOT_ENDPOINT = "tcp://127.0.0.1:5958"
+
+BASE_STATE = {
+    'station_a': {'state': 'idle', 'track': 0, 'online': True},
+    'station_b': {'state': 'idle', 'track': 0, 'online': True},
+    'sync_count': 0,
+    'avg_sync_time': 0.0,
+    'current_state': 'idle',
+    'countdown': 0,
+    'events': [],
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def summarize(label, latencies_ms, expected):
+    if not latencies_ms:
+        print(f"{label:<28} no messages received")
+        return
+    print(f"{label:<28} recv {len(latencies_ms):>7}/{expected:<7} "
+          f"p50 {statistics.median(latencies_ms):7.3f}ms  "
+          f"p95 {percentile(latencies_ms, 95):7.3f}ms  "
+          f"p99 {percentile(latencies_ms, 99):7.3f}ms")
+
+
+def _subscriber_proc(expected, ready, results):
+    latencies = []
+    done = threading.Event()
+
+    def on_state(delta):
+        sent = delta.get('bench_sent_ns')
+        if sent is not None:
+            latencies.append((time.monotonic_ns() - sent) / 1e6)
+            if len(latencies) >= expected:
+                done.set()
+
+    sub = FanoutSubscriber(on_state, PUB_ENDPOINT, SNAPSHOT_ENDPOINT)
+    sub.start()
+    ready.set()
+    done.wait(timeout=30)
+    sub.stop()
+    results.put(latencies)
+
+
+def bench_bus(num_subscribers, messages, rate_hz):
+    ctx = multiprocessing.get_context("spawn")
+    publisher = FanoutPublisher(PUB_ENDPOINT, SNAPSHOT_ENDPOINT)
+    publisher.start(BASE_STATE)
+    results = ctx.Queue()
+    procs, readies = [], []
+    for _ in range(num_subscribers):
+        ready = ctx.Event()
+        proc = ctx.Process(target=_subscriber_proc, args=(messages, ready, results), daemon=True)
+        proc.start()
+        procs.append(proc)
+        readies.append(ready)
+    for ready in readies:
+        ready.wait(timeout=10)
+    time.sleep(0.5)  # let SUB connections settle (slow-joiner)
+
+    interval = 1.0 / rate_hz
+    for i in range(messages):
+        publisher.publish({'countdown': i, 'bench_sent_ns': time.monotonic_ns()})
+        time.sleep(interval)
+
+    latencies = []
+    for _ in procs:
+        latencies.extend(results.get(timeout=35))
+    for proc in procs:
+        proc.join(timeout=5)
+    publisher.stop()
+    summarize(f"bus x{num_subscribers} subscribers", latencies, messages * num_subscribers)
+
+
+def bench_clients(num_clients, messages, rate_hz, port):
+    import socketio
+
+    from dashboard.fanout import worker_main
+
+    ctx = multiprocessing.get_context("spawn")
+    publisher = FanoutPublisher(PUB_ENDPOINT, SNAPSHOT_ENDPOINT)
+    publisher.start(BASE_STATE)
+    worker = ctx.Process(target=worker_main,
+                         args=(0, "127.0.0.1", port, PUB_ENDPOINT, SNAPSHOT_ENDPOINT), daemon=True)
+    worker.start()
+    time.sleep(2.0)
+
+    latencies = []
+    lock = threading.Lock()
+    clients = []
+    for _ in range(num_clients):
+        client = socketio.Client(reconnection=False)
+
+        @client.on('status_update')
+        def on_status(data):
+            sent = data.get('bench_sent_ns')
+            if sent is not None:
+                with lock:
+                    latencies.append((time.monotonic_ns() - sent) / 1e6)
+
+        client.connect(f"http://127.0.0.1:{port}", transports=['websocket'])
+        clients.append(client)
+    time.sleep(0.5)
+
+    interval = 1.0 / rate_hz
+    start = time.perf_counter()
+    for i in range(messages):
+        publisher.publish({'countdown': i, 'bench_sent_ns': time.monotonic_ns()})
+        time.sleep(interval)
+    time.sleep(1.0)
+    elapsed = time.perf_counter() - start
+
+    for client in clients:
+        client.disconnect()
+    worker.terminate()
+    worker.join(timeout=5)
+    publisher.stop()
+    summarize(f"worker x{num_clients} clients", latencies, messages * num_clients)
+    print(f"{'':<28} {len(latencies) / elapsed:,.0f} deliveries/s from one worker process")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard fan-out benchmark")
+    parser.add_argument('--subscribers', type=int, nargs='*', default=[1, 4])
+    parser.add_argument('--clients', type=int, nargs='*', default=[10, 50])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=200.0, help="deltas per second")
+    parser.add_argument('--port', type=int, default=5901)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Dashboard fan-out benchmark")
+    print("=" * 60)
+    for n in args.subscribers:
+        bench_bus(n, args.messages, args.rate)
+    for n in args.clients:
+        bench_clients(n, min(args.messages, 200), min(args.rate, 20.0), args.port)
+
+
+if __name__ == '__main__':
+    main()
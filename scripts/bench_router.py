@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+AudioRouter CPU and latency with many simultaneous pairs (virtual backend).
+
+Opens one simulated duplex device per station (noise in, each with its own
+clock drift), routes them in pairs as a tournament round would, and runs a
+simulated session. It reports the routing loop's cost per block and, per
+route, the estimated mouth-to-ear latency each way and the CPU per block.
+
+Usage:
+  python scripts/bench_router.py --stations 8 --seconds 30 --blocksize 256
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi_server'))
+
+from audio_backend import VirtualBackend  # noqa: E402
+from audio_devices import AudioDeviceManager  # noqa: E402
+from router import AudioRouter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AudioRouter benchmark (virtual backend)")
+    parser.add_argument('--stations', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=30.0, help="simulated session length")
+    parser.add_argument('--rate', type=int, default=44100)
+    parser.add_argument('--blocksize', type=int, default=256)
+    parser.add_argument('--drift-ppm', type=float, default=50.0, help="clock error step between stations")
+    args = parser.parse_args()
+
+    backend = VirtualBackend([{'name': f'Virtual {i}', 'input': 'noise', 'drift_ppm': args.drift_ppm * i}
+                              for i in range(args.stations)])
+    devices = AudioDeviceManager({'audio': {}}, backend)
+    router = AudioRouter(devices, {f'STATION_{i}': i for i in range(args.stations)}, backend,
+                         samplerate=args.rate, blocksize=args.blocksize)
+
+    print("=" * 72)
+    print(f"AudioRouter: {args.stations} stations, {args.stations // 2} routes, {args.seconds:.0f}s simulated, "
+          f"{args.blocksize} frames @ {args.rate}Hz")
+    print("=" * 72)
+
+    router.start()
+    for i in range(0, args.stations - 1, 2):
+        router.connect(f'STATION_{i}', f'STATION_{i + 1}')
+    start = time.perf_counter()
+    callbacks = backend.run(args.seconds)
+    wall_s = time.perf_counter() - start
+    stats = router.stats()
+    router.stop()
+
+    print(f"speed-up     {args.seconds / wall_s:>10.1f}x real time ({callbacks:,} callbacks in {wall_s:.2f}s)")
+    print(f"routing loop {stats['loop_us']:>10.1f}us/block for all routes ({stats['block_ms']:.1f}ms blocks)")
+    for name, route in stats['routes'].items():
+        print(f"{name:<24} cpu {route['cpu_us']:>6.1f}us/block ({route['cpu_percent']:.2f}%)")
+        for direction, result in route.items():
+            if '->' in direction:
+                print(f"  {direction:<22} p50 {result.get('p50_ms')}ms  p95 {result.get('p95_ms')}ms  "
+                      f"underruns {result['capture']['underruns'] + result['playback']['underruns']}")
+
+
+if __name__ == '__main__':
+    main()
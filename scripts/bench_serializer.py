@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Payload size and encode time: JSON vs msgpack for dashboard Socket.IO messages.
+
+Compares the full Socket.IO packets for typical `status_update` (dashboard
+state with a full 50-entry event log) and `event_history` (100 bus events).
+
+Usage:
+  python scripts/bench_serializer.py --iterations 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+import msgpack
+from socketio import packet
+
+
+def status_update_payload():
+    now = time.time()
+    return {
+        'station_a': {'state': 'scanning', 'track': 3, 'online': True},
+        'station_b': {'state': 'locked', 'track': 2, 'online': True},
+        'sync_count': 187,
+        'avg_sync_time': 1.8342,
+        'current_state': 'scanning',
+        'countdown': 42,
+        'events': [
+            {'time': now - i * 3.7, 'event': random.choice(['heartbeat', 'state_change', 'matched']),
+             'data': {'station': random.choice('AB'), 'state': 'scanning'}}
+            for i in range(50)
+        ],
+    }
+
+
+def event_history_payload():
+    # Same layout as events.Event.to_json()
+    now = time.time()
+    return [
+        {'type': 'station_locked', 'timestamp': now - i * 1.3, 'session_id': f"session-{i // 10}",
+         'data': {'station_id': random.choice('AB'), 'track_id': random.randint(1, 5)}}
+        for i in range(100)
+    ]
+
+
+def json_packet(event, payload):
+    return packet.Packet(packet.EVENT, data=[event, payload]).encode()
+
+
+def msgpack_packet(event, payload):
+    return packet.Packet(packet.EVENT, data=[event, msgpack.packb(payload, use_bin_type=True)]).encode()
+
+
+def packet_size(encoded):
+    parts = encoded if isinstance(encoded, list) else [encoded]
+    return sum(len(p.encode() if isinstance(p, str) else p) for p in parts)
+
+
+def time_per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs msgpack Socket.IO payloads")
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"{'message':<16} {'codec':<8} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    print("=" * 72)
+    for name, payload in (('status_update', status_update_payload()),
+                          ('event_history', event_history_payload())):
+        json_size = packet_size(json_packet(name, payload))
+        msgpack_size = packet_size(msgpack_packet(name, payload))
+        json_text = json.dumps(payload)
+        msgpack_bytes = msgpack.packb(payload, use_bin_type=True)
+        rows = (
+            ('json', json_size,
+             time_per_call_us(lambda: json_packet(name, payload), args.iterations),
+             time_per_call_us(lambda: json.loads(json_text), args.iterations)),
+            ('msgpack', msgpack_size,
+             time_per_call_us(lambda: msgpack_packet(name, payload), args.iterations),
+             time_per_call_us(lambda: msgpack.unpackb(msgpack_bytes), args.iterations)),
+        )
+        for codec, size, encode_us, decode_us in rows:
+            print(f"{name:<16} {codec:<8} {size:>8} {encode_us:>10.1f} {decode_us:>10.1f}")
+        print(f"{'':<16} msgpack is {100 * (1 - msgpack_size / json_size):.1f}% smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+MatchStore insert throughput and indexed query latency.
+
+Fills a fresh SQLite (WAL) database through the batched background writer
+with N sessions + N matches, and N/10 tournament bracket rows, then times
+each report/leaderboard query.
+
+Usage:
+  python scripts/bench_storage.py --rows 1000000 --db /tmp/bench_storage.db
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'raspberry_pi_server'))
+
+from db import create_db_engine  # noqa: E402
+from storage import MatchStore  # noqa: E402
+
+
+class BracketMatch:
+    """Stand-in for tournament.Match with the fields MatchStore reads."""
+
+    class _Round:
+        def __init__(self, value):
+            self.value = value
+
+    def __init__(self, i):
+        self.match_id = f"m{i}"
+        self.round_num = self._Round(random.randint(1, 5))
+        self.status = random.choice(['pending', 'in_progress', 'completed', 'completed'])
+        self.station_a = f"STATION_{random.randrange(8)}"
+        self.station_b = f"STATION_{random.randrange(8)}"
+        self.winner = self.station_a if self.status == 'completed' else None
+        self.sync_time_ms = random.uniform(50, 500)
+
+
+def timed_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MatchStore benchmark")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--db', default='/tmp/bench_storage.db')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    store = MatchStore(create_db_engine(f"sqlite:///{args.db}"), batch_size=5000,
+                       max_queue=args.rows * 2 + 1)
+
+    print("=" * 72)
+    print(f"MatchStore: {args.rows:,} sessions + {args.rows:,} matches + "
+          f"{args.rows // 10:,} bracket rows")
+    print("=" * 72)
+
+    start_ts = time.time() - args.rows * 3.0  # one session every 3 s
+    session_ids = []
+    store.start()
+    start = time.perf_counter()
+    for i in range(args.rows):
+        created_at = start_ts + i * 3.0
+        track = random.randint(1, 5)
+        session_id = uuid.uuid4().hex
+        session_ids.append(session_id)
+        store.record_session('A', 'B', 'matched', track=track, session_id=session_id,
+                             created_at=created_at)
+        store.record_match(session_id, 'A', 'B', track, sync_time_ms=random.uniform(50, 500),
+                           created_at=created_at)
+    for i in range(args.rows // 10):
+        store.record_bracket_match(BracketMatch(i))
+    for i in range(64):
+        store.record_station(f"STATION_{i}", random.choice(['online', 'offline']))
+    enqueue_s = time.perf_counter() - start
+    store.stop()
+    total_s = time.perf_counter() - start
+    print(f"enqueue   {store.rows_written / enqueue_s:>12,.0f} rows/s")
+    print(f"written   {store.rows_written / total_s:>12,.0f} rows/s  "
+          f"({store.rows_written:,} rows in {store.batches_written:,} transactions, {total_s:.1f}s)")
+    print(f"db size   {os.path.getsize(args.db) / 2**20:>12.1f} MB")
+    print()
+
+    day_end = start_ts + args.rows * 3.0
+    queries = (
+        ('recent_sessions (last hour)', lambda: store.recent_sessions(day_end - 3600)),
+        ('matches_for_session', lambda: store.matches_for_session(random.choice(session_ids))),
+        ('report_summary (one day)', lambda: store.report_summary(day_end - 86400, day_end)),
+        ('stations_by_status', lambda: store.stations_by_status('online')),
+        ('bracket_round', lambda: store.bracket_round(3, 'completed')),
+        ('leaderboard (all rounds)', lambda: store.leaderboard()),
+    )
+    print(f"{'query':<30} {'median ms':>10} {'max ms':>10}")
+    for name, fn in queries:
+        median_ms, max_ms = timed_ms(fn, args.repeat)
+        print(f"{name:<30} {median_ms:>10.2f} {max_ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()